@@ -1,9 +1,15 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware  # 🆕 Adicionar
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hmac
 import logging
+import os
+import threading
+import time
 import traceback
 
 # Carrega variáveis de ambiente do arquivo .env
@@ -19,12 +25,39 @@ try:
     from .services.rule_engine import apply_rules, get_display_name, comparar_referencias
     from .services.specialty_selector import select_specialties
     from .services.nlg import build_briefing
+    from .services.ocr_engine import OCRBudget
+    from .services.job_queue import JobQueue
+    from .services.history_store import get_history_store, parse_exam_date, flags_from_findings
+    from .services.hot_reload import ConfigWatcher, current_snapshot, reload_config, config_metrics
+    from .services.pattern_profiler import find_profile
+    from .services.regex_engine import RegexBudget, regex_metrics
+    from .services.layout_fingerprint import layout_metrics
+    from .services.records import LabValue, to_payload
+    from .services.reference_index import IDADE_PADRAO
+    from .services.json_response import FastJSONResponse, fast_json_enabled
 except ImportError:
     # Fallback para execução direta
     from services.pdf_parser import extract_lab_values
     from services.rule_engine import apply_rules, get_display_name, comparar_referencias
     from services.specialty_selector import select_specialties
     from services.nlg import build_briefing
+    from services.ocr_engine import OCRBudget
+    from services.job_queue import JobQueue
+    from services.history_store import get_history_store, parse_exam_date, flags_from_findings
+    from services.hot_reload import ConfigWatcher, current_snapshot, reload_config, config_metrics
+    from services.pattern_profiler import find_profile
+    from services.regex_engine import RegexBudget, regex_metrics
+    from services.layout_fingerprint import layout_metrics
+    from services.records import LabValue, to_payload
+    from services.reference_index import IDADE_PADRAO
+    from services.json_response import FastJSONResponse, fast_json_enabled
+
+# Analitos do hemograma completo, na ordem de exibição
+ANALITOS_HEMOGRAMA = [
+    "hemacias", "hemoglobina", "hematocrito", "vcm", "hcm", "chcm", "rdw",
+    "leucocitos", "neutrofilos", "eosinofilos", "basofilos",
+    "linfocitos", "monocitos", "plaquetas",
+]
 
 # --- Modelos de Resposta Pydantic ---
 class LabFinding(BaseModel):
@@ -40,6 +73,14 @@ class RawLabValue(BaseModel):
     analito: str
     valor: float
 
+class CompoundFinding(BaseModel):
+    regra: str
+    descricao_achado: str
+    severidade: int
+    especialidade: str
+    diretriz: str
+    analitos: List[str]
+
 class ReferenceComparison(BaseModel):
     analito: str
     valor: float
@@ -49,10 +90,82 @@ class ReferenceComparison(BaseModel):
 
 class InterpretationResponse(BaseModel):
     lab_findings: List[LabFinding]
+    # Padrões que combinam vários analitos (data/compound_rules.csv)
+    achados_compostos: List[CompoundFinding] = []
     recommended_specialties: List[str]
     patient_briefing: str
     lab_values_raw: List[RawLabValue]
     comparacao_referencias: List[ReferenceComparison] = []
+    # OCR interrompido pelo orçamento de tempo: valores podem estar incompletos
+    resultado_parcial: bool = False
+    analitos_ausentes: List[str] = []
+    # Valores gravados no histórico do paciente (opt-in via paciente_id)
+    historico_salvo: bool = False
+    # Versão de padrões/referências usada (muda a cada recarga)
+    versao_config: str = ""
+    # Idade não informada: interpretado com a referência adulta (IDADE_PADRAO)
+    idade_presumida: bool = False
+
+class FileInterpretation(BaseModel):
+    arquivo: str
+    tempo_extracao_ms: float = 0.0
+    tempo_total_ms: float = 0.0
+    erro: Optional[str] = None
+    resultado: Optional[InterpretationResponse] = None
+
+class BatchInterpretationResponse(BaseModel):
+    arquivos: List[FileInterpretation]
+    # Valores de todos os arquivos interpretados juntos (quando mesclar=true)
+    resultado_mesclado: Optional[InterpretationResponse] = None
+    tempo_total_ms: float
+
+class TrendPoint(BaseModel):
+    data_exame: str
+    valor: float
+    resultado: str
+
+class FlagTransition(BaseModel):
+    data_exame: str
+    de: str
+    para: str
+
+class AnalyteTrend(BaseModel):
+    analito: str
+    n_exames: int
+    ultimo_valor: float
+    delta: Optional[float] = None  # em relação ao exame anterior
+    delta_total: Optional[float] = None  # em relação ao primeiro exame
+    delta_percentual: Optional[float] = None
+    inclinacao_anual: Optional[float] = None  # unidades do analito por ano
+    transicoes: List[FlagTransition] = []
+    serie: List[TrendPoint]
+
+class TrendsRequest(BaseModel):
+    paciente_id: str = Field(..., description="Identificador usado ao salvar os exames (ex.: CPF, prontuário).")
+    analitos: Optional[List[str]] = Field(None, description="Filtrar analitos (ex.: ['hemoglobina']).")
+
+class TrendsResponse(BaseModel):
+    analitos: List[AnalyteTrend]
+
+class JobProgress(BaseModel):
+    pagina: int
+    total_paginas: int
+    etapa: str
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+    # True quando o mesmo PDF (com os mesmos dados do paciente) já estava na fila
+    deduplicado: bool = False
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str  # pendente | processando | concluido | erro
+    progresso: Optional[JobProgress] = None
+    resultado: Optional[InterpretationResponse] = None
+    erro: Optional[str] = None
+    criado_em: float
+    atualizado_em: float
 
 class ManualLabValues(BaseModel):
     """Entrada manual de valores de hemograma (sem PDF).
@@ -63,6 +176,7 @@ class ManualLabValues(BaseModel):
     """
     genero: str = Field(..., description="'masculino' ou 'feminino'.")
     idade: int = Field(..., ge=0, le=150, description="Idade do paciente em anos.")
+    idade_meses: float = Field(0, ge=0, lt=12, description="Meses além dos anos completos (lactentes).")
     hemacias: Optional[float] = None
     hemoglobina: Optional[float] = None
     hematocrito: Optional[float] = None
@@ -77,17 +191,14 @@ class ManualLabValues(BaseModel):
     linfocitos: Optional[float] = None
     monocitos: Optional[float] = None
     plaquetas: Optional[float] = None
+    paciente_id: Optional[str] = Field(None, description="Salvar no histórico do paciente (opcional).")
+    data_exame: Optional[str] = Field(None, description="Data do exame (AAAA-MM-DD); padrão: hoje.")
 
-    def to_lab_values(self) -> List[dict]:
+    def to_lab_values(self) -> List[LabValue]:
         """Converte os campos preenchidos na lista esperada pelo motor de regras."""
-        analitos = [
-            "hemacias", "hemoglobina", "hematocrito", "vcm", "hcm", "chcm", "rdw",
-            "leucocitos", "neutrofilos", "eosinofilos", "basofilos",
-            "linfocitos", "monocitos", "plaquetas",
-        ]
         return [
-            {"analito": nome, "valor": float(getattr(self, nome))}
-            for nome in analitos
+            LabValue(nome, float(getattr(self, nome)))
+            for nome in ANALITOS_HEMOGRAMA
             if getattr(self, nome) is not None
         ]
 
@@ -98,6 +209,8 @@ app = FastAPI(
     version="1.0.0"
 )
 
+_config_watcher: Optional[ConfigWatcher] = None
+
 # Evento de startup para verificar dependências
 @app.on_event("startup")
 async def startup_event():
@@ -121,6 +234,11 @@ async def startup_event():
             else:
                 logger.warning(f"⚠️ Arquivo não encontrado: {file_path}")
         
+        # Recarga automática de padrões e referências (CONFIG_WATCH_INTERVAL)
+        global _config_watcher
+        _config_watcher = ConfigWatcher.from_env()
+        _config_watcher.start()
+
         logger.info("🎉 API inicializada com sucesso!")
         
     except Exception as e:
@@ -132,6 +250,12 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup durante o shutdown."""
     logger.info("🛑 API sendo finalizada...")
+    if _job_queue is not None:
+        _job_queue.stop()
+    if _config_watcher is not None:
+        _config_watcher.stop()
+    if _batch_executor is not None:
+        _batch_executor.shutdown(wait=False)
     logger.info("👋 Shutdown concluído")
 
 # 🆕 Adicionar CORS
@@ -225,23 +349,16 @@ async def debug_info():
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/interpret", response_model=InterpretationResponse)
-async def interpret_results(
-        file: UploadFile = File(..., description="Arquivo PDF do laudo laboratorial."),
-        genero: str = Form(..., description="Gênero do paciente (ex: 'masculino' ou 'feminino')."),
-        idade: int = Form(..., description="Idade do paciente em anos.")
-):
-    """
-    Analisa um laudo laboratorial em PDF para interpretar os resultados.
-    """
-    # Log detalhado dos dados recebidos para debug
-    logger.info(f"🔍 Dados recebidos - Arquivo: {file.filename}, Gênero: {genero}, Idade: {idade}")
-    
-    # Validações de entrada com logging detalhado
+def _validar_arquivo(file: UploadFile):
     if not file.filename or not file.filename.lower().endswith('.pdf'):
         logger.error(f"❌ Arquivo inválido: {file.filename}")
         raise HTTPException(status_code=422, detail="Formato de arquivo inválido. Por favor, envie um PDF.")
-    
+
+def _validar_paciente(genero: str, idade: int, idade_meses: float = 0) -> float:
+    """
+    Valida gênero e idade; retorna a idade em anos (com os meses como fração,
+    para faixas pediátricas). 0 = idade não informada.
+    """
     if genero.lower() not in ['masculino', 'feminino']:
         logger.error(f"❌ Gênero inválido: {genero}")
         raise HTTPException(status_code=422, detail="Gênero deve ser 'masculino' ou 'feminino'.")
@@ -250,116 +367,210 @@ async def interpret_results(
     if idade < 0 or idade > 150:
         logger.error(f"❌ Idade inválida: {idade}")
         raise HTTPException(status_code=422, detail="Idade deve estar entre 0 e 150 anos.")
+
+    if idade_meses < 0 or idade_meses >= 12:
+        logger.error(f"❌ Meses inválidos: {idade_meses}")
+        raise HTTPException(status_code=422, detail="Meses devem estar entre 0 e 11.")
+
+    return idade + idade_meses / 12
+
+def _idade_para_analise(idade_anos: float) -> Tuple[float, bool]:
+    """Idade usada nas referências e se ela foi presumida (idade não informada)."""
+    if idade_anos > 0:
+        logger.info(f"📊 Usando idade {idade_anos:g} para análise")
+        return idade_anos, False
+    logger.warning(f"⚠️ Idade não informada: usando {IDADE_PADRAO} anos (referência adulta)")
+    return IDADE_PADRAO, True
+
+async def _ler_pdf(file: UploadFile) -> bytes:
+    """Lê o upload, rejeitando arquivos vazios ou acima de 10MB."""
+    logger.info(f"📋 Processando arquivo: {file.filename} (tamanho: {file.size} bytes)")
+    
+    # Verificar tamanho do arquivo
+    if file.size and file.size > 10 * 1024 * 1024:  # 10MB
+        raise HTTPException(
+            status_code=413, 
+            detail="Arquivo muito grande. O tamanho máximo permitido é 10MB."
+        )
     
-    # Se idade for 0, usar um valor padrão para análise (ex: 30 anos)
-    idade_para_analise = idade if idade > 0 else 30
-    logger.info(f"📊 Usando idade {idade_para_analise} para análise (original: {idade})")
+    pdf_content = await file.read()
+    
+    if len(pdf_content) == 0:
+        raise HTTPException(status_code=400, detail="Arquivo PDF está vazio.")
+    
+    logger.info(f"📄 Arquivo lido: {len(pdf_content)} bytes")
+    return pdf_content
 
+def _validar_historico(paciente_id: Optional[str], data_exame: Optional[str]) -> Optional[str]:
+    """Valida a data do exame quando o histórico foi solicitado; retorna a data ISO."""
+    if not paciente_id:
+        return None
+    try:
+        return parse_exam_date(data_exame)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Data do exame inválida. Use o formato AAAA-MM-DD.")
+
+def _salvar_historico(paciente_id: Optional[str], data_exame: Optional[str],
+                      raw_values: List[LabValue], findings: list) -> bool:
+    """Grava os valores no histórico (opt-in); falhas não afetam a interpretação."""
+    if not paciente_id:
+        return False
+    store = get_history_store()
+    if store is None:
+        logger.warning("⚠️ Histórico solicitado, mas desabilitado no servidor")
+        return False
     try:
-        logger.info(f"📋 Processando arquivo: {file.filename} (tamanho: {file.size} bytes)")
+        store.record(paciente_id, data_exame, raw_values,
+                     flags_from_findings(raw_values, findings, get_display_name))
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao gravar histórico: {e}")
+        return False
+
+def _extrair_valores(pdf_content: bytes, progress_callback=None, snapshot=None) -> Tuple[List[LabValue], bool]:
+    """
+    Extrai os valores brutos do PDF. Retorna (valores, resultado_parcial);
+    erros de extração viram HTTPException com a mensagem para o usuário.
+    """
+    snapshot = snapshot or current_snapshot()
+    # 1. Extrair valores brutos (OCR e padrões limitados por orçamentos de tempo)
+    ocr_budget = OCRBudget.from_env()
+    regex_budget = RegexBudget.from_env()
+    try:
+        raw_values = extract_lab_values(pdf_content, ocr_budget=ocr_budget, progress_callback=progress_callback,
+                                        registry=snapshot.padroes, regex_budget=regex_budget)
+        logger.info(f"🔍 Valores extraídos: {len(raw_values)} analitos")
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"❌ Erro na extração: {error_msg}")
         
-        # Verificar tamanho do arquivo
-        if file.size and file.size > 10 * 1024 * 1024:  # 10MB
+        # Mensagens específicas baseadas no tipo de erro
+        if "PDF protegido por senha" in error_msg:
             raise HTTPException(
-                status_code=413, 
-                detail="Arquivo muito grande. O tamanho máximo permitido é 10MB."
+                status_code=422,
+                detail="PDF protegido por senha. Remova a proteção antes de enviar."
             )
-        
-        pdf_content = await file.read()
-        
-        if len(pdf_content) == 0:
-            raise HTTPException(status_code=400, detail="Arquivo PDF está vazio.")
-        
-        logger.info(f"📄 Arquivo lido: {len(pdf_content)} bytes")
-
-        # 1. Extrair valores brutos
-        try:
-            raw_values = extract_lab_values(pdf_content)
-            logger.info(f"🔍 Valores extraídos: {len(raw_values)} analitos")
-        except Exception as e:
-            error_msg = str(e)
-            logger.error(f"❌ Erro na extração: {error_msg}")
-            
-            # Mensagens específicas baseadas no tipo de erro
-            if "PDF protegido por senha" in error_msg:
-                raise HTTPException(
-                    status_code=422,
-                    detail="PDF protegido por senha. Remova a proteção antes de enviar."
-                )
-            elif "assinatura PDF válida" in error_msg:
-                raise HTTPException(
-                    status_code=422,
-                    detail="Arquivo não é um PDF válido. Verifique o formato do arquivo."
-                )
-            elif "muito pequeno" in error_msg:
-                raise HTTPException(
-                    status_code=422,
-                    detail="Arquivo muito pequeno ou corrompido. Envie um PDF válido."
-                )
-            elif "corrompido" in error_msg:
-                raise HTTPException(
-                    status_code=422,
-                    detail="PDF corrompido ou danificado. Tente gerar o PDF novamente."
-                )
-            elif "OCR não disponível" in error_msg:
-                raise HTTPException(
-                    status_code=422,
-                    detail="PDF baseado em imagens detectado, mas OCR não está disponível. Envie um PDF com texto selecionável."
-                )
-            elif "configuração não encontrado" in error_msg:
-                logger.error("❌ Erro de configuração do sistema")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Erro de configuração do sistema. Tente novamente em alguns minutos."
-                )
-            else:
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Não foi possível extrair texto do PDF: {error_msg}"
-                )
-        
-        if not raw_values:
-            logger.warning(
-                "Nenhum valor laboratorial encontrado. Possíveis causas: PDF corrompido/não suportado, texto ilegível, ou ausência de resultados. Sugestões: reenviar PDF válido, verificar qualidade/legibilidade, garantir texto selecionável."
+        elif "assinatura PDF válida" in error_msg:
+            raise HTTPException(
+                status_code=422,
+                detail="Arquivo não é um PDF válido. Verifique o formato do arquivo."
             )
+        elif "muito pequeno" in error_msg:
             raise HTTPException(
                 status_code=422,
-                detail=(
-                    "Nenhum valor laboratorial foi encontrado no PDF.\n\n"
-                    "Possíveis causas:\n"
-                    "- PDF corrompido ou com formato/layout não suportado;\n"
-                    "- Texto do laudo ilegível, muito distorcido ou apenas imagem;\n"
-                    "- O arquivo não contém resultados de exames laboratoriais.\n\n"
-                    "Como resolver:\n"
-                    "- Tente enviar outro PDF ou exportar novamente o laudo em melhor qualidade;\n"
-                    "- Verifique se o PDF possui texto selecionável (não apenas imagens);\n"
-                    "- Se o problema persistir, verifique se o laudo segue formatos comuns de laboratórios."
-                )
+                detail="Arquivo muito pequeno ou corrompido. Envie um PDF válido."
             )
-
-        # 2. Aplicar motor de regras
-        try:
-            analyzed_findings = apply_rules(raw_values, genero=genero, idade=idade_para_analise)
-            logger.info(f"⚙️ Regras aplicadas: {len(analyzed_findings)} achados")
-        except Exception as e:
-            logger.error(f"❌ Erro no motor de regras: {e}")
+        elif "corrompido" in error_msg:
             raise HTTPException(
-                status_code=500,
-                detail="Erro ao processar regras de análise. Tente novamente."
+                status_code=422,
+                detail="PDF corrompido ou danificado. Tente gerar o PDF novamente."
             )
-
-        # 3. Selecionar especialidades
-        try:
-            specialties = select_specialties(analyzed_findings)
-            logger.info(f"👨‍⚕️ Especialidades selecionadas: {len(specialties)}")
-        except Exception as e:
-            logger.error(f"❌ Erro na seleção de especialidades: {e}")
+        elif "OCR não disponível" in error_msg:
+            raise HTTPException(
+                status_code=422,
+                detail="PDF baseado em imagens detectado, mas OCR não está disponível. Envie um PDF com texto selecionável."
+            )
+        elif "configuração não encontrado" in error_msg:
+            logger.error("❌ Erro de configuração do sistema")
             raise HTTPException(
                 status_code=500,
-                detail="Erro ao selecionar especialidades. Tente novamente."
+                detail="Erro de configuração do sistema. Tente novamente em alguns minutos."
+            )
+        else:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Não foi possível extrair texto do PDF: {error_msg}"
+            )
+    
+    if not raw_values and ocr_budget.esgotado:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                "O reconhecimento de texto (OCR) do PDF excedeu o tempo limite sem encontrar valores. "
+                "Envie um PDF com texto selecionável ou uma digitalização de melhor qualidade, "
+                "ou use a entrada manual."
             )
+        )
+
+    if not raw_values:
+        logger.warning(
+            "Nenhum valor laboratorial encontrado. Possíveis causas: PDF corrompido/não suportado, texto ilegível, ou ausência de resultados. Sugestões: reenviar PDF válido, verificar qualidade/legibilidade, garantir texto selecionável."
+        )
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                "Nenhum valor laboratorial foi encontrado no PDF.\n\n"
+                "Possíveis causas:\n"
+                "- PDF corrompido ou com formato/layout não suportado;\n"
+                "- Texto do laudo ilegível, muito distorcido ou apenas imagem;\n"
+                "- O arquivo não contém resultados de exames laboratoriais.\n\n"
+                "Como resolver:\n"
+                "- Tente enviar outro PDF ou exportar novamente o laudo em melhor qualidade;\n"
+                "- Verifique se o PDF possui texto selecionável (não apenas imagens);\n"
+                "- Se o problema persistir, verifique se o laudo segue formatos comuns de laboratórios."
+            )
+        )
+
+    return raw_values, ocr_budget.esgotado or regex_budget.incompleto
+
+def _responder(conteudo: dict):
+    """
+    Resposta das rotas de interpretação. O conteúdo vem do próprio pipeline
+    já no formato do response_model: com FAST_JSON_RESPONSES (padrão), vai
+    direto para o FastJSONResponse, sem revalidação; sem ele, o FastAPI
+    valida e serializa como antes.
+    """
+    if fast_json_enabled():
+        return FastJSONResponse(conteudo)
+    return to_payload(conteudo)
+
+def _interpretar_valores(raw_values: List[LabValue], genero: str, idade: float,
+                         resultado_parcial: bool = False, gerar_briefing: bool = True,
+                         snapshot=None) -> dict:
+    """
+    Regras → especialidades → briefing → comparação de referências sobre
+    valores já extraídos. Sem `gerar_briefing`, o briefing fica vazio.
+    `idade` em anos (0 = não informada); `snapshot` fixa a versão de
+    padrões/referências da requisição. Valores, achados e comparações seguem
+    como registros (services/records); a serialização fica para a resposta
+    (_responder).
+    """
+    snapshot = snapshot or current_snapshot()
+    idade_para_analise, idade_presumida = _idade_para_analise(idade)
+    # 2. Aplicar motor de regras
+    try:
+        analyzed_findings = apply_rules(raw_values, genero=genero, idade=idade_para_analise,
+                                        referencias=snapshot.referencias)
+        logger.info(f"⚙️ Regras aplicadas: {len(analyzed_findings)} achados")
+    except Exception as e:
+        logger.error(f"❌ Erro no motor de regras: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao processar regras de análise. Tente novamente."
+        )
 
-        # 4. Construir o briefing
+    # Padrões combinados (regras compostas)
+    try:
+        achados_compostos = snapshot.compostas.apply(raw_values, genero, idade_para_analise, snapshot.referencias)
+        logger.info(f"🧩 Regras compostas: {len(achados_compostos)} achado(s)")
+    except Exception as e:
+        logger.error(f"❌ Erro nas regras compostas: {e}")
+        achados_compostos = []
+
+    # 3. Selecionar especialidades
+    try:
+        specialties = select_specialties(analyzed_findings + achados_compostos)
+        logger.info(f"👨‍⚕️ Especialidades selecionadas: {len(specialties)}")
+    except Exception as e:
+        logger.error(f"❌ Erro na seleção de especialidades: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail="Erro ao selecionar especialidades. Tente novamente."
+        )
+
+    # 4. Construir o briefing
+    briefing = ""
+    if gerar_briefing:
         try:
             briefing = build_briefing(analyzed_findings, specialties)
             logger.info("📝 Briefing gerado com sucesso")
@@ -368,23 +579,76 @@ async def interpret_results(
             # Briefing é opcional, não deve falhar a requisição
             briefing = "Briefing temporariamente indisponível. Os resultados dos exames estão disponíveis acima."
 
-        # Preparar lista de valores brutos com nomes amigáveis
-        raw_display_values = [
-            {"analito": get_display_name(v["analito"]), "valor": v["valor"]}
-            for v in raw_values
-        ]
+    # Preparar lista de valores brutos com nomes amigáveis
+    raw_display_values = [LabValue(get_display_name(v.analito), v.valor) for v in raw_values]
+
+    # Comparação entre referência PNS e laboratorial
+    comparacao = comparar_referencias(raw_values, genero=genero, idade=idade_para_analise,
+                                      referencias=snapshot.referencias)
+
+    # Resultado parcial: informar o que o OCR não chegou a encontrar
+    analitos_ausentes = []
+    if resultado_parcial:
+        encontrados = {v.analito for v in raw_values}
+        analitos_ausentes = [get_display_name(a) for a in ANALITOS_HEMOGRAMA if a not in encontrados]
+        logger.warning(f"⏱️ Resultado parcial: {len(analitos_ausentes)} analito(s) ausente(s)")
+
+    logger.info("✅ Processamento concluído com sucesso")
+    return {
+        "lab_findings": analyzed_findings,
+        "achados_compostos": achados_compostos,
+        "recommended_specialties": specialties,
+        "patient_briefing": briefing,
+        "lab_values_raw": raw_display_values,
+        "comparacao_referencias": comparacao,
+        "resultado_parcial": resultado_parcial,
+        "analitos_ausentes": analitos_ausentes,
+        "historico_salvo": False,
+        "versao_config": snapshot.versao,
+        "idade_presumida": idade_presumida
+    }
+
+def _interpretar_pdf(pdf_content: bytes, genero: str, idade: float,
+                     progress_callback=None) -> dict:
+    """
+    Pipeline completo de um laudo em PDF: extração → regras → especialidades →
+    briefing → comparação de referências. Compartilhado por /interpret e pelos
+    jobs assíncronos.
+    """
+    snapshot = current_snapshot()
+    raw_values, parcial = _extrair_valores(pdf_content, progress_callback, snapshot)
+    return _interpretar_valores(raw_values, genero, idade, parcial, snapshot=snapshot)
 
-        # Comparação entre referência PNS e laboratorial
-        comparacao = comparar_referencias(raw_values, genero=genero, idade=idade_para_analise)
+@app.post("/interpret", response_model=InterpretationResponse, response_class=FastJSONResponse)
+async def interpret_results(
+        file: UploadFile = File(..., description="Arquivo PDF do laudo laboratorial."),
+        genero: str = Form(..., description="Gênero do paciente (ex: 'masculino' ou 'feminino')."),
+        idade: int = Form(..., description="Idade do paciente em anos."),
+        idade_meses: float = Form(0, description="Meses além dos anos completos (lactentes)."),
+        paciente_id: Optional[str] = Form(None, description="Salvar no histórico do paciente (opcional)."),
+        data_exame: Optional[str] = Form(None, description="Data do exame (AAAA-MM-DD); padrão: hoje.")
+):
+    """
+    Analisa um laudo laboratorial em PDF para interpretar os resultados.
+    """
+    # Log detalhado dos dados recebidos para debug
+    logger.info(f"🔍 Dados recebidos - Arquivo: {file.filename}, Gênero: {genero}, Idade: {idade}")
+    # Validações de entrada com logging detalhado
+    _validar_arquivo(file)
+    idade_anos = _validar_paciente(genero, idade, idade_meses)
+    data_exame = _validar_historico(paciente_id, data_exame)
 
-        logger.info("✅ Processamento concluído com sucesso")
-        return {
-            "lab_findings": analyzed_findings,
-            "recommended_specialties": specialties,
-            "patient_briefing": briefing,
-            "lab_values_raw": raw_display_values,
-            "comparacao_referencias": comparacao
-        }
+    try:
+        pdf_content = await _ler_pdf(file)
+        snapshot = current_snapshot()
+        # Extração (texto, OCR e padrões) fora do event loop
+        loop = asyncio.get_running_loop()
+        raw_values, parcial = await loop.run_in_executor(
+            None, lambda: _extrair_valores(pdf_content, snapshot=snapshot))
+        resultado = _interpretar_valores(raw_values, genero, idade_anos, parcial, snapshot=snapshot)
+        resultado["historico_salvo"] = _salvar_historico(paciente_id, data_exame, raw_values,
+                                                         resultado["lab_findings"])
+        return _responder(resultado)
     
     except HTTPException:
         raise
@@ -398,7 +662,171 @@ async def interpret_results(
             detail="Erro interno do servidor. Nossa equipe foi notificada e está trabalhando na correção."
         )
 
-@app.post("/interpret-manual", response_model=InterpretationResponse)
+# --- Vários laudos por requisição ---
+MAX_BATCH_FILES = int(os.getenv('MAX_BATCH_FILES', '10'))
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Pool compartilhado pelas requisições de /interpret-batch (BATCH_WORKERS)."""
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('BATCH_WORKERS', '4')),
+                    thread_name_prefix="batch-worker"
+                )
+    return _batch_executor
+
+def _processar_arquivo(nome: str, pdf_content: bytes, genero: str, idade: float,
+                       gerar_briefing: bool, snapshot) -> Tuple[dict, List[LabValue]]:
+    """Extrai e interpreta um arquivo do lote; erros ficam no próprio item."""
+    inicio = time.perf_counter()
+    item = {"arquivo": nome, "tempo_extracao_ms": 0.0, "erro": None, "resultado": None}
+    raw_values = []
+    try:
+        raw_values, parcial = _extrair_valores(pdf_content, snapshot=snapshot)
+        item["tempo_extracao_ms"] = (time.perf_counter() - inicio) * 1000
+        item["resultado"] = _interpretar_valores(raw_values, genero, idade, parcial, gerar_briefing, snapshot)
+    except HTTPException as e:
+        item["erro"] = e.detail
+    except Exception as e:
+        logger.error(f"❌ Erro inesperado em {nome}: {e}")
+        logger.error(f"📍 Traceback: {traceback.format_exc()}")
+        item["erro"] = "Erro interno ao processar o arquivo."
+    item["tempo_total_ms"] = (time.perf_counter() - inicio) * 1000
+    return item, raw_values
+
+def _mesclar_valores(valores_por_arquivo: List[List[LabValue]]) -> List[LabValue]:
+    """União dos analitos na ordem dos arquivos; em conflito, vale o primeiro arquivo."""
+    mesclados = {}
+    for valores in valores_por_arquivo:
+        for v in valores:
+            existente = mesclados.get(v.analito)
+            if existente is None:
+                mesclados[v.analito] = v
+            elif abs(existente.valor - v.valor) > 0.01:
+                logger.warning(f"⚠️ Valores diferentes entre arquivos para {v.analito}: "
+                               f"{existente.valor} vs {v.valor}")
+    return list(mesclados.values())
+
+@app.post("/interpret-batch", response_model=BatchInterpretationResponse, response_class=FastJSONResponse)
+async def interpret_batch(
+        files: List[UploadFile] = File(..., description="Arquivos PDF dos laudos."),
+        genero: str = Form(..., description="Gênero do paciente (ex: 'masculino' ou 'feminino')."),
+        idade: int = Form(..., description="Idade do paciente em anos."),
+        idade_meses: float = Form(0, description="Meses além dos anos completos (lactentes)."),
+        mesclar: bool = Form(False, description="Interpretar os valores de todos os arquivos juntos.")
+):
+    """
+    Analisa vários laudos em PDF do mesmo paciente numa única requisição. Os
+    arquivos são extraídos em paralelo e cada um é interpretado separadamente,
+    com tempos e erros por arquivo. Com `mesclar`, os valores também são
+    interpretados em conjunto (ex.: hemograma dividido em vários PDFs).
+    """
+    inicio = time.perf_counter()
+    logger.info(f"🔍 Lote recebido - {len(files)} arquivo(s), Gênero: {genero}, Idade: {idade}")
+    idade_anos = _validar_paciente(genero, idade, idade_meses)
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Envie no máximo {MAX_BATCH_FILES} arquivos por requisição."
+        )
+
+    # Leitura e validação de cada arquivo; falhas não interrompem o lote
+    itens = [None] * len(files)
+    pendentes = []
+    for i, file in enumerate(files):
+        try:
+            _validar_arquivo(file)
+            pendentes.append((i, file.filename, await _ler_pdf(file)))
+        except HTTPException as e:
+            itens[i] = ({"arquivo": file.filename or "", "tempo_extracao_ms": 0.0, "tempo_total_ms": 0.0,
+                         "erro": e.detail, "resultado": None}, [])
+
+    # Briefing individual só quando os arquivos não serão mesclados; todos os
+    # arquivos usam a mesma versão de padrões/referências
+    snapshot = current_snapshot()
+    loop = asyncio.get_running_loop()
+    executor = _get_batch_executor()
+    resultados = await asyncio.gather(*[
+        loop.run_in_executor(executor, _processar_arquivo, nome, pdf_content,
+                             genero, idade_anos, not mesclar, snapshot)
+        for _, nome, pdf_content in pendentes
+    ])
+    for (i, _, _), resultado in zip(pendentes, resultados):
+        itens[i] = resultado
+
+    resultado_mesclado = None
+    if mesclar:
+        valores = _mesclar_valores([raw_values for _, raw_values in itens])
+        if valores:
+            parcial = any(item.get("resultado") and item["resultado"]["resultado_parcial"] for item, _ in itens)
+            resultado_mesclado = await loop.run_in_executor(
+                executor, _interpretar_valores, valores, genero, idade_anos, parcial, True, snapshot
+            )
+
+    logger.info(f"✅ Lote concluído: {sum(1 for item, _ in itens if not item['erro'])}/{len(itens)} arquivo(s)")
+    return _responder({
+        "arquivos": [item for item, _ in itens],
+        "resultado_mesclado": resultado_mesclado,
+        "tempo_total_ms": (time.perf_counter() - inicio) * 1000
+    })
+
+# --- Fila de jobs (laudos que exigem OCR) ---
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+def _processar_job(pdf_content: bytes, genero: str, idade: float, progress_callback) -> dict:
+    """Executa o pipeline num worker da fila; erros viram a mensagem do job."""
+    try:
+        return _interpretar_pdf(pdf_content, genero, idade, progress_callback)
+    except HTTPException as e:
+        raise Exception(e.detail)
+
+def get_job_queue() -> JobQueue:
+    """Fila do processo, criada e iniciada no primeiro uso (JOB_WORKERS, JOBS_DB_PATH)."""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                queue = JobQueue.from_env(_processar_job)
+                queue.start()
+                _job_queue = queue
+    return _job_queue
+
+@app.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+async def submit_job(
+        file: UploadFile = File(..., description="Arquivo PDF do laudo laboratorial."),
+        genero: str = Form(..., description="Gênero do paciente (ex: 'masculino' ou 'feminino')."),
+        idade: int = Form(..., description="Idade do paciente em anos."),
+        idade_meses: float = Form(0, description="Meses além dos anos completos (lactentes).")
+):
+    """
+    Enfileira um laudo em PDF e retorna imediatamente o ID do job. O resultado
+    é consultado em GET /jobs/{job_id}.
+    """
+    logger.info(f"🔍 Job recebido - Arquivo: {file.filename}, Gênero: {genero}, Idade: {idade}")
+    # Validações de entrada com logging detalhado
+    _validar_arquivo(file)
+    idade_anos = _validar_paciente(genero, idade, idade_meses)
+    pdf_content = await _ler_pdf(file)
+
+    job_id, deduplicado = get_job_queue().submit(pdf_content, genero, idade_anos,
+                                                 current_snapshot().versao)
+    job = get_job_queue().get(job_id)
+    return {"job_id": job_id, "status": job["status"], "deduplicado": deduplicado}
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str):
+    """Status, progresso por página e, quando concluído, o resultado do job."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return job
+
+@app.post("/interpret-manual", response_model=InterpretationResponse, response_class=FastJSONResponse)
 async def interpret_manual(dados: ManualLabValues):
     """
     Analisa valores de hemograma informados manualmente (sem PDF).
@@ -409,11 +837,8 @@ async def interpret_manual(dados: ManualLabValues):
     logger.info(f"📝 Entrada manual - Gênero: {dados.genero}, Idade: {dados.idade}")
 
     # Validações de entrada
-    if dados.genero.lower() not in ['masculino', 'feminino']:
-        raise HTTPException(status_code=422, detail="Gênero deve ser 'masculino' ou 'feminino'.")
-
-    if dados.idade < 0 or dados.idade > 150:
-        raise HTTPException(status_code=422, detail="Idade deve estar entre 0 e 150 anos.")
+    idade_anos = _validar_paciente(dados.genero, dados.idade, dados.idade_meses)
+    data_exame = _validar_historico(dados.paciente_id, dados.data_exame)
 
     raw_values = dados.to_lab_values()
     if not raw_values:
@@ -422,17 +847,22 @@ async def interpret_manual(dados: ManualLabValues):
             detail="Informe ao menos um valor de exame para análise."
         )
 
-    # Se idade for 0, usar valor padrão para análise (consistente com /interpret)
-    idade_para_analise = dados.idade if dados.idade > 0 else 30
+    # Idade não informada: referência adulta, sinalizada na resposta (como em /interpret)
+    idade_para_analise, idade_presumida = _idade_para_analise(idade_anos)
     logger.info(f"📊 Analisando {len(raw_values)} valor(es) informado(s) manualmente")
 
+    snapshot = current_snapshot()
     try:
         # 1. Aplicar motor de regras
-        analyzed_findings = apply_rules(raw_values, genero=dados.genero, idade=idade_para_analise)
+        analyzed_findings = apply_rules(raw_values, genero=dados.genero, idade=idade_para_analise,
+                                        referencias=snapshot.referencias)
         logger.info(f"⚙️ Regras aplicadas: {len(analyzed_findings)} achados")
 
+        achados_compostos = snapshot.compostas.apply(raw_values, dados.genero, idade_para_analise,
+                                                     snapshot.referencias)
+
         # 2. Selecionar especialidades
-        specialties = select_specialties(analyzed_findings)
+        specialties = select_specialties(analyzed_findings + achados_compostos)
         logger.info(f"👨‍⚕️ Especialidades selecionadas: {len(specialties)}")
 
         # 3. Construir o briefing
@@ -443,22 +873,28 @@ async def interpret_manual(dados: ManualLabValues):
             briefing = "Briefing temporariamente indisponível. Os resultados dos exames estão disponíveis acima."
 
         # Lista de valores informados com nomes amigáveis
-        raw_display_values = [
-            {"analito": get_display_name(v["analito"]), "valor": v["valor"]}
-            for v in raw_values
-        ]
+        raw_display_values = [LabValue(get_display_name(v.analito), v.valor) for v in raw_values]
 
         # Comparação entre referência PNS e laboratorial
-        comparacao = comparar_referencias(raw_values, genero=dados.genero, idade=idade_para_analise)
+        comparacao = comparar_referencias(raw_values, genero=dados.genero, idade=idade_para_analise,
+                                          referencias=snapshot.referencias)
+
+        historico_salvo = _salvar_historico(dados.paciente_id, data_exame, raw_values, analyzed_findings)
 
         logger.info("✅ Análise manual concluída com sucesso")
-        return {
+        return _responder({
             "lab_findings": analyzed_findings,
+            "achados_compostos": achados_compostos,
             "recommended_specialties": specialties,
             "patient_briefing": briefing,
             "lab_values_raw": raw_display_values,
-            "comparacao_referencias": comparacao
-        }
+            "comparacao_referencias": comparacao,
+            "resultado_parcial": False,
+            "analitos_ausentes": [],
+            "historico_salvo": historico_salvo,
+            "versao_config": snapshot.versao,
+            "idade_presumida": idade_presumida
+        })
 
     except HTTPException:
         raise
@@ -470,6 +906,85 @@ async def interpret_manual(dados: ManualLabValues):
             detail="Erro interno do servidor. Tente novamente."
         )
 
+@app.post("/trends", response_model=TrendsResponse)
+async def trends(dados: TrendsRequest):
+    """
+    Evolução dos analitos de um paciente ao longo dos exames salvos no
+    histórico: variações, inclinação anual e mudanças de resultado. O
+    identificador vai no corpo (não na URL) para não aparecer em logs de acesso.
+    """
+    store = get_history_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Histórico de exames desabilitado neste servidor.")
+
+    # O histórico resolve nomes de exibição e aliases pelo catálogo
+    analitos = [a.strip() for a in dados.analitos] if dados.analitos else None
+    try:
+        tendencias = store.trends(dados.paciente_id, analitos)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Identificador do paciente inválido.")
+
+    for t in tendencias:
+        t["analito"] = get_display_name(t["analito"])
+    return {"analitos": tendencias}
+
+# --- Recarga de padrões/referências e métricas ---
+@app.get("/metrics")
+async def metrics():
+    """
+    Versão de padrões/referências em uso, contadores de recarga, resumo do
+    perfil dos padrões, buscas de regex interrompidas/lentas e reconhecimento
+    de layouts.
+    """
+    resultado = config_metrics()
+    perfil = find_profile(resultado["versao_padroes"])
+    resultado["perfil_padroes"] = perfil.summary() if perfil else None
+    resultado["regex"] = regex_metrics()
+    resultado["layouts"] = layout_metrics()
+    return resultado
+
+def _verificar_admin(x_admin_token: Optional[str]):
+    """Exige o cabeçalho X-Admin-Token igual a ADMIN_TOKEN."""
+    token = os.getenv('ADMIN_TOKEN')
+    if not token:
+        raise HTTPException(status_code=503, detail="Rotas administrativas desabilitadas neste servidor.")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(status_code=401, detail="Token administrativo inválido.")
+
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    """
+    Recompila patterns.csv e as tabelas de referência e passa a usá-los nas
+    próximas requisições, sem reiniciar. Exige o cabeçalho X-Admin-Token igual
+    a ADMIN_TOKEN.
+    """
+    _verificar_admin(x_admin_token)
+
+    loop = asyncio.get_running_loop()
+    try:
+        snapshot, recarregado = await loop.run_in_executor(None, lambda: reload_config(forcar=True))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao recarregar configurações: {e}")
+    return {"recarregado": recarregado, **config_metrics()}
+
+@app.get("/admin/patterns/profile")
+async def admin_patterns_profile(estresse: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Perfil dos padrões em uso, acumulado na amostra do tráfego
+    (PATTERN_PROFILE_SAMPLE): matches, tempo e vitórias por padrão, com os
+    mortos e sombreados marcados. `estresse=true` mede também o risco de
+    backtracking em textos adversariais.
+    """
+    _verificar_admin(x_admin_token)
+
+    snapshot = current_snapshot()
+    perfil = find_profile(snapshot.padroes.versao)
+    if perfil is None:
+        raise HTTPException(status_code=404, detail="Nenhuma extração perfilada para a versão atual dos padrões.")
+    loop = asyncio.get_running_loop()
+    padroes = await loop.run_in_executor(None, lambda: perfil.report(estresse=estresse))
+    return {**perfil.summary(), "padroes": padroes}
+
 # Executar servidor quando chamado diretamente
 if __name__ == "__main__":
     import uvicorn
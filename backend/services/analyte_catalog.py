@@ -0,0 +1,316 @@
+"""
+Catálogo canônico dos analitos do hemograma.
+
+Uma única tabela com, para cada analito, o ID (minúsculo e sem acentos, o
+mesmo das chaves das tabelas de referência), o nome de exibição, a unidade
+de referência, a grandeza usada na conversão de unidades (units.py) e a
+explicação ao paciente (nlg.py). Os aliases dos padrões de patterns.csv
+("eosinofilos_sus", "plaquetas_alt"...) apontam para o ID.
+
+Todas as grafias conhecidas (ID, alias, nome de exibição com e sem acento,
+em minúsculas) são resolvidas por um dicionário montado na importação; o
+caminho quente (pdf_parser, rule_engine, reference_engine, compound_rules)
+não monta dicionários nem faz normalização NFD por valor. Um nome fora do
+catálogo segue como antes: minúsculo, e sem acentos na chave de referência.
+"""
+import sys
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+# ID → nome de exibição, unidade de referência, grandeza (units.py) e explicação ao paciente
+ANALITOS = {
+    "hemacias": {
+        "nome": "Hemácias",
+        "unidade": "milhões/μL",
+        "grandeza": "hemacias",
+        "explicacao": {
+            "nome": "Hemácias (Glóbulos Vermelhos)",
+            "explicacao": "São responsáveis por transportar oxigênio pelo seu corpo. Alterações podem indicar anemia ou outros problemas sanguíneos.",
+            "valores_altos": "Pode indicar desidratação, problemas pulmonares ou cardíacos, ou vida em altitudes elevadas.",
+            "valores_baixos": "Pode sugerir anemia, perda de sangue, deficiências nutricionais ou problemas na medula óssea.",
+        },
+    },
+    "hemoglobina": {
+        "nome": "Hemoglobina",
+        "unidade": "g/dL",
+        "grandeza": "concentracao",
+        "explicacao": {
+            "nome": "Hemoglobina",
+            "explicacao": "É a proteína que carrega oxigênio no sangue. Valores baixos geralmente indicam anemia.",
+            "valores_altos": "Pode indicar desidratação, problemas pulmonares ou vida em grandes altitudes.",
+            "valores_baixos": "Geralmente indica anemia, que pode ter várias causas como deficiência de ferro, vitaminas ou doenças crônicas.",
+        },
+    },
+    "hematocrito": {
+        "nome": "Hematócrito",
+        "unidade": "%",
+        "grandeza": "outra",
+        "explicacao": {
+            "nome": "Hematócrito",
+            "explicacao": "Mostra a porcentagem do seu sangue que é composta por glóbulos vermelhos. Ajuda a diagnosticar anemia ou excesso de glóbulos vermelhos.",
+            "valores_altos": "Pode indicar desidratação ou excesso de glóbulos vermelhos.",
+            "valores_baixos": "Geralmente indica anemia ou perda de sangue.",
+        },
+    },
+    "vcm": {
+        "nome": "VCM",
+        "unidade": "fL",
+        "grandeza": "outra",
+        "explicacao": {
+            "nome": "VCM (Volume Corpuscular Médio)",
+            "explicacao": "Mede o tamanho médio dos seus glóbulos vermelhos. Ajuda a identificar diferentes tipos de anemia.",
+            "valores_altos": "Pode indicar deficiência de vitamina B12 ou ácido fólico, problemas no fígado ou uso de álcool.",
+            "valores_baixos": "Pode indicar deficiência de ferro ou talassemia.",
+        },
+    },
+    "hcm": {
+        "nome": "HCM",
+        "unidade": "pg",
+        "grandeza": "outra",
+        "explicacao": {
+            "nome": "HCM (Hemoglobina Corpuscular Média)",
+            "explicacao": "Mede a quantidade média de hemoglobina em cada glóbulo vermelho.",
+            "valores_altos": "Pode indicar deficiência de vitamina B12 ou ácido fólico.",
+            "valores_baixos": "Pode indicar deficiência de ferro ou talassemia.",
+        },
+    },
+    "chcm": {
+        "nome": "CHCM",
+        "unidade": "g/dL",
+        "grandeza": "concentracao",
+        "explicacao": {
+            "nome": "CHCM (Concentração de Hemoglobina Corpuscular Média)",
+            "explicacao": "Mede a concentração de hemoglobina dentro dos glóbulos vermelhos.",
+            "valores_altos": "Pode indicar desidratação ou algumas doenças hereditárias do sangue.",
+            "valores_baixos": "Pode indicar deficiência de ferro ou talassemia.",
+        },
+    },
+    "rdw": {
+        "nome": "RDW",
+        "unidade": "%",
+        "grandeza": "outra",
+        "explicacao": {
+            "nome": "RDW (Amplitude de Distribuição dos Glóbulos Vermelhos)",
+            "explicacao": "Mede a variação no tamanho dos glóbulos vermelhos. Ajuda a identificar diferentes tipos de anemia.",
+            "valores_altos": "Pode indicar deficiência de ferro, vitamina B12, ácido fólico ou mistura de diferentes tipos de anemia.",
+            "valores_baixos": "Geralmente normal.",
+        },
+    },
+    "leucocitos": {
+        "nome": "Leucócitos",
+        "unidade": "/μL",
+        "grandeza": "contagem",
+        "explicacao": {
+            "nome": "Leucócitos (Glóbulos Brancos)",
+            "explicacao": "São as células de defesa do seu corpo. Eles combatem infecções e doenças. Valores alterados podem indicar infecções, inflamações ou problemas no sistema imunológico.",
+            "valores_altos": "Pode indicar infecção bacteriana, inflamação, estresse físico ou uso de alguns medicamentos.",
+            "valores_baixos": "Pode sugerir infecções virais, problemas na medula óssea ou efeito de alguns medicamentos.",
+        },
+    },
+    "neutrofilos": {
+        "nome": "Neutrófilos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": {
+            "nome": "Neutrófilos",
+            "explicacao": "São um tipo específico de glóbulo branco que combate principalmente infecções bacterianas.",
+            "valores_altos": "Geralmente indica infecção bacteriana, inflamação ou estresse físico.",
+            "valores_baixos": "Pode indicar infecções virais, problemas na medula óssea ou efeito de medicamentos.",
+        },
+    },
+    "segmentados": {
+        "nome": "Segmentados",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": None,
+    },
+    "bastonetes": {
+        "nome": "Bastonetes",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": None,
+    },
+    "mielocitos": {
+        "nome": "Mielócitos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": None,
+    },
+    "metamielocitos": {
+        "nome": "Metamielócitos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": None,
+    },
+    "eosinofilos": {
+        "nome": "Eosinófilos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": {
+            "nome": "Eosinófilos",
+            "explicacao": "São glóbulos brancos que combatem parasitas e estão envolvidos em reações alérgicas.",
+            "valores_altos": "Pode indicar alergias, asma, infecções parasitárias ou algumas doenças autoimunes.",
+            "valores_baixos": "Geralmente não é preocupante, mas pode ocorrer durante infecções graves.",
+        },
+    },
+    "basofilos": {
+        "nome": "Basófilos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": {
+            "nome": "Basófilos",
+            "explicacao": "São glóbulos brancos envolvidos em reações alérgicas e inflamatórias.",
+            "valores_altos": "Pode indicar alergias graves, algumas doenças do sangue ou inflamações crônicas.",
+            "valores_baixos": "Geralmente normal e não preocupante.",
+        },
+    },
+    "linfocitos": {
+        "nome": "Linfócitos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": {
+            "nome": "Linfócitos",
+            "explicacao": "São glóbulos brancos que combatem infecções virais e participam da imunidade do corpo.",
+            "valores_altos": "Pode indicar infecções virais, algumas doenças autoimunes ou tipos específicos de câncer no sangue.",
+            "valores_baixos": "Pode sugerir problemas no sistema imunológico, estresse ou efeito de alguns medicamentos.",
+        },
+    },
+    "monocitos": {
+        "nome": "Monócitos",
+        "unidade": "/μL",
+        "grandeza": "diferencial",
+        "explicacao": {
+            "nome": "Monócitos",
+            "explicacao": "São glóbulos brancos que combatem infecções e ajudam a limpar células mortas e detritos.",
+            "valores_altos": "Pode indicar infecções crônicas, doenças autoimunes ou alguns tipos de câncer no sangue.",
+            "valores_baixos": "Geralmente não é preocupante.",
+        },
+    },
+    "plaquetas": {
+        "nome": "Plaquetas",
+        "unidade": "/μL",
+        "grandeza": "contagem",
+        "explicacao": {
+            "nome": "Plaquetas",
+            "explicacao": "São responsáveis pela coagulação do sangue. Elas ajudam a parar sangramentos quando você se machuca.",
+            "valores_altos": "Pode aumentar o risco de coágulos sanguíneos. Pode ser causado por inflamações, câncer ou problemas na medula óssea.",
+            "valores_baixos": "Pode causar sangramentos excessivos. Pode ser causado por medicamentos, infecções ou problemas na medula óssea.",
+        },
+    },
+}
+
+# Aliases dos padrões (patterns.csv) → ID
+ALIASES = {
+    'plaquetas_alt': 'plaquetas',
+    'plaquetas_alt2': 'plaquetas',
+    'plaquetas_ponto': 'plaquetas',
+    'plaquetas_ponto_alt': 'plaquetas',
+    'plaquetas_formato_exato': 'plaquetas',
+    'hemacias_alt': 'hemacias',
+    'leucocitos_novo': 'leucocitos',
+    'neutrofilos_novo': 'neutrofilos',
+    'eosinofilos_novo': 'eosinofilos',
+    'eosinofilos_formato_exato': 'eosinofilos',
+    'eosinofilos_compacto': 'eosinofilos',
+    'eosinofilos_spaced': 'eosinofilos',
+    'eosinofilos_fragmentado': 'eosinofilos',
+    'eosinofilos_space_tolerant': 'eosinofilos',
+    'eosinofilos_reverse': 'eosinofilos',
+    'eosinofilos_flex': 'eosinofilos',
+    'eosinofilos_percent_only': 'eosinofilos',
+    'eosinofilos_percent_fragmentado': 'eosinofilos',
+    'basofilos_novo': 'basofilos',
+    'linfocitos_novo': 'linfocitos',
+    'monocitos_novo': 'monocitos',
+    'leucocitos_hemograma': 'leucocitos',
+    'neutrofilos_hemograma': 'neutrofilos',
+    'eosinofilos_hemograma': 'eosinofilos',
+    'eosinofilos_hemograma_alt': 'eosinofilos',
+    'basofilos_hemograma': 'basofilos',
+    'linfocitos_hemograma': 'linfocitos',
+    'monocitos_hemograma': 'monocitos',
+    'leucocitos_sus': 'leucocitos',
+    'neutrofilos_sus': 'neutrofilos',
+    'eosinofilos_sus': 'eosinofilos',
+    'basofilos_sus': 'basofilos',
+    'linfocitos_sus': 'linfocitos',
+    'monocitos_sus': 'monocitos',
+    'hemacias_milhoes': 'hemacias',
+    'hematocrito_formato': 'hematocrito',
+    'chcm_formato': 'chcm',
+    'rdw_formato': 'rdw',
+    'leucócitos_alt': 'leucocitos',
+    'leucocitos_formato': 'leucocitos',
+    'neutrofilos_alt': 'neutrofilos',
+    'neutrofilos_formato': 'neutrofilos',
+    'eosinofilos_alt': 'eosinofilos',
+    'basofilos_alt': 'basofilos',
+    'basofilos_formato': 'basofilos',
+    'linfocitos_alt': 'linfocitos',
+    'monocitos_alt': 'monocitos',
+    'monocitos_formato': 'monocitos',
+}
+
+
+def normalize_key(texto) -> str:
+    """Minúsculas e sem acentos: chaves de analito e de sexo das tabelas de referência."""
+    if not isinstance(texto, str):
+        texto = str(texto)
+    return ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn').lower()
+
+
+# IDs internados: toda resolução devolve o mesmo objeto str
+ANALITO_IDS = tuple(sys.intern(a) for a in ANALITOS)
+
+# Qualquer grafia conhecida → ID
+_IDS = {}
+for _id in ANALITO_IDS:
+    _nome = ANALITOS[_id]["nome"]
+    for _grafia in (_id, _nome, _nome.lower(), normalize_key(_nome)):
+        _IDS.setdefault(_grafia, _id)
+for _alias, _id in ALIASES.items():
+    _IDS[_alias] = _IDS[_id]
+
+
+def analyte_id(nome: str) -> str:
+    """ID canônico do analito; fora do catálogo, o nome em minúsculas."""
+    analito_id = _IDS.get(nome)
+    if analito_id is None:
+        nome = nome.lower()
+        analito_id = _IDS.get(nome, nome)
+    return analito_id
+
+
+@lru_cache(maxsize=1024)
+def _chave_fora_do_catalogo(nome: str) -> str:
+    return normalize_key(nome)
+
+
+def analyte_key(nome) -> str:
+    """Chave de analito das tabelas de referência: minúscula e sem acentos."""
+    if not isinstance(nome, str):
+        nome = str(nome)
+    analito_id = analyte_id(nome)
+    if analito_id in ANALITOS:
+        return analito_id
+    return _chave_fora_do_catalogo(analito_id)
+
+
+def display_name(nome: str) -> str:
+    """Nome amigável, com acento e capitalização."""
+    analito_id = analyte_id(nome)
+    info = ANALITOS.get(analito_id)
+    return info["nome"] if info else analito_id.capitalize()
+
+
+def unit(nome: str) -> str:
+    """Unidade de referência do analito ("" fora do catálogo)."""
+    info = ANALITOS.get(analyte_id(nome))
+    return info["unidade"] if info else ""
+
+
+def explanation(nome: str) -> Optional[dict]:
+    """Explicação ao paciente (nome, explicacao, valores_altos, valores_baixos), se houver."""
+    info = ANALITOS.get(analyte_id(nome))
+    return info["explicacao"] if info else None
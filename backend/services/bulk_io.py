@@ -0,0 +1,302 @@
+import os
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .analyte_catalog import analyte_key, normalize_key
+from .records import DIRETRIZ_REFERENCIA
+from .rule_engine import get_display_name
+from .reference_engine import CLASSES, SEM_REFERENCIA, SEXO_CODIGOS, IDADE_MAX, reference_grids
+from .reference_index import IDADE_PADRAO
+from .severity import severity_scores
+from .compound_rules import get_compound_rules
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Formato colunar (opcional): Parquet, Arrow IPC/Feather e CSV via pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Colunas de identificação; as demais de uma tabela "larga" são analitos
+COLUNAS_EXAME = ("exame_id", "genero", "sexo", "idade")
+
+
+def _require_pyarrow():
+    if not PYARROW_AVAILABLE:
+        raise Exception("Importação/exportação colunar requer o pacote pyarrow")
+
+
+def read_table(caminho: str) -> "pa.Table":
+    """Lê Parquet, Arrow IPC/Feather ou CSV como tabela Arrow."""
+    _require_pyarrow()
+    ext = os.path.splitext(caminho)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return pq.read_table(caminho)
+    if ext in (".arrow", ".feather", ".ipc"):
+        return feather.read_table(caminho, memory_map=True)
+    if ext == ".csv":
+        return pa_csv.read_csv(caminho)
+    raise Exception(f"Formato não suportado: {ext}")
+
+
+def write_table(tabela: "pa.Table", caminho: str) -> None:
+    """Grava a tabela no formato indicado pela extensão do arquivo."""
+    _require_pyarrow()
+    ext = os.path.splitext(caminho)[1].lower()
+    if ext in (".parquet", ".pq"):
+        pq.write_table(tabela, caminho, compression="zstd")
+    elif ext in (".arrow", ".feather", ".ipc"):
+        feather.write_feather(tabela, caminho)
+    elif ext == ".csv":
+        pa_csv.write_csv(tabela, caminho)
+    else:
+        raise Exception(f"Formato não suportado: {ext}")
+
+
+def records_to_table(registros: List[dict]) -> "pa.Table":
+    """Listas de dicts da API (valores, achados, comparações) como tabela Arrow."""
+    _require_pyarrow()
+    return pa.Table.from_pylist(registros)
+
+
+def wide_to_long(tabela: "pa.Table") -> "pa.Table":
+    """
+    Converte uma tabela de valores manuais (uma linha por exame, uma coluna
+    por analito, como em /interpret-manual) para o formato longo
+    (exame_id, genero, idade, analito, valor), sem as células vazias.
+    Colunas não numéricas (ex.: paciente_id, observações) são ignoradas.
+    """
+    _require_pyarrow()
+    n = tabela.num_rows
+    exame_id = tabela.column("exame_id") if "exame_id" in tabela.column_names else pa.array(np.arange(n))
+    genero = tabela.column("genero" if "genero" in tabela.column_names else "sexo")
+    idade = tabela.column("idade")
+
+    partes = []
+    ignoradas = []
+    for nome in tabela.column_names:
+        if nome in COLUNAS_EXAME:
+            continue
+        tipo = tabela.column(nome).type
+        # Coluna só com células vazias chega como tipo null
+        if not (pa.types.is_integer(tipo) or pa.types.is_floating(tipo) or pa.types.is_decimal(tipo)
+                or pa.types.is_null(tipo)):
+            ignoradas.append(nome)
+            continue
+        valores = tabela.column(nome).cast(pa.float64())
+        # NaN (ex.: célula vazia vinda do pandas) também conta como não informado
+        presentes = pc.and_(pc.is_valid(valores), pc.invert(pc.is_nan(valores))).fill_null(False)
+        partes.append(pa.table({
+            "exame_id": pc.filter(exame_id, presentes),
+            "genero": pc.filter(genero, presentes),
+            "idade": pc.filter(idade, presentes),
+            "analito": pa.array(np.full(pc.sum(presentes).as_py() or 0, nome, dtype=object), pa.string()),
+            "valor": pc.filter(valores, presentes),
+        }))
+    if ignoradas:
+        logger.warning(f"⚠️ Colunas não numéricas ignoradas: {', '.join(ignoradas)}")
+    if not partes:
+        raise Exception("Nenhuma coluna de analito encontrada na tabela")
+    return pa.concat_tables(partes)
+
+
+def _column_numpy(coluna, dtype) -> np.ndarray:
+    """Coluna Arrow como array NumPy — sem cópia quando tipo e nulos permitem."""
+    coluna = coluna.combine_chunks() if isinstance(coluna, pa.ChunkedArray) else coluna
+    tipo = pa.from_numpy_dtype(dtype)
+    if coluna.type == tipo and coluna.null_count == 0:
+        return coluna.to_numpy(zero_copy_only=True)
+    nulo = np.nan if np.issubdtype(dtype, np.floating) else 0
+    return coluna.cast(tipo).fill_null(nulo).to_numpy(zero_copy_only=False)
+
+
+def _dictionary_codes(coluna, mapa) -> Tuple[np.ndarray, list]:
+    """Códigos inteiros por linha, aplicando `mapa` só aos valores distintos."""
+    codificada = pc.dictionary_encode(coluna.combine_chunks() if isinstance(coluna, pa.ChunkedArray) else coluna)
+    distintos = codificada.dictionary.to_pylist()
+    tabela = np.array([mapa(v) for v in distintos] + [-1], dtype=np.int64)
+    indices = codificada.indices.fill_null(len(distintos)).to_numpy(zero_copy_only=False)
+    return tabela[indices], distintos
+
+
+def rank_specialties(exame_id, regra: np.ndarray, severidade: np.ndarray,
+                     especialidades: List[str], top_n: int = 3) -> "pa.Table":
+    """
+    Ranking de especialidades por exame, como select_specialties: soma das
+    severidades dos achados de cada especialidade da regra (lista separada
+    por vírgulas), empates na ordem de aparição, até `top_n` por exame.
+    `exame_id`, `regra` e `severidade` são os dos achados, na ordem do exame.
+    """
+    # Especialidades de cada regra como códigos de um vocabulário único
+    vocabulario: Dict[str, int] = {}
+    tokens = [[vocabulario.setdefault(e.strip(), len(vocabulario)) for e in esp.split(',')]
+              for esp in especialidades]
+    n_tokens = np.array([len(t) for t in tokens] + [0], dtype=np.int64)
+    inicio = np.concatenate([[0], np.cumsum(n_tokens)[:-1]])
+    planos = np.array([c for t in tokens for c in t], dtype=np.int64)
+
+    exames = pc.dictionary_encode(exame_id.combine_chunks() if isinstance(exame_id, pa.ChunkedArray) else exame_id)
+    codigo_exame = exames.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+
+    # Uma linha por (achado, especialidade da regra), na ordem dos achados
+    por_achado = n_tokens[regra]
+    achado = np.repeat(np.arange(len(regra)), por_achado)
+    posicao = np.arange(len(achado)) - np.repeat(np.cumsum(por_achado) - por_achado, por_achado)
+    token = planos[inicio[regra[achado]] + posicao]
+
+    chave = codigo_exame[achado] * max(len(vocabulario), 1) + token
+    chaves, primeira = np.unique(chave, return_index=True)
+    pontuacao = np.bincount(np.searchsorted(chaves, chave), weights=severidade[achado],
+                            minlength=len(chaves)).astype(np.int64)
+    exame, token = np.divmod(chaves, max(len(vocabulario), 1))
+
+    ordem = np.lexsort((primeira, -pontuacao, exame))
+    exame, token, pontuacao = exame[ordem], token[ordem], pontuacao[ordem]
+    grupo = np.flatnonzero(np.r_[True, exame[1:] != exame[:-1]]) if len(exame) else np.array([], dtype=np.int64)
+    rank = np.arange(len(exame)) - np.repeat(grupo, np.diff(np.r_[grupo, len(exame)]))
+    manter = (rank < top_n) & (pontuacao > 0)
+
+    nomes = pa.array(list(vocabulario), pa.string())
+    return pa.table({
+        "exame_id": exames.dictionary.take(pa.array(exame[manter])),
+        "especialidade": pa.DictionaryArray.from_arrays(pa.array(token[manter], pa.int32()), nomes),
+        "pontuacao": pa.array(pontuacao[manter]),
+        "posicao": pa.array(rank[manter] + 1, pa.int8()),
+    })
+
+
+def compound_findings(compostas, exames, codigo_exame: np.ndarray, analito: np.ndarray,
+                      analitos: List[str], valor: np.ndarray, classe: np.ndarray):
+    """
+    Regras compostas sobre todos os exames de uma vez: monta as matrizes
+    analito × exame (primeiro valor de cada analito no exame) e avalia todas
+    as regras numa chamada. Retorna (tabela de achados compostos, exame, regra)
+    — as duas últimas para o ranking de especialidades.
+    """
+    n_exames = len(exames.dictionary)
+    posicao = {a: i for i, a in enumerate(compostas.analitos)}
+    feature = np.array([posicao.get(a, -1) for a in analitos] + [-1], dtype=np.int64)[analito]
+    usar = np.flatnonzero(feature >= 0)[::-1]  # invertido: na atribuição, o primeiro valor prevalece
+    valores = np.full((len(compostas.analitos), n_exames), np.nan)
+    classes = np.full((len(compostas.analitos), n_exames), SEM_REFERENCIA, dtype=np.int8)
+    valores[feature[usar], codigo_exame[usar]] = valor[usar]
+    classes[feature[usar], codigo_exame[usar]] = classe[usar]
+
+    exame, regra = np.nonzero(compostas.evaluate(valores, classes).T)
+    campos = [compostas.finding(r) for r in range(len(compostas.regras))]
+
+    def coluna(nome, tipo):
+        return pa.DictionaryArray.from_arrays(pa.array(regra, pa.int32()), pa.array([c[nome] for c in campos], tipo))
+
+    tabela = pa.table({
+        "exame_id": exames.dictionary.take(pa.array(exame, pa.int64())),
+        "regra": coluna("regra", pa.string()),
+        "descricao_achado": coluna("descricao_achado", pa.string()),
+        "severidade": pa.array(np.array([c["severidade"] for c in campos] + [0], dtype=np.int8)[regra]),
+        "especialidade": coluna("especialidade", pa.string()),
+        "diretriz": coluna("diretriz", pa.string()),
+    })
+    return tabela, exame, regra
+
+
+def interpret_lab_values(tabela: "pa.Table") -> Dict[str, "pa.Table"]:
+    """
+    Motor de regras vetorizado sobre uma tabela longa de valores
+    (exame_id, genero, idade, analito, valor). Retorna {'achados',
+    'achados_compostos', 'comparacoes', 'especialidades'} com as mesmas
+    colunas das respostas da API — achados só para valores anormais pela
+    referência PNS, como apply_rules, e o ranking de especialidades de cada
+    exame (achados simples e compostos).
+    """
+    _require_pyarrow()
+    if "analito" not in tabela.column_names:
+        tabela = wide_to_long(tabela)
+    analitos, pns, lab = reference_grids()
+    posicao = {a: i for i, a in enumerate(analitos)}
+    n = tabela.num_rows
+
+    analito, _ = _dictionary_codes(tabela.column("analito"), lambda a: posicao.get(analyte_key(a), -1))
+    coluna_sexo = "genero" if "genero" in tabela.column_names else "sexo"
+    sexo, _ = _dictionary_codes(tabela.column(coluna_sexo),
+                                lambda s: SEXO_CODIGOS.get(normalize_key(s).strip(), -1))
+    # Idade em anos, com fração (lactentes): grade de um ano, como PopulationComparison.add;
+    # 0 = não informada, como nas rotas da API
+    idade = _column_numpy(tabela.column("idade"), np.float64)
+    idade = np.floor(np.clip(np.where(idade > 0, idade, IDADE_PADRAO), 0, IDADE_MAX)).astype(np.int64)
+    valor = _column_numpy(tabela.column("valor"), np.float64)
+    exame_id = tabela.column("exame_id") if "exame_id" in tabela.column_names else pa.array(np.arange(n))
+
+    validas = (analito >= 0) & (sexo >= 0) & ~np.isnan(valor)
+    linhas = np.flatnonzero(validas)
+    a, s, i, v = analito[linhas], sexo[linhas], idade[linhas], valor[linhas]
+    classe_pns = pns.classify(a, s, i, v)
+    classe_lab = lab.classify(a, s, i, v)
+
+    nomes = pa.array([get_display_name(x) for x in analitos], pa.string())
+    rotulos = pa.array(CLASSES + ["sem referência"], pa.string())
+
+    def dicionario(indices, valores):
+        return pa.DictionaryArray.from_arrays(pa.array(indices, pa.int32()), valores)
+
+    # Achados: anormais pela PNS
+    anormal = (classe_pns == 0) | (classe_pns == 2)
+    sel = linhas[anormal]
+    regra = pns.regra[a[anormal], s[anormal], i[anormal]]
+    severidade = severity_scores(v[anormal], pns.inferior[a[anormal], s[anormal], i[anormal]],
+                                 pns.superior[a[anormal], s[anormal], i[anormal]])
+    especialidades = pa.array(pns.especialidades, pa.string())
+    analito_achado = dicionario(a[anormal], nomes)
+    resultado = dicionario(classe_pns[anormal], rotulos)
+    achados = pa.table({
+        "exame_id": exame_id.take(pa.array(sel)),
+        "analito": analito_achado,
+        "valor": pa.array(valor[sel]),
+        "resultado": resultado,
+        "severidade": pa.array(severidade),
+        "especialidade": dicionario(regra, especialidades),
+        "descricao_achado": pc.binary_join_element_wise(
+            analito_achado.cast(pa.string()), resultado.cast(pa.string()), " "),
+        "diretriz": pa.array(np.full(len(sel), DIRETRIZ_REFERENCIA, dtype=object), pa.string()),
+    })
+
+    # Comparações: ao menos uma das referências se aplica
+    comparavel = (classe_pns != SEM_REFERENCIA) | (classe_lab != SEM_REFERENCIA)
+    sel = linhas[comparavel]
+    cp, cl = classe_pns[comparavel], classe_lab[comparavel]
+    comparacoes = pa.table({
+        "exame_id": exame_id.take(pa.array(sel)),
+        "analito": dicionario(a[comparavel], nomes),
+        "valor": pa.array(valor[sel]),
+        "classificacao_pns": dicionario(cp, rotulos),
+        "classificacao_lab": dicionario(cl, rotulos),
+        "divergente": pa.array((cp != SEM_REFERENCIA) & (cl != SEM_REFERENCIA) & (cp != cl)),
+    })
+
+    # Regras compostas sobre a matriz analito × exame
+    compostas = get_compound_rules()
+    exames = pc.dictionary_encode(exame_id.combine_chunks() if isinstance(exame_id, pa.ChunkedArray) else exame_id)
+    codigo_exame = exames.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+    achados_compostos, exame_composto, regra_composta = compound_findings(
+        compostas, exames, codigo_exame[linhas], a, analitos, v, classe_pns)
+
+    # Ranking: achados simples antes dos compostos em cada exame, como na API
+    especialidades_exame = rank_specialties(
+        pa.chunked_array([achados.column("exame_id").combine_chunks(), achados_compostos.column("exame_id").combine_chunks()]),
+        np.concatenate([regra, len(pns.especialidades) + regra_composta]),
+        np.concatenate([severidade, achados_compostos.column("severidade").to_numpy()]),
+        pns.especialidades + [r["especialidade"] for r in compostas.regras])
+
+    logger.info(f"📊 Lote: {n} valor(es), {n - len(linhas)} sem analito/sexo reconhecido, "
+                f"{achados.num_rows} achado(s)")
+    return {"achados": achados, "achados_compostos": achados_compostos, "comparacoes": comparacoes,
+            "especialidades": especialidades_exame}
@@ -0,0 +1,225 @@
+"""
+Regras compostas: padrões que combinam vários analitos (ex.: hemoglobina
+baixa com VCM/HCM baixos → quadro microcítico), declarados em
+data/compound_rules.csv ao lado de guideline_map.csv.
+
+A coluna `condicao` é uma expressão no estilo Python sobre os analitos do
+exame, validada por uma lista branca de nós da AST:
+
+    - nomes de analitos (hemoglobina, vcm, leucocitos, ...) valem o valor;
+    - baixo(x), normal(x), alto(x): classificação pela referência PNS;
+    - informado(x): o analito está presente no exame; abs(expr);
+    - números, + - * /, comparações (inclusive encadeadas), and, or, not.
+
+Na carga, todas as condições são traduzidas para uma única função NumPy que
+recebe a matriz de valores e a de classificações (analito × exame) e devolve
+a matriz booleana regra × exame — um exame (API) ou milhares (bulk_io) são
+avaliados na mesma chamada, sem laço por regra. Analito ausente vale NaN:
+comparações com ele são falsas e a regra não dispara.
+"""
+import os
+import ast
+import csv
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .analyte_catalog import analyte_key
+from .rule_engine import get_references, get_display_name
+from .reference_index import sex_code
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+COMPOUND_RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(current_dir)), "data", "compound_rules.csv")
+
+# Códigos de classificação (os mesmos do reference_engine)
+BAIXO, NORMAL, ALTO, SEM_REFERENCIA = 0, 1, 2, 3
+CLASSIFICACOES = {"baixo": BAIXO, "normal": NORMAL, "alto": ALTO}
+
+DIRETRIZ_PADRAO = "Padrões combinados do hemograma"
+
+_COMPARADORES = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "==", ast.NotEq: "!="}
+_OPERADORES = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Div: "/"}
+
+
+class _Tradutor:
+    """
+    Traduz a AST de uma condição para uma expressão NumPy (texto), checando
+    os tipos: 'num' (valores) e 'bool' (condições).
+    """
+
+    def __init__(self, analitos: Dict[str, int]):
+        self.analitos = analitos
+
+    def _feature(self, node) -> int:
+        if not isinstance(node, ast.Name):
+            raise ValueError("as funções de analito recebem um nome de analito")
+        return self.analitos.setdefault(analyte_key(node.id), len(self.analitos))
+
+    def traduzir(self, node):
+        if isinstance(node, ast.Expression):
+            return self.traduzir(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return repr(float(node.value)), "num"
+        if isinstance(node, ast.Name):
+            return f"V[{self._feature(node)}]", "num"
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords and len(node.args) == 1:
+            nome, arg = node.func.id, node.args[0]
+            if nome in CLASSIFICACOES:
+                return f"(C[{self._feature(arg)}] == {CLASSIFICACOES[nome]})", "bool"
+            if nome == "informado":
+                return f"(~np.isnan(V[{self._feature(arg)}]))", "bool"
+            if nome == "abs":
+                return f"np.abs({self._num(arg)})", "num"
+            raise ValueError(f"função não permitida: {nome}")
+        if isinstance(node, ast.BinOp) and type(node.op) in _OPERADORES:
+            return f"({self._num(node.left)} {_OPERADORES[type(node.op)]} {self._num(node.right)})", "num"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return f"(-{self._num(node.operand)})", "num"
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return f"(~{self._bool(node.operand)})", "bool"
+        if isinstance(node, ast.BoolOp):
+            operador = " & " if isinstance(node.op, ast.And) else " | "
+            return "(" + operador.join(self._bool(v) for v in node.values) + ")", "bool"
+        if isinstance(node, ast.Compare) and all(type(op) in _COMPARADORES for op in node.ops):
+            termos = [self._num(node.left)] + [self._num(c) for c in node.comparators]
+            partes = [f"({a} {_COMPARADORES[type(op)]} {b})" for a, op, b in zip(termos, node.ops, termos[1:])]
+            return "(" + " & ".join(partes) + ")", "bool"
+        raise ValueError(f"expressão não permitida: {ast.dump(node)[:60]}")
+
+    def _num(self, node) -> str:
+        codigo, tipo = self.traduzir(node)
+        if tipo != "num":
+            raise ValueError("esperado um valor numérico, encontrada uma condição")
+        return codigo
+
+    def _bool(self, node) -> str:
+        codigo, tipo = self.traduzir(node)
+        if tipo != "bool":
+            raise ValueError("esperada uma condição (comparação, baixo/alto/normal/informado)")
+        return codigo
+
+
+class CompoundRuleSet:
+    """Regras compostas compiladas, com a versão do arquivo de origem."""
+
+    def __init__(self, regras: List[dict], versao: str = ""):
+        self.regras = regras
+        self.versao = versao
+        self._posicao: Dict[str, int] = {}
+        tradutor = _Tradutor(self._posicao)
+        expressoes = []
+        self._analitos_regra = []
+        for regra in regras:
+            try:
+                arvore = ast.parse(regra["condicao"].strip(), mode="eval")
+                codigo = tradutor._bool(arvore)
+            except (SyntaxError, ValueError) as e:
+                raise Exception(f"Erro na regra composta {regra['regra_id']}: {e}")
+            self._analitos_regra.append(_analitos_da_condicao(arvore))
+            expressoes.append(f"np.broadcast_to({codigo}, V.shape[1:])")
+        self.analitos = list(self._posicao)
+        fonte = f"lambda V, C: np.stack([{', '.join(expressoes)}])" if expressoes else \
+            "lambda V, C: np.zeros((0,) + V.shape[1:], dtype=bool)"
+        # Só a tradução acima gera o código: nomes e números validados, sem builtins
+        self._avaliar = eval(compile(fonte, "<regras_compostas>", "eval"), {"np": np, "__builtins__": {}})
+
+    def evaluate(self, valores: np.ndarray, classes: np.ndarray) -> np.ndarray:
+        """
+        Matriz booleana (regra × exame) a partir das matrizes de valores (NaN
+        = ausente) e classificações (analito × exame), na ordem de `analitos`.
+        """
+        with np.errstate(all="ignore"):
+            return self._avaliar(valores, classes)
+
+    def features(self, lab_values: List[dict], genero: str, idade: float,
+                 referencias=None):
+        """Matrizes (valores, classificações) de um exame, com uma coluna."""
+        referencias = referencias or get_references()
+        sexo = sex_code(genero)
+        valores = np.full((len(self.analitos), 1), np.nan)
+        classes = np.full((len(self.analitos), 1), SEM_REFERENCIA, dtype=np.int8)
+        for v in lab_values:
+            f = self._posicao.get(analyte_key(v["analito"]))
+            if f is None or not np.isnan(valores[f, 0]):
+                continue  # fora das regras, ou repetido: vale o primeiro
+            valores[f, 0] = v["valor"]
+            intervalo = referencias.interval("pns", self.analitos[f], sexo, idade)
+            if intervalo is not None:
+                inferior, superior = intervalo
+                classes[f, 0] = BAIXO if v["valor"] < inferior else ALTO if v["valor"] > superior else NORMAL
+        return valores, classes
+
+    def finding(self, r: int) -> dict:
+        """Achado composto da regra `r`, no formato da resposta da API."""
+        regra = self.regras[r]
+        return {
+            "regra": regra["regra_id"],
+            "descricao_achado": regra["descricao_achado"],
+            "severidade": int(regra["severidade"]),
+            "especialidade": regra["especialidade"],
+            "diretriz": regra.get("diretriz") or DIRETRIZ_PADRAO,
+            "analitos": [get_display_name(a) for a in self._analitos_regra[r]],
+        }
+
+    def apply(self, lab_values: List[dict], genero: str, idade: float, referencias=None) -> List[dict]:
+        """Achados compostos de um exame."""
+        if not self.regras:
+            return []
+        disparadas = self.evaluate(*self.features(lab_values, genero, idade, referencias))[:, 0]
+        return [self.finding(r) for r in np.flatnonzero(disparadas)]
+
+
+def _analitos_da_condicao(arvore: ast.AST) -> List[str]:
+    """Analitos citados numa condição já validada, na ordem em que aparecem."""
+    funcoes = {id(node.func) for node in ast.walk(arvore) if isinstance(node, ast.Call)}
+    nomes = []
+    citados = [n for n in ast.walk(arvore) if isinstance(n, ast.Name) and id(n) not in funcoes]
+    for node in sorted(citados, key=lambda n: (n.lineno, n.col_offset)):
+            chave = analyte_key(node.id)
+            if chave not in nomes:
+                nomes.append(chave)
+    return nomes
+
+
+def load_compound_rules(caminho: str = None) -> CompoundRuleSet:
+    """Lê e compila data/compound_rules.csv (ausente = nenhuma regra)."""
+    caminho = caminho or COMPOUND_RULES_PATH
+    try:
+        with open(caminho, "rb") as f:
+            conteudo = f.read()
+    except FileNotFoundError:
+        logger.warning(f"⚠️ Regras compostas não encontradas: {caminho}")
+        return CompoundRuleSet([])
+
+    linhas = (linha for linha in conteudo.decode("utf-8").splitlines() if not linha.lstrip().startswith("#"))
+    regras = list(csv.DictReader(linhas))
+    conjunto = CompoundRuleSet(regras, hashlib.sha256(conteudo).hexdigest()[:12])
+    logger.info(f"🧩 Carregadas {len(regras)} regras compostas (versão {conjunto.versao})")
+    return conjunto
+
+
+_compound_rules: Optional[CompoundRuleSet] = None
+_compound_rules_lock = threading.Lock()
+
+
+def get_compound_rules() -> CompoundRuleSet:
+    """Regras compostas em uso, carregadas no primeiro acesso."""
+    global _compound_rules
+    if _compound_rules is None:
+        with _compound_rules_lock:
+            if _compound_rules is None:
+                _compound_rules = load_compound_rules()
+    return _compound_rules
+
+
+def set_compound_rules(regras: CompoundRuleSet) -> None:
+    """Troca as regras em uso (recarga a quente); quem já as obteve segue com as anteriores."""
+    global _compound_rules
+    _compound_rules = regras
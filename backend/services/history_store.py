@@ -0,0 +1,212 @@
+import os
+import re
+import hmac
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .analyte_catalog import analyte_id
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exames (
+    paciente TEXT NOT NULL,
+    data_exame TEXT NOT NULL,
+    analito TEXT NOT NULL,
+    valor REAL NOT NULL,
+    resultado TEXT NOT NULL,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (paciente, analito, data_exame)
+) WITHOUT ROWID;
+"""
+
+# Dias por ano, para a inclinação anual
+DIAS_ANO = 365.25
+
+
+def patient_token(paciente_id: str, secret: str) -> str:
+    """
+    Pseudônimo do paciente: HMAC-SHA256 do identificador normalizado (só
+    letras e dígitos, minúsculas — '123.456.789-00' e '12345678900' coincidem).
+    O identificador original nunca é gravado.
+    """
+    normalizado = re.sub(r'[^0-9a-z]', '', paciente_id.lower())
+    if not normalizado:
+        raise ValueError("Identificador do paciente vazio")
+    return hmac.new(secret.encode('utf-8'), normalizado.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def parse_exam_date(data_exame: Optional[str]) -> str:
+    """Data do exame em ISO (AAAA-MM-DD); sem data, usa a de hoje."""
+    if not data_exame:
+        return date.today().isoformat()
+    return date.fromisoformat(data_exame.strip()).isoformat()
+
+
+def flags_from_findings(lab_values: List[dict], findings: List[dict], display_name) -> Dict[str, str]:
+    """Resultado ('baixo'/'alto'/'normal') de cada analito a partir da saída de apply_rules."""
+    por_nome = {f["analito"]: f["resultado"] for f in findings}
+    return {v["analito"]: por_nome.get(display_name(v["analito"]), "normal") for v in lab_values}
+
+
+class HistoryStore:
+    """
+    Séries temporais de valores laboratoriais por paciente pseudonimizado, em
+    SQLite. A chave primária (paciente, analito, data) é o índice usado pelas
+    consultas de tendência; reenviar o mesmo exame na mesma data substitui o valor.
+    """
+
+    def __init__(self, db_path: str, secret: str):
+        self.db_path = db_path
+        self.secret = secret
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def token(self, paciente_id: str) -> str:
+        return patient_token(paciente_id, self.secret)
+
+    def record(self, paciente_id: str, data_exame: str, lab_values: List[dict], flags: Dict[str, str]) -> int:
+        """
+        Grava os valores de um exame sob o ID do catálogo de cada analito;
+        retorna quantos analitos foram salvos.
+        """
+        paciente = self.token(paciente_id)
+        agora = time.time()
+        linhas = [
+            (paciente, data_exame, analyte_id(v["analito"]), float(v["valor"]), flags.get(v["analito"], "normal"),
+             agora)
+            for v in lab_values
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO exames (paciente, data_exame, analito, valor, resultado, atualizado_em) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    linhas
+                )
+        finally:
+            conn.close()
+        logger.info(f"🗂️ Histórico: {len(linhas)} valor(es) gravado(s) em {data_exame}")
+        return len(linhas)
+
+    def trends(self, paciente_id: str, analitos: Optional[List[str]] = None) -> List[dict]:
+        """
+        Tendência de cada analito do paciente: variação desde o exame anterior e
+        desde o primeiro, inclinação (mínimos quadrados, por ano) e mudanças de
+        resultado (ex.: normal → baixo). Uma consulta e operações vetorizadas
+        por grupo de analito. O filtro aceita ID, nome de exibição ou alias do
+        catálogo.
+        """
+        paciente = self.token(paciente_id)
+        sql = "SELECT analito, data_exame, valor, resultado FROM exames WHERE paciente = ?"
+        params = [paciente]
+        if analitos:
+            sql += f" AND analito IN ({', '.join('?' * len(analitos))})"
+            params += [analyte_id(a) for a in analitos]
+        sql += " ORDER BY analito, data_exame"
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return []
+
+        nomes, datas, valores, resultados = zip(*rows)
+        nomes = np.array(nomes)
+        datas = np.array(datas, dtype='datetime64[D]')
+        valores = np.array(valores, dtype=float)
+        resultados = np.array(resultados)
+
+        # Grupos contíguos por analito (as linhas vêm ordenadas)
+        inicio = np.flatnonzero(np.r_[True, nomes[1:] != nomes[:-1]])
+        n = np.diff(np.r_[inicio, len(nomes)])
+        fim = inicio + n - 1
+
+        # Inclinação por grupo: cov(t, v) / var(t), com t em dias
+        t = datas.astype(np.int64).astype(float)
+        t_c = t - np.repeat(np.add.reduceat(t, inicio) / n, n)
+        v_c = valores - np.repeat(np.add.reduceat(valores, inicio) / n, n)
+        var_t = np.add.reduceat(t_c * t_c, inicio)
+        cov = np.add.reduceat(t_c * v_c, inicio)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inclinacao = np.where(var_t > 0, cov / var_t * DIAS_ANO, np.nan)
+
+        anterior = np.where(n > 1, fim - 1, fim)
+        delta = valores[fim] - valores[anterior]
+        delta_total = valores[fim] - valores[inicio]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta_pct = np.where(valores[inicio] != 0, delta_total / valores[inicio] * 100, np.nan)
+
+        # Mudanças de resultado dentro do mesmo analito
+        mudou = np.flatnonzero((resultados[1:] != resultados[:-1]) & (nomes[1:] == nomes[:-1])) + 1
+        grupo_da_mudanca = np.searchsorted(inicio, mudou, side='right') - 1
+
+        datas_iso = datas.astype(str)
+        tendencias = []
+        for g, (i, f) in enumerate(zip(inicio, fim)):
+            transicoes = [
+                {"data_exame": datas_iso[k], "de": resultados[k - 1], "para": resultados[k]}
+                for k in mudou[grupo_da_mudanca == g]
+            ]
+            tendencias.append({
+                "analito": nomes[i],
+                "n_exames": int(n[g]),
+                "ultimo_valor": float(valores[f]),
+                "delta": float(delta[g]) if n[g] > 1 else None,
+                "delta_total": float(delta_total[g]) if n[g] > 1 else None,
+                "delta_percentual": None if n[g] < 2 or np.isnan(delta_pct[g]) else float(delta_pct[g]),
+                "inclinacao_anual": None if np.isnan(inclinacao[g]) else float(inclinacao[g]),
+                "transicoes": transicoes,
+                "serie": [
+                    {"data_exame": datas_iso[k], "valor": float(valores[k]), "resultado": resultados[k]}
+                    for k in range(i, f + 1)
+                ],
+            })
+        return tendencias
+
+
+_store: Optional[HistoryStore] = None
+_store_resolved = False
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> Union[HistoryStore, None]:
+    """
+    Histórico do processo. Só é habilitado com HISTORY_SECRET (chave dos
+    pseudônimos); o banco fica em HISTORY_DB_PATH (padrão: raiz do projeto).
+    """
+    global _store, _store_resolved
+    if _store_resolved:
+        return _store
+    with _store_lock:
+        if not _store_resolved:
+            secret = os.getenv('HISTORY_SECRET')
+            if secret:
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                project_root = os.path.dirname(os.path.dirname(current_dir))
+                db_path = os.getenv('HISTORY_DB_PATH', os.path.join(project_root, "history.sqlite3"))
+                _store = HistoryStore(db_path, secret)
+                logger.info(f"✅ Histórico de exames habilitado: {db_path}")
+            else:
+                logger.info("ℹ️ Histórico de exames desabilitado (defina HISTORY_SECRET)")
+            _store_resolved = True
+    return _store
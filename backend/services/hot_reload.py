@@ -0,0 +1,176 @@
+"""
+Recarga a quente dos padrões de extração (patterns.csv), do índice de
+referências (guideline_map.csv, lab_reference.csv) e das regras compostas
+(compound_rules.csv), sem reiniciar a API.
+
+Cada requisição obtém uma única vez o snapshot em uso (current_snapshot) e o
+repassa ao pipeline; a recarga compila a nova versão por completo e só então
+troca o snapshot, de modo que requisições em andamento terminam com a versão
+com que começaram. A recarga é disparada pelo ConfigWatcher (verificação
+periódica dos arquivos, CONFIG_WATCH_INTERVAL) ou manualmente (/admin/reload).
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional, Tuple
+
+from . import pdf_parser, rule_engine, compound_rules
+from .pdf_parser import PatternRegistry
+from .compound_rules import CompoundRuleSet, load_compound_rules
+from .reference_index import DATA_DIR, load_reference_index, source_hashes, version_of
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConfigSnapshot:
+    """Padrões, referências e regras compostas de uma mesma versão, usados juntos por uma requisição."""
+
+    def __init__(self, padroes: PatternRegistry, referencias, compostas: CompoundRuleSet,
+                 carregado_em: float = None):
+        self.padroes = padroes
+        self.referencias = referencias
+        self.compostas = compostas
+        self.carregado_em = carregado_em or time.time()
+
+    @property
+    def versao(self) -> str:
+        """Versão combinada, para respostas e chaves de cache."""
+        return f"{self.padroes.versao}-{self.referencias.versao}-{self.compostas.versao}"
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+_reload_lock = threading.Lock()
+_metricas = {"recargas": 0, "falhas_recarga": 0, "ultima_falha": None}
+
+
+def current_snapshot() -> ConfigSnapshot:
+    """Snapshot em uso (o primeiro acesso adota os padrões e referências já carregados)."""
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is None:
+        with _reload_lock:
+            if _snapshot is None:
+                _snapshot = ConfigSnapshot(pdf_parser.get_pattern_registry(), rule_engine.get_references(),
+                                           compound_rules.get_compound_rules())
+            snapshot = _snapshot
+    return snapshot
+
+
+def _file_version(caminho: str) -> str:
+    try:
+        with open(caminho, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:12]
+    except FileNotFoundError:
+        return ""
+
+
+def disk_versions(patterns_path: str = None, data_dir: str = None) -> Tuple[str, str, str]:
+    """(padrões, referências, regras compostas): versões dos arquivos atuais em disco."""
+    data_dir = data_dir or DATA_DIR
+    return (_file_version(patterns_path or pdf_parser.PATTERNS_PATH),
+            version_of(source_hashes(data_dir)),
+            _file_version(os.path.join(data_dir, os.path.basename(compound_rules.COMPOUND_RULES_PATH))))
+
+
+def reload_config(patterns_path: str = None, data_dir: str = None,
+                  forcar: bool = False) -> Tuple[ConfigSnapshot, bool]:
+    """
+    Recompila padrões e referências e troca o snapshot em uso. Retorna
+    (snapshot, recarregado); sem mudança nos arquivos (e sem `forcar`),
+    mantém o snapshot atual. Em caso de erro, o snapshot atual continua valendo.
+    """
+    global _snapshot
+    current_snapshot()  # garante o snapshot inicial antes de tomar o lock
+    with _reload_lock:
+        atual = _snapshot
+        try:
+            versao_padroes, versao_referencias, versao_compostas = disk_versions(patterns_path, data_dir)
+            if (not forcar and versao_padroes == atual.padroes.versao
+                    and versao_referencias == atual.referencias.versao
+                    and versao_compostas == atual.compostas.versao):
+                return atual, False
+
+            # Componente sem mudança é reaproveitado
+            padroes = atual.padroes
+            if forcar or versao_padroes != padroes.versao:
+                padroes = PatternRegistry.load(patterns_path)
+            referencias = atual.referencias
+            if forcar or versao_referencias != referencias.versao:
+                referencias = load_reference_index(data_dir or DATA_DIR)
+            compostas = atual.compostas
+            if forcar or versao_compostas != compostas.versao:
+                compostas = load_compound_rules(os.path.join(data_dir or DATA_DIR,
+                                                             os.path.basename(compound_rules.COMPOUND_RULES_PATH)))
+        except Exception as e:
+            _metricas["falhas_recarga"] += 1
+            _metricas["ultima_falha"] = str(e)
+            logger.error(f"❌ Erro ao recarregar configurações (versão {atual.versao} mantida): {e}")
+            raise
+
+        novo = ConfigSnapshot(padroes, referencias, compostas)
+        pdf_parser.set_pattern_registry(padroes)
+        rule_engine.set_references(referencias)
+        compound_rules.set_compound_rules(compostas)
+        _snapshot = novo
+        _metricas["recargas"] += 1
+    logger.info(f"🔄 Configurações recarregadas: {atual.versao} → {novo.versao}")
+    return novo, True
+
+
+def config_metrics() -> dict:
+    """Versões em uso e contadores de recarga."""
+    snapshot = current_snapshot()
+    return {
+        "versao_config": snapshot.versao,
+        "versao_padroes": snapshot.padroes.versao,
+        "versao_referencias": snapshot.referencias.versao,
+        "versao_compostas": snapshot.compostas.versao,
+        "padroes": len(snapshot.padroes.patterns),
+        "regras_compostas": len(snapshot.compostas.regras),
+        "carregado_em": snapshot.carregado_em,
+        **_metricas,
+    }
+
+
+class ConfigWatcher:
+    """Thread que verifica os arquivos a cada `interval` segundos e recarrega se mudaram."""
+
+    def __init__(self, interval: float = 30.0, patterns_path: str = None, data_dir: str = None):
+        self.interval = interval
+        self.patterns_path = patterns_path
+        self.data_dir = data_dir
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "ConfigWatcher":
+        """Intervalo em CONFIG_WATCH_INTERVAL (segundos; 0 desativa)."""
+        return cls(interval=float(os.getenv('CONFIG_WATCH_INTERVAL', '0')))
+
+    def check(self) -> bool:
+        """Uma verificação; True se houve recarga."""
+        try:
+            return reload_config(self.patterns_path, self.data_dir)[1]
+        except Exception:
+            return False  # erro já registrado; tenta de novo na próxima verificação
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="config-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"👀 Monitorando padrões e referências a cada {self.interval:g}s")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,275 @@
+import os
+import json
+import uuid
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Optional, Tuple
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Estados de um job
+PENDENTE = "pendente"
+PROCESSANDO = "processando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    chave TEXT NOT NULL,
+    status TEXT NOT NULL,
+    genero TEXT NOT NULL,
+    idade REAL NOT NULL,
+    pdf BLOB,
+    progresso TEXT,
+    resultado TEXT,
+    erro TEXT,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, criado_em);
+CREATE INDEX IF NOT EXISTS idx_jobs_chave ON jobs (chave);
+"""
+
+
+def default_db_path() -> str:
+    """Banco da fila: JOBS_DB_PATH ou jobs.sqlite3 na raiz do projeto."""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(os.path.dirname(current_dir))
+    return os.getenv('JOBS_DB_PATH', os.path.join(project_root, "jobs.sqlite3"))
+
+
+def job_key(pdf_content: bytes, genero: str, idade: float, versao: str = "") -> str:
+    """
+    Chave de deduplicação: mesmo PDF com os mesmos dados do paciente e a mesma
+    versão de padrões/referências (uma recarga invalida os resultados antigos).
+    A idade é fracionária (meses de idade); 40 e 40.0 geram a mesma chave.
+    """
+    digest = hashlib.sha256(pdf_content).hexdigest()
+    return f"{digest}:{genero.lower()}:{float(idade)}:{versao}"
+
+
+def _json_default(obj):
+    # Registros do pipeline (services/records) viram dicts na gravação do resultado
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    # Escalares numpy (ex.: valores vindos do pandas) viram tipos nativos
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+class JobQueue:
+    """
+    Fila persistente de interpretações em SQLite, processada por um pool local
+    de threads. Jobs sobrevivem a reinícios: os que estavam em processamento
+    voltam para a fila na inicialização.
+
+    `processor(pdf_content, genero, idade, progress_callback)` executa o
+    pipeline e devolve o resultado (dict serializável em JSON); exceções viram
+    status 'erro' com a mensagem da exceção.
+    """
+
+    def __init__(self, db_path: str, processor: Callable, workers: int = 2,
+                 poll_interval: float = 1.0, retention_hours: float = 24):
+        self.db_path = db_path
+        self.processor = processor
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.retention_hours = retention_hours
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._init_db()
+
+    @classmethod
+    def from_env(cls, processor: Callable) -> "JobQueue":
+        return cls(
+            default_db_path(),
+            processor,
+            workers=int(os.getenv('JOB_WORKERS', '2')),
+            retention_hours=float(os.getenv('JOB_RETENTION_HOURS', '24')),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por operação: sqlite3 não compartilha conexões entre threads
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    # --- Ciclo de vida ---
+
+    def start(self):
+        """Recupera jobs interrompidos, remove os antigos e inicia os workers."""
+        if self._threads:
+            return
+        agora = time.time()
+        conn = self._connect()
+        try:
+            recuperados = conn.execute(
+                "UPDATE jobs SET status = ?, atualizado_em = ? WHERE status = ?",
+                (PENDENTE, agora, PROCESSANDO)
+            ).rowcount
+            removidos = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND atualizado_em < ?",
+                (CONCLUIDO, ERRO, agora - self.retention_hours * 3600)
+            ).rowcount
+        finally:
+            conn.close()
+        if recuperados:
+            logger.info(f"♻️ {recuperados} job(s) interrompido(s) recolocado(s) na fila")
+        if removidos:
+            logger.info(f"🧹 {removidos} job(s) antigo(s) removido(s)")
+
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i+1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🚀 Fila de jobs iniciada com {self.workers} worker(s): {self.db_path}")
+
+    def stop(self, timeout: float = 5.0):
+        """Sinaliza os workers e aguarda o job em andamento de cada um."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    # --- API ---
+
+    def submit(self, pdf_content: bytes, genero: str, idade: float, versao: str = "") -> Tuple[str, bool]:
+        """
+        Enfileira um laudo. Retorna (job_id, deduplicado): se o mesmo PDF já foi
+        enviado com os mesmos dados (e `versao` de configuração) e não terminou
+        em erro, reaproveita o job.
+        """
+        chave = job_key(pdf_content, genero, idade, versao)
+        agora = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            existente = conn.execute(
+                "SELECT id FROM jobs WHERE chave = ? AND status != ? ORDER BY criado_em DESC LIMIT 1",
+                (chave, ERRO)
+            ).fetchone()
+            if existente:
+                conn.execute("COMMIT")
+                logger.info(f"🔁 Job deduplicado: {existente['id']}")
+                return existente['id'], True
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, chave, status, genero, idade, pdf, criado_em, atualizado_em) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, chave, PENDENTE, genero, idade, sqlite3.Binary(pdf_content), agora, agora)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        logger.info(f"📥 Job enfileirado: {job_id}")
+        self._wakeup.set()
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Estado do job (sem o PDF), ou None se não existe."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, status, progresso, resultado, erro, criado_em, atualizado_em FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "progresso": json.loads(row["progresso"]) if row["progresso"] else None,
+            "resultado": json.loads(row["resultado"]) if row["resultado"] else None,
+            "erro": row["erro"],
+            "criado_em": row["criado_em"],
+            "atualizado_em": row["atualizado_em"],
+        }
+
+    # --- Workers ---
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Pega o job pendente mais antigo, marcando-o como em processamento."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, genero, idade, pdf FROM jobs WHERE status = ? ORDER BY criado_em LIMIT 1",
+                (PENDENTE,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, atualizado_em = ? WHERE id = ?",
+                    (PROCESSANDO, time.time(), row["id"])
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update(self, job_id: str, **campos):
+        campos["atualizado_em"] = time.time()
+        colunas = ", ".join(f"{nome} = ?" for nome in campos)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE jobs SET {colunas} WHERE id = ?", (*campos.values(), job_id))
+        finally:
+            conn.close()
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"❌ Erro ao buscar job na fila: {e}")
+                job = None
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job: sqlite3.Row):
+        job_id = job["id"]
+        logger.info(f"⚙️ Processando job {job_id}")
+
+        def progress_callback(pagina: int, total: int, etapa: str):
+            progresso = {"pagina": pagina, "total_paginas": total, "etapa": etapa}
+            self._update(job_id, progresso=json.dumps(progresso))
+
+        try:
+            resultado = self.processor(bytes(job["pdf"]), job["genero"], job["idade"], progress_callback)
+            # O PDF só é necessário até o fim do processamento
+            self._update(job_id, status=CONCLUIDO, pdf=None,
+                         resultado=json.dumps(resultado, default=_json_default))
+            logger.info(f"✅ Job {job_id} concluído")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} falhou: {e}")
+            self._update(job_id, status=ERRO, pdf=None, erro=str(e))
@@ -0,0 +1,79 @@
+"""
+Serialização rápida das respostas de interpretação.
+
+Nas rotas /interpret, /interpret-batch e /interpret-manual, o FastAPI
+validava o dict devolvido contra o response_model (reconstruindo cada
+achado e valor como modelo Pydantic), convertia tudo com jsonable_encoder
+e só então serializava com o json da biblioteca padrão. Os dados já vêm do
+próprio pipeline no formato do modelo, então nos lotes isso era CPU gasta
+à toa. Aqui:
+
+    - FastJSONResponse serializa com orjson (opcional; sem ele, o json da
+      biblioteca padrão com os mesmos separadores do JSONResponse). Os
+      registros do pipeline (services/records) são serializados direto, sem
+      passar por dict;
+    - a rota devolve a resposta pronta e o FastAPI não revalida; o
+      response_model continua documentando o formato no OpenAPI.
+
+FAST_JSON_RESPONSES=0 volta ao caminho validado. tests/test_json_response.py
+confere que os dois caminhos produzem o mesmo JSON e
+tests/benchmark_json_response.py mede ambos em lotes grandes.
+"""
+import json
+import math
+import os
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+# Serializador JSON em Rust (opcional)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def fast_json_enabled() -> bool:
+    return os.getenv('FAST_JSON_RESPONSES', '1').lower() not in ('0', 'false', 'no')
+
+
+def _default(obj):
+    # Registros do pipeline sem orjson (que serializa dataclasses sozinho)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    # Escalares numpy viram tipos nativos
+    if hasattr(obj, 'item'):
+        return obj.item()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def _finitos(obj):
+    # Como no orjson: NaN e ±infinito viram null (o json da biblioteca padrão escreveria NaN)
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {chave: _finitos(valor) for chave, valor in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finitos(valor) for valor in obj]
+    if hasattr(obj, 'to_dict'):
+        return _finitos(obj.to_dict())
+    return obj
+
+
+def dumps(conteudo: Any) -> bytes:
+    """
+    JSON em UTF-8 do conteúdo (dicts, listas, registros do pipeline, escalares
+    numpy). Valores não finitos viram null nos dois serializadores.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(conteudo, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_finitos(conteudo), default=_default, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada com dumps (orjson quando disponível)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,231 @@
+"""
+Reconhecimento do layout do laudo e despacho para um pacote de padrões.
+
+Cada laboratório formata o hemograma de um jeito (ver analysis_patterns.md):
+o laudo SUS traz o leucograma como "50,9 % 3.548 /μL" com o total em
+"100 %", outros usam "32%1120/mm3" sem espaços ou "/mm³" com espaços. Sem
+saber o layout, a extração tenta todos os aliases de patterns.csv — para um
+analito ausente do laudo, todas as variantes dele percorrem o texto inteiro.
+
+A impressão digital (fingerprint) do texto é o conjunto de características
+presentes nele: cabeçalhos de seção ("Série Branca",
+"Leucograma"...), estilos de unidade (/μL, /mm3, /mm³, 10^6/μL, milhões) e a
+ordem das colunas do diferencial (% antes do absoluto, com ou sem espaços,
+ou o absoluto antes do %). data/layouts.csv declara cada layout pelas
+características que ele exige e pelos padrões que o reconhecem; o primeiro
+layout cujas exigências estão na impressão é o escolhido e o laudo é
+extraído só com o pacote dele (um subconjunto compilado do registro, na
+ordem de patterns.csv). Sem layout reconhecido, ou se o pacote não extrair
+nada, vale o conjunto completo.
+
+A classificação depende só da impressão, então fica em cache por impressão,
+com a contagem de laudos, de quantos usaram o pacote e de quantos voltaram
+ao conjunto completo (layout_metrics(), em /metrics). LAYOUT_DISPATCH=0
+desativa o despacho.
+"""
+import os
+import re
+import csv
+import io
+import hashlib
+import logging
+import threading
+from collections import Counter
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+LAYOUTS_PATH = os.path.join(os.path.dirname(os.path.dirname(current_dir)), "data", "layouts.csv")
+
+# Características da impressão digital: nome → padrão
+CARACTERISTICAS = {
+    # Cabeçalhos de seção
+    "cab_hemograma": r"hemograma",
+    "cab_serie_vermelha": r"s[ée]rie\s+vermelha",
+    "cab_serie_branca": r"s[ée]rie\s+branca",
+    "cab_eritrograma": r"eritrograma",
+    "cab_leucograma": r"leucograma",
+    "cab_plaquetograma": r"plaquetograma",
+    "cab_referencia": r"(?:intervalo|valores?)\s+de\s+refer[êe]ncia",
+    # Estilos de unidade
+    "un_e6_ul": r"10\s*\^\s*6\s*/\s*[μµu]l",
+    "un_milhoes": r"milh[õo]es\s*/\s*mm",
+    "un_mm3_sobrescrito": r"/\s*mm³",
+    "un_mm3": r"/\s*mm3",
+    "un_ul": r"/\s*[μµu]l",
+    # Ordem das colunas do diferencial
+    "col_pct_abs_compacto": r"[0-9]%[0-9]+/mm",
+    "col_pct_abs_ul": r"[0-9]\s*%\s+[0-9][0-9.]*\s*/\s*[μµu]l",
+    "col_pct_abs_mm3": r"[0-9]\s*%\s+[0-9][0-9.]*\s*/\s*mm[3³]",
+    "col_abs_pct": r"[0-9]\s*/\s*(?:mm3|[μµu]l)[^0-9]{0,15}[0-9]{1,2},[0-9]\s*%",
+}
+# Só a presença importa: cada busca para no primeiro match
+CARACTERISTICAS_RE = {nome: re.compile(padrao, re.IGNORECASE) for nome, padrao in CARACTERISTICAS.items()}
+MAX_IMPRESSOES = 256  # impressões distintas acompanhadas; as demais só contam no total
+MAX_VERSOES_PACOTES = 2  # versões de patterns.csv com pacotes em cache
+
+
+def fingerprint(texto: str) -> FrozenSet[str]:
+    """Características de layout presentes no texto."""
+    return frozenset(nome for nome, regex in CARACTERISTICAS_RE.items() if regex.search(texto))
+
+
+def fingerprint_key(impressao: FrozenSet[str]) -> str:
+    """Forma legível e estável da impressão, para cache e relatório."""
+    return "+".join(sorted(impressao)) or "vazia"
+
+
+def layout_dispatch_enabled() -> bool:
+    return os.getenv('LAYOUT_DISPATCH', '1').lower() not in ('0', 'false', 'no')
+
+
+class LayoutCatalog:
+    """
+    Layouts de data/layouts.csv, com o cache de classificação por impressão
+    e os pacotes de padrões compilados por versão do registro.
+    """
+
+    def __init__(self, layouts: List[dict], versao: str):
+        self.layouts = layouts
+        self.versao = versao
+        self._classificacao: Dict[FrozenSet[str], Optional[str]] = {}
+        self._pacotes: Dict[Tuple[str, str], object] = {}
+        self._estatisticas: Dict[str, dict] = {}
+        self._totais = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, layouts_path: str = None) -> "LayoutCatalog":
+        layouts_path = layouts_path or LAYOUTS_PATH
+        try:
+            with open(layouts_path, "rb") as f:
+                conteudo = f.read()
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Arquivo de layouts não encontrado: {layouts_path}; despacho por layout desativado")
+            return cls([], "")
+
+        layouts = []
+        for row in csv.DictReader(io.StringIO(conteudo.decode("utf-8"), newline='')):
+            exige = frozenset(c.strip() for c in row["exige"].split(";") if c.strip())
+            desconhecidas = exige - CARACTERISTICAS.keys()
+            if desconhecidas or not exige:
+                # Layout com característica inexistente nunca seria reconhecido (ou sempre, se vazio)
+                logger.warning(f"⚠️ Layout {row['layout']} ignorado: características inválidas "
+                               f"{sorted(desconhecidas) or '(nenhuma)'}")
+                continue
+            layouts.append({
+                "layout": row["layout"],
+                "exige": exige,
+                "padroes": [p.strip() for p in row["padroes"].split(";") if p.strip()],
+                "descricao": row.get("descricao", ""),
+            })
+
+        versao = hashlib.sha256(conteudo).hexdigest()[:12]
+        logger.info(f"🗂️ Carregados {len(layouts)} layouts de laudo (versão {versao})")
+        return cls(layouts, versao)
+
+    def classify(self, texto: str) -> Tuple[str, Optional[str]]:
+        """(chave da impressão, layout reconhecido ou None)."""
+        impressao = fingerprint(texto)
+        if impressao in self._classificacao:
+            return fingerprint_key(impressao), self._classificacao[impressao]
+        layout = next((l["layout"] for l in self.layouts if l["exige"] <= impressao), None)
+        with self._lock:
+            if len(self._classificacao) < MAX_IMPRESSOES:
+                self._classificacao[impressao] = layout
+        return fingerprint_key(impressao), layout
+
+    def pattern_pack(self, registry, layout: str):
+        """Subconjunto compilado do registro com os padrões do layout (em cache por versão)."""
+        chave = (registry.versao, layout)
+        pacote = self._pacotes.get(chave)
+        if pacote is None:
+            nomes = next(l["padroes"] for l in self.layouts if l["layout"] == layout)
+            pacote = registry.subset(nomes, layout)
+            ausentes = set(nomes) - {p["analito"] for p in pacote.patterns}
+            if ausentes:
+                logger.warning(f"⚠️ Layout {layout}: padrões inexistentes em patterns.csv: {', '.join(sorted(ausentes))}")
+            with self._lock:
+                self._pacotes[chave] = pacote
+                # Só a versão em uso e a anterior (requisições em andamento na recarga)
+                versoes = list(dict.fromkeys(c[0] for c in self._pacotes))
+                for antiga in [c for c in self._pacotes if c[0] in versoes[:-MAX_VERSOES_PACOTES]]:
+                    del self._pacotes[antiga]
+        return pacote
+
+    def select(self, texto: str, registry):
+        """
+        Pacote de padrões para o texto: (chave da impressão, layout, registro a
+        usar). Sem layout reconhecido, o registro completo.
+        """
+        chave, layout = self.classify(texto)
+        if layout is None:
+            return chave, None, registry
+        return chave, layout, self.pattern_pack(registry, layout)
+
+    def record(self, chave: str, layout: Optional[str], fallback: bool = False,
+               faltantes: int = 0, recuperados: int = 0) -> None:
+        """
+        Registra o desfecho de um laudo: layout usado, se voltou ao conjunto
+        completo e quantos analitos do pacote ele não achou (`faltantes`) e
+        quantos desses os demais padrões recuperaram.
+        """
+        with self._lock:
+            self._totais["documentos"] += 1
+            self._totais["reconhecidos" if layout else "nao_reconhecidos"] += 1
+            if fallback:
+                self._totais["fallbacks"] += 1
+            self._totais["analitos_faltantes"] += faltantes
+            self._totais["analitos_recuperados"] += recuperados
+            estatistica = self._estatisticas.get(chave)
+            if estatistica is None:
+                if len(self._estatisticas) >= MAX_IMPRESSOES:
+                    return
+                estatistica = self._estatisticas[chave] = {"layout": layout, "documentos": 0, "fallbacks": 0,
+                                                           "analitos_faltantes": 0}
+            estatistica["documentos"] += 1
+            estatistica["fallbacks"] += int(fallback)
+            estatistica["analitos_faltantes"] += faltantes
+
+    def metrics(self, limite: int = 10) -> dict:
+        """Taxa de reconhecimento e as impressões mais frequentes."""
+        with self._lock:
+            totais = dict(self._totais)
+            impressoes = sorted(self._estatisticas.items(), key=lambda i: -i[1]["documentos"])[:limite]
+        documentos = totais.get("documentos", 0)
+        return {
+            "versao_layouts": self.versao,
+            "catalogo": [l["layout"] for l in self.layouts],
+            "documentos": documentos,
+            "reconhecidos": totais.get("reconhecidos", 0),
+            "nao_reconhecidos": totais.get("nao_reconhecidos", 0),
+            "fallbacks": totais.get("fallbacks", 0),
+            "analitos_faltantes": totais.get("analitos_faltantes", 0),
+            "analitos_recuperados": totais.get("analitos_recuperados", 0),
+            "taxa_reconhecimento": round(totais.get("reconhecidos", 0) / documentos, 4) if documentos else None,
+            "impressoes": [{"impressao": chave, "layout": e["layout"], "documentos": e["documentos"],
+                            "fallbacks": e["fallbacks"], "analitos_faltantes": e["analitos_faltantes"]}
+                           for chave, e in impressoes],
+        }
+
+
+_layout_catalog = None
+_layout_catalog_lock = threading.Lock()
+
+
+def get_layout_catalog() -> LayoutCatalog:
+    """Catálogo de layouts em uso, carregado no primeiro acesso."""
+    global _layout_catalog
+    if _layout_catalog is None:
+        with _layout_catalog_lock:
+            if _layout_catalog is None:
+                _layout_catalog = LayoutCatalog.load()
+    return _layout_catalog
+
+
+def layout_metrics() -> dict:
+    """Resumo do despacho por layout para /metrics."""
+    return {"ativo": layout_dispatch_enabled(), **get_layout_catalog().metrics()}
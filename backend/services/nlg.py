@@ -2,102 +2,15 @@ import requests
 import os
 from typing import List, Dict
 
-# Dicionário com explicações educativas dos analitos
-ANALITO_EXPLICACOES = {
-    "leucocitos": {
-        "nome": "Leucócitos (Glóbulos Brancos)",
-        "explicacao": "São as células de defesa do seu corpo. Eles combatem infecções e doenças. Valores alterados podem indicar infecções, inflamações ou problemas no sistema imunológico.",
-        "valores_altos": "Pode indicar infecção bacteriana, inflamação, estresse físico ou uso de alguns medicamentos.",
-        "valores_baixos": "Pode sugerir infecções virais, problemas na medula óssea ou efeito de alguns medicamentos."
-    },
-    "hemacias": {
-        "nome": "Hemácias (Glóbulos Vermelhos)",
-        "explicacao": "São responsáveis por transportar oxigênio pelo seu corpo. Alterações podem indicar anemia ou outros problemas sanguíneos.",
-        "valores_altos": "Pode indicar desidratação, problemas pulmonares ou cardíacos, ou vida em altitudes elevadas.",
-        "valores_baixos": "Pode sugerir anemia, perda de sangue, deficiências nutricionais ou problemas na medula óssea."
-    },
-    "hemoglobina": {
-        "nome": "Hemoglobina",
-        "explicacao": "É a proteína que carrega oxigênio no sangue. Valores baixos geralmente indicam anemia.",
-        "valores_altos": "Pode indicar desidratação, problemas pulmonares ou vida em grandes altitudes.",
-        "valores_baixos": "Geralmente indica anemia, que pode ter várias causas como deficiência de ferro, vitaminas ou doenças crônicas."
-    },
-    "hematocrito": {
-        "nome": "Hematócrito",
-        "explicacao": "Mostra a porcentagem do seu sangue que é composta por glóbulos vermelhos. Ajuda a diagnosticar anemia ou excesso de glóbulos vermelhos.",
-        "valores_altos": "Pode indicar desidratação ou excesso de glóbulos vermelhos.",
-        "valores_baixos": "Geralmente indica anemia ou perda de sangue."
-    },
-    "plaquetas": {
-        "nome": "Plaquetas",
-        "explicacao": "São responsáveis pela coagulação do sangue. Elas ajudam a parar sangramentos quando você se machuca.",
-        "valores_altos": "Pode aumentar o risco de coágulos sanguíneos. Pode ser causado por inflamações, câncer ou problemas na medula óssea.",
-        "valores_baixos": "Pode causar sangramentos excessivos. Pode ser causado por medicamentos, infecções ou problemas na medula óssea."
-    },
-    "neutrófilos": {
-        "nome": "Neutrófilos",
-        "explicacao": "São um tipo específico de glóbulo branco que combate principalmente infecções bacterianas.",
-        "valores_altos": "Geralmente indica infecção bacteriana, inflamação ou estresse físico.",
-        "valores_baixos": "Pode indicar infecções virais, problemas na medula óssea ou efeito de medicamentos."
-    },
-    "linfócitos": {
-        "nome": "Linfócitos",
-        "explicacao": "São glóbulos brancos que combatem infecções virais e participam da imunidade do corpo.",
-        "valores_altos": "Pode indicar infecções virais, algumas doenças autoimunes ou tipos específicos de câncer no sangue.",
-        "valores_baixos": "Pode sugerir problemas no sistema imunológico, estresse ou efeito de alguns medicamentos."
-    },
-    "eosinófilos": {
-        "nome": "Eosinófilos",
-        "explicacao": "São glóbulos brancos que combatem parasitas e estão envolvidos em reações alérgicas.",
-        "valores_altos": "Pode indicar alergias, asma, infecções parasitárias ou algumas doenças autoimunes.",
-        "valores_baixos": "Geralmente não é preocupante, mas pode ocorrer durante infecções graves."
-    },
-    "basófilos": {
-        "nome": "Basófilos",
-        "explicacao": "São glóbulos brancos envolvidos em reações alérgicas e inflamatórias.",
-        "valores_altos": "Pode indicar alergias graves, algumas doenças do sangue ou inflamações crônicas.",
-        "valores_baixos": "Geralmente normal e não preocupante."
-    },
-    "monócitos": {
-        "nome": "Monócitos",
-        "explicacao": "São glóbulos brancos que combatem infecções e ajudam a limpar células mortas e detritos.",
-        "valores_altos": "Pode indicar infecções crônicas, doenças autoimunes ou alguns tipos de câncer no sangue.",
-        "valores_baixos": "Geralmente não é preocupante."
-    },
-    "vcm": {
-        "nome": "VCM (Volume Corpuscular Médio)",
-        "explicacao": "Mede o tamanho médio dos seus glóbulos vermelhos. Ajuda a identificar diferentes tipos de anemia.",
-        "valores_altos": "Pode indicar deficiência de vitamina B12 ou ácido fólico, problemas no fígado ou uso de álcool.",
-        "valores_baixos": "Pode indicar deficiência de ferro ou talassemia."
-    },
-    "hcm": {
-        "nome": "HCM (Hemoglobina Corpuscular Média)",
-        "explicacao": "Mede a quantidade média de hemoglobina em cada glóbulo vermelho.",
-        "valores_altos": "Pode indicar deficiência de vitamina B12 ou ácido fólico.",
-        "valores_baixos": "Pode indicar deficiência de ferro ou talassemia."
-    },
-    "chcm": {
-        "nome": "CHCM (Concentração de Hemoglobina Corpuscular Média)",
-        "explicacao": "Mede a concentração de hemoglobina dentro dos glóbulos vermelhos.",
-        "valores_altos": "Pode indicar desidratação ou algumas doenças hereditárias do sangue.",
-        "valores_baixos": "Pode indicar deficiência de ferro ou talassemia."
-    },
-    "rdw": {
-        "nome": "RDW (Amplitude de Distribuição dos Glóbulos Vermelhos)",
-        "explicacao": "Mede a variação no tamanho dos glóbulos vermelhos. Ajuda a identificar diferentes tipos de anemia.",
-        "valores_altos": "Pode indicar deficiência de ferro, vitamina B12, ácido fólico ou mistura de diferentes tipos de anemia.",
-        "valores_baixos": "Geralmente normal."
-    }
-}
+from .analyte_catalog import explanation
+
 
 def get_analito_explanation(analito: str, resultado: str) -> str:
     """Retorna explicação específica para um analito baseado no resultado"""
-    analito_lower = analito.lower()
-    
-    if analito_lower not in ANALITO_EXPLICACOES:
+    info = explanation(analito)  # ID, alias ou nome de exibição (com ou sem acento)
+    if info is None:
         return f"**{analito}**: Este é um parâmetro importante do seu exame que precisa ser avaliado pelo médico."
     
-    info = ANALITO_EXPLICACOES[analito_lower]
     explicacao_base = f"**{info['nome']}**: {info['explicacao']}"
     
     if resultado.lower() == 'alto' and 'valores_altos' in info:
@@ -0,0 +1,291 @@
+import abc
+import os
+import re
+import time
+import logging
+import threading
+from typing import Optional, Union
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from PIL import Image
+    IMAGING_AVAILABLE = True
+except ImportError:
+    IMAGING_AVAILABLE = False
+
+# Motor em processo (binding da libtesseract): modelos carregados uma única vez
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# Fallback: um processo `tesseract` por chamada
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+# Chaves do dicionário retornado por image_to_data (formato do pytesseract)
+DATA_KEYS = ("text", "conf", "block_num", "par_num", "line_num", "left", "top", "width", "height")
+
+
+def parse_tesseract_config(config: str) -> dict:
+    """Converte '--psm 6 --oem 3 -c chave=valor' em {'psm': 6, 'oem': 3, 'variaveis': {...}}."""
+    config = config or ""
+    psm = re.search(r'--psm\s+(\d+)', config)
+    oem = re.search(r'--oem\s+(\d+)', config)
+    # O valor pode conter espaços (ex.: whitelist terminada em ' ')
+    variaveis = dict(re.findall(r'-c\s+(\w+)=(.*?)(?=\s+-c\s|\s+--\w|$)', config))
+    return {
+        'psm': int(psm.group(1)) if psm else 3,
+        'oem': int(oem.group(1)) if oem else 3,
+        'variaveis': variaveis,
+    }
+
+
+class OCRBudget:
+    """
+    Orçamento de tempo (relógio de parede) de uma requisição de OCR, compartilhado
+    por páginas, resoluções e retentativas. Quando se esgota, o pipeline para de
+    iniciar novas chamadas ao Tesseract e devolve o melhor texto obtido até então.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+        self.esgotado = False
+
+    @classmethod
+    def from_env(cls) -> "OCRBudget":
+        return cls(float(os.getenv('OCR_TIME_BUDGET_S', '120')))
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        if not self.esgotado and time.monotonic() >= self.deadline:
+            self.esgotado = True
+            logger.warning(f"⏱️ Orçamento de OCR ({self.seconds:.0f}s) esgotado; resultado parcial")
+        return self.esgotado
+
+
+class OCREngine(abc.ABC):
+    """
+    Interface comum dos motores de OCR usados pelo pdf_parser. `timeout` (s)
+    limita a chamada quando o motor permite interrompê-la; 0 = sem limite.
+    """
+
+    nome = "base"
+
+    @abc.abstractmethod
+    def image_to_string(self, img, lang: str, config: str, timeout: float = 0) -> str:
+        """Texto reconhecido na imagem."""
+
+    @abc.abstractmethod
+    def image_to_data(self, img, lang: str, config: str, timeout: float = 0) -> dict:
+        """Palavras reconhecidas no formato de pytesseract.Output.DICT (ver DATA_KEYS)."""
+
+    @abc.abstractmethod
+    def detect_rotation(self, img, timeout: float = 0) -> int:
+        """Graus (sentido horário) para corrigir a orientação da página."""
+
+
+class PytesseractEngine(OCREngine):
+    """Motor via pytesseract: cria um processo e arquivos temporários por chamada."""
+
+    nome = "pytesseract"
+
+    TESSERACT_PATHS = [
+        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
+        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
+        'tesseract'  # Para sistemas com tesseract no PATH
+    ]
+
+    @classmethod
+    def configure(cls) -> bool:
+        """Localiza o executável do Tesseract (Windows ou PATH)."""
+        if not PYTESSERACT_AVAILABLE:
+            return False
+        for path in cls.TESSERACT_PATHS:
+            if os.path.exists(path) or path == 'tesseract':
+                try:
+                    pytesseract.pytesseract.tesseract_cmd = path
+                    # Teste rápido
+                    pytesseract.get_tesseract_version()
+                    logger.info(f"✅ Tesseract configurado: {path}")
+                    return True
+                except Exception:
+                    continue
+        return False
+
+    # O pytesseract mata o processo e levanta RuntimeError ao estourar o timeout
+    def image_to_string(self, img, lang: str, config: str, timeout: float = 0) -> str:
+        return pytesseract.image_to_string(img, lang=lang, config=config, timeout=timeout)
+
+    def image_to_data(self, img, lang: str, config: str, timeout: float = 0) -> dict:
+        return pytesseract.image_to_data(img, lang=lang, config=config, timeout=timeout,
+                                         output_type=pytesseract.Output.DICT)
+
+    def detect_rotation(self, img, timeout: float = 0) -> int:
+        osd = pytesseract.image_to_osd(img, timeout=timeout, output_type=pytesseract.Output.DICT)
+        return int(osd['rotate'])
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Motor em processo via tesserocr. Mantém uma instância da API por thread e
+    por (idioma, PSM, OEM), com os modelos já carregados — sem fork nem I/O de
+    arquivos temporários a cada chamada.
+    """
+
+    nome = "tesserocr"
+
+    # Chamadas em processo não são interrompíveis: o timeout é ignorado e o
+    # orçamento é respeitado entre chamadas pelo pipeline
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _api(self, lang: str, psm: int, oem: int):
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        key = (lang, psm, oem)
+        api = apis.get(key)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm, oem=oem)
+            apis[key] = api
+        return api
+
+    def _prepare(self, img, lang: str, config: str):
+        parsed = parse_tesseract_config(config)
+        api = self._api(lang, parsed['psm'], parsed['oem'])
+        api.ClearAdaptiveClassifier()
+        for key, value in parsed['variaveis'].items():
+            api.SetVariable(key, value)
+        if not isinstance(img, Image.Image):
+            img = Image.fromarray(np.asarray(img))
+        api.SetImage(img)
+        return api, parsed
+
+    def _reset(self, api, parsed: dict):
+        # Variáveis valem por chamada, como no pytesseract
+        for key in parsed['variaveis']:
+            api.SetVariable(key, "")
+        api.Clear()
+
+    def image_to_string(self, img, lang: str, config: str, timeout: float = 0) -> str:
+        api, parsed = self._prepare(img, lang, config)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            self._reset(api, parsed)
+
+    def image_to_data(self, img, lang: str, config: str, timeout: float = 0) -> dict:
+        api, parsed = self._prepare(img, lang, config)
+        data = {key: [] for key in DATA_KEYS}
+        try:
+            api.Recognize()
+            iterator = api.GetIterator()
+            level = tesserocr.RIL.WORD
+            block = par = line = 0
+            if iterator is not None:
+                while True:
+                    if iterator.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                        block, par, line = block + 1, 0, 0
+                    if iterator.IsAtBeginningOf(tesserocr.RIL.PARA):
+                        par, line = par + 1, 0
+                    if iterator.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                        line += 1
+                    word = iterator.GetUTF8Text(level)
+                    box = iterator.BoundingBox(level)
+                    if word and box:
+                        x0, y0, x1, y1 = box
+                        data["text"].append(word)
+                        data["conf"].append(iterator.Confidence(level))
+                        data["block_num"].append(block)
+                        data["par_num"].append(par)
+                        data["line_num"].append(line)
+                        data["left"].append(x0)
+                        data["top"].append(y0)
+                        data["width"].append(x1 - x0)
+                        data["height"].append(y1 - y0)
+                    if not iterator.Next(level):
+                        break
+            return data
+        finally:
+            self._reset(api, parsed)
+
+    def detect_rotation(self, img, timeout: float = 0) -> int:
+        api, parsed = self._prepare(img, 'osd', '--psm 0')
+        try:
+            osd = api.DetectOrientationScript()
+            # orient_deg é a orientação atual (anti-horário); 'rotate' é a correção
+            return (360 - int(osd['orient_deg'])) % 360 if osd else 0
+        finally:
+            self._reset(api, parsed)
+
+
+ENGINES = {
+    TesserocrEngine.nome: TesserocrEngine,
+    PytesseractEngine.nome: PytesseractEngine,
+}
+
+_engine: Optional[OCREngine] = None
+_engine_resolved = False
+_engine_lock = threading.Lock()
+
+
+def create_ocr_engine(nome: str) -> Union[OCREngine, None]:
+    """Instancia um motor pelo nome, ou None se suas dependências não estão instaladas."""
+    if nome == TesserocrEngine.nome:
+        if not (TESSEROCR_AVAILABLE and IMAGING_AVAILABLE):
+            return None
+        try:
+            # Carregar o modelo uma vez já valida a instalação dos idiomas
+            engine = TesserocrEngine()
+            engine._api('por', 6, 3)
+            return engine
+        except Exception as e:
+            logger.warning(f"⚠️ tesserocr indisponível: {e}")
+            return None
+    if nome == PytesseractEngine.nome:
+        return PytesseractEngine() if PytesseractEngine.configure() else None
+    raise ValueError(f"Motor de OCR desconhecido: {nome}")
+
+
+def get_ocr_engine() -> Union[OCREngine, None]:
+    """
+    Motor de OCR do processo, escolhido por OCR_ENGINE (auto | tesserocr | pytesseract).
+    Em 'auto', prefere o motor em processo e cai para o pytesseract.
+    """
+    global _engine, _engine_resolved
+    if _engine_resolved:
+        return _engine
+    with _engine_lock:
+        if not _engine_resolved:
+            preferido = os.getenv('OCR_ENGINE', 'auto').lower()
+            ordem = list(ENGINES) if preferido == 'auto' else [preferido, PytesseractEngine.nome]
+            for nome in dict.fromkeys(ordem):
+                _engine = create_ocr_engine(nome)
+                if _engine is not None:
+                    logger.info(f"✅ Motor de OCR: {_engine.nome}")
+                    break
+            else:
+                logger.warning("⚠️ Tesseract não encontrado. OCR desabilitado.")
+            _engine_resolved = True
+    return _engine
+
+
+def set_ocr_engine(engine: Optional[OCREngine]) -> None:
+    """Fixa o motor de OCR do processo (benchmarks e testes)."""
+    global _engine, _engine_resolved
+    with _engine_lock:
+        _engine = engine
+        _engine_resolved = True
@@ -0,0 +1,239 @@
+"""
+Perfil de cobertura e custo dos padrões de patterns.csv.
+
+O PatternProfile acumula, por padrão, matches, tempo de busca (total e
+máximo) e vitórias — quantas vezes o valor daquele alias foi o que ficou no
+resultado do exame. Alimentado por um corpus de laudos
+(tests/perfil_padroes.py) ou por uma amostra do tráfego da API
+(PATTERN_PROFILE_SAMPLE, fração das extrações; 0 desativa), ele aponta:
+
+    - padrões mortos: nunca casaram;
+    - padrões sombreados: casaram, mas outro alias do mesmo analito sempre
+      venceu antes (a extração nem chega a avaliá-los);
+    - risco de backtracking catastrófico: tempo que cresce mais que
+      linearmente com o tamanho de textos adversariais (backtracking_risk).
+
+pruned_patterns() gera um patterns.csv sem os mortos e sombreados, com os
+aliases de cada analito em ordem de vitórias — preservando a ordem entre
+dois aliases que, no corpus, casaram no mesmo laudo com valores diferentes
+(inverter os dois mudaria o resultado).
+"""
+import os
+import re
+import time
+import random
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Razão de tempo (texto 2× maior) acima da qual o crescimento é superlinear
+RAZAO_BACKTRACKING = 3.0
+LIMITE_ESTRESSE_S = 0.05  # uma busca acima disso já é backtracking catastrófico
+# Trechos repetidos nos textos adversariais (espaços, dígitos, separadores)
+PREENCHIMENTOS = (" ", "1", "1,", "1 % ", "a ")
+
+
+def _normalizar(analito: str) -> str:
+    # Import tardio: pdf_parser importa este módulo
+    from .pdf_parser import normalize_analito_name
+    return normalize_analito_name(analito)
+
+
+class PatternProfile:
+    """Estatísticas acumuladas por padrão de um PatternRegistry (mesma versão)."""
+
+    def __init__(self, registry):
+        self.versao = registry.versao
+        self.patterns = registry.patterns
+        self.normalizados = [_normalizar(p["analito"]) for p in registry.patterns]
+        n = len(registry.patterns)
+        self.documentos = 0
+        self.matches = np.zeros(n, dtype=np.int64)
+        self.vitorias = np.zeros(n, dtype=np.int64)
+        self.tempo_total = np.zeros(n)
+        self.tempo_max = np.zeros(n)
+        # Pares (i, j), i antes de j, do mesmo analito que casaram no mesmo laudo com valores diferentes
+        self.conflitos = set()
+        self._lock = threading.Lock()
+
+    def record(self, tempos: np.ndarray, valores: np.ndarray, vencedores: List[int]) -> None:
+        """
+        Registra um laudo: tempo de cada padrão (s), valor lido (NaN = sem
+        match) e os padrões cujo valor ficou no resultado.
+        """
+        casou = ~np.isnan(valores)
+        conflitos = set()
+        por_analito: Dict[str, List[int]] = {}
+        for i in np.flatnonzero(casou):
+            por_analito.setdefault(self.normalizados[i], []).append(int(i))
+        for indices in por_analito.values():
+            for a, i in enumerate(indices):
+                for j in indices[a + 1:]:
+                    if abs(valores[i] - valores[j]) > 0.01:
+                        conflitos.add((i, j))
+        with self._lock:
+            self.documentos += 1
+            self.matches += casou
+            self.vitorias[vencedores] += 1
+            self.tempo_total += tempos
+            np.maximum(self.tempo_max, tempos, out=self.tempo_max)
+            self.conflitos |= conflitos
+
+    def report(self, estresse: bool = False) -> List[dict]:
+        """Uma linha por padrão, na ordem do arquivo, com as marcações."""
+        with self._lock:
+            documentos = max(self.documentos, 1)
+            linhas = []
+            for i, p in enumerate(self.patterns):
+                marcacoes = []
+                if self.documentos and self.matches[i] == 0:
+                    marcacoes.append("morto")
+                elif self.documentos and self.vitorias[i] == 0:
+                    marcacoes.append("sombreado")
+                linha = {
+                    "analito": p["analito"],
+                    "normalizado": self.normalizados[i],
+                    "matches": int(self.matches[i]),
+                    "taxa_match": round(float(self.matches[i]) / documentos, 4),
+                    "vitorias": int(self.vitorias[i]),
+                    "tempo_medio_ms": round(float(self.tempo_total[i]) / documentos * 1000, 4),
+                    "tempo_max_ms": round(float(self.tempo_max[i]) * 1000, 4),
+                    "marcacoes": marcacoes,
+                }
+                linhas.append(linha)
+        if estresse:
+            for linha, p in zip(linhas, self.patterns):
+                razao = backtracking_risk(p["regex"], linha["normalizado"])
+                # None: a busca estourou LIMITE_ESTRESSE_S (JSON não aceita infinito)
+                linha["razao_estresse"] = round(razao, 2) if np.isfinite(razao) else None
+                if razao > RAZAO_BACKTRACKING:
+                    linha["marcacoes"].append("backtracking")
+        return linhas
+
+    def summary(self) -> dict:
+        """Resumo para /metrics."""
+        linhas = self.report()
+        return {
+            "versao_padroes": self.versao,
+            "documentos": self.documentos,
+            "mortos": sum("morto" in l["marcacoes"] for l in linhas),
+            "sombreados": sum("sombreado" in l["marcacoes"] for l in linhas),
+            "tempo_medio_ms": round(sum(l["tempo_medio_ms"] for l in linhas), 3),
+        }
+
+    def pruned_patterns(self) -> List[dict]:
+        """Padrões que venceram algum laudo, em ordem de vitórias dentro de cada analito."""
+        with self._lock:
+            vivos = [i for i in range(len(self.patterns)) if self.vitorias[i] > 0]
+            vitorias = self.vitorias.copy()
+            conflitos = set(self.conflitos)
+
+        grupos: Dict[str, List[int]] = {}
+        for i in vivos:
+            grupos.setdefault(self.normalizados[i], []).append(i)
+
+        ordenados = []
+        for indices in grupos.values():
+            # Escolhe sempre o alias com mais vitórias cujo predecessor em conflito já saiu
+            restantes = list(indices)
+            while restantes:
+                livres = [i for i in restantes if not any((j, i) in conflitos for j in restantes if j != i)]
+                escolhido = max(livres or restantes[:1], key=lambda i: (vitorias[i], -i))
+                ordenados.append(escolhido)
+                restantes.remove(escolhido)
+
+        # Analitos na posição do seu alias mais vitorioso (mantém a ordem de exibição)
+        primeiro = {}
+        for i in ordenados:
+            primeiro.setdefault(self.normalizados[i], i)
+        ordenados.sort(key=lambda i: primeiro[self.normalizados[i]])
+        return [self.patterns[i] for i in ordenados]
+
+
+def write_patterns_csv(patterns: List[dict], caminho: str) -> None:
+    """Grava padrões no formato de patterns.csv (padrão sempre entre aspas)."""
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        f.write("analito,pattern,grupo_decimal\n")
+        for p in patterns:
+            padrao = p["pattern"].replace('"', '""')
+            f.write(f'{p["analito"]},"{padrao}",{p["grupo"]}\n')
+
+
+def _tempo_busca(regex: re.Pattern, texto: str, repeticoes: int = 3) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        regex.search(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def backtracking_risk(regex: re.Pattern, analito: str = "") -> float:
+    """
+    Crescimento do tempo de busca em textos adversariais sem match: o nome do
+    analito seguido de um trecho repetido cada vez mais longo. Retorna a
+    razão t(2n)/t(n) no maior tamanho medido (~2 é linear, ~4 quadrático) ou
+    infinito se uma busca passar de LIMITE_ESTRESSE_S (crescimento
+    exponencial). Os tamanhos crescem aos poucos (×2^¼) para que um padrão
+    exponencial estoure o limite sem travar a medição.
+    """
+    tamanhos = [round(8 * 2 ** (k / 4)) for k in range(4 * 9 + 1)]  # 8 → 4096
+    pior = 0.0
+    for preenchimento in PREENCHIMENTOS:
+        tempos = []
+        for tamanho in tamanhos:
+            texto = analito + " " + preenchimento * (tamanho // len(preenchimento) + 1)
+            tempos.append(_tempo_busca(regex, texto[:len(analito) + 1 + tamanho]))
+            if tempos[-1] > LIMITE_ESTRESSE_S:
+                return float("inf")
+        # Maior dobra de tamanho com tempo acima do ruído de medição
+        for k in range(len(tempos) - 1, 3, -1):
+            if tempos[k - 4] > 1e-4:
+                pior = max(pior, tempos[k] / tempos[k - 4])
+                break
+    return pior
+
+
+MAX_VERSOES_PERFIL = 2  # versão em uso e a anterior (requisições em andamento na recarga)
+_perfis: Dict[str, PatternProfile] = {}
+_perfis_lock = threading.Lock()
+
+
+def profile_sample_rate() -> float:
+    """Fração das extrações da API que alimentam o perfil (PATTERN_PROFILE_SAMPLE)."""
+    try:
+        return float(os.getenv('PATTERN_PROFILE_SAMPLE', '0'))
+    except ValueError:
+        return 0.0
+
+
+def get_pattern_profile(registry) -> PatternProfile:
+    """Perfil do tráfego para a versão de padrões do registro (um por versão)."""
+    perfil = _perfis.get(registry.versao)
+    if perfil is None:
+        with _perfis_lock:
+            perfil = _perfis.get(registry.versao)
+            if perfil is None:
+                perfil = _perfis[registry.versao] = PatternProfile(registry)
+                while len(_perfis) > MAX_VERSOES_PERFIL:
+                    del _perfis[next(iter(_perfis))]  # versão mais antiga
+    return perfil
+
+
+def find_profile(versao: str) -> Optional[PatternProfile]:
+    """Perfil já acumulado para uma versão de padrões, se houver."""
+    return _perfis.get(versao)
+
+
+def sampled_profile(registry) -> Optional[PatternProfile]:
+    """Perfil a alimentar nesta extração, conforme a amostragem (None = não perfilar)."""
+    taxa = profile_sample_rate()
+    if taxa <= 0 or random.random() >= taxa:
+        return None
+    return get_pattern_profile(registry)
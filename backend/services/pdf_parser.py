@@ -2,22 +2,37 @@ import re
 import csv
 import io
 import os
+import time
+import hashlib
+import threading
 import logging
-import unicodedata
 from PyPDF2 import PdfReader
 from PyPDF2.errors import PdfReadError
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .analyte_catalog import analyte_id as normalize_analito_name
+from .ocr_engine import OCRBudget, get_ocr_engine
+from .units import DIFERENCIAL, normalize_units, parse_lab_number, unit_after
+from .pattern_profiler import sampled_profile
+from .layout_fingerprint import get_layout_catalog, layout_dispatch_enabled
+from .table_extractor import extract_table_values, table_extraction_enabled
+from .records import LabValue
+from .regex_engine import CompiledPattern, PatternTimeout, RegexBudget
+from .text_normalizer import normalize_text
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+current_dir = os.path.dirname(os.path.abspath(__file__))
+PATTERNS_PATH = os.path.join(os.path.dirname(os.path.dirname(current_dir)), "data", "patterns.csv")
+
 # Tentar importar dependências de OCR
 try:
     import fitz  # PyMuPDF
     from PIL import Image, ImageEnhance, ImageFilter, ImageOps
-    import pytesseract
-    import numpy as np
     import cv2
     OCR_AVAILABLE = True
     logger.info("✅ Dependências OCR carregadas com sucesso")
@@ -25,30 +40,9 @@ except ImportError as e:
     OCR_AVAILABLE = False
     logger.warning(f"⚠️ OCR não disponível: {e}. Instale: pip install PyMuPDF pillow pytesseract opencv-python numpy")
 
-# Configurar caminho do Tesseract no Windows
-if OCR_AVAILABLE:
-    tesseract_paths = [
-        r'C:\Program Files\Tesseract-OCR\tesseract.exe',
-        r'C:\Program Files (x86)\Tesseract-OCR\tesseract.exe',
-        'tesseract'  # Para sistemas com tesseract no PATH
-    ]
-    
-    tesseract_found = False
-    for path in tesseract_paths:
-        if os.path.exists(path) or path == 'tesseract':
-            try:
-                pytesseract.pytesseract.tesseract_cmd = path
-                # Teste rápido
-                pytesseract.get_tesseract_version()
-                tesseract_found = True
-                logger.info(f"✅ Tesseract configurado: {path}")
-                break
-            except Exception:
-                continue
-    
-    if not tesseract_found:
-        OCR_AVAILABLE = False
-        logger.warning("⚠️ Tesseract não encontrado. OCR desabilitado.")
+# Motor de OCR: tesserocr (em processo) ou pytesseract, conforme OCR_ENGINE
+if OCR_AVAILABLE and get_ocr_engine() is None:
+    OCR_AVAILABLE = False
 
 def validate_pdf(pdf_content: Union[str, bytes]) -> tuple[bool, str]:
     """
@@ -94,68 +88,24 @@ def validate_pdf(pdf_content: Union[str, bytes]) -> tuple[bool, str]:
     except Exception as e:
         return False, f"Erro inesperado na validação: {str(e)}"
 
-def normalize_analito_name(analito: str) -> str:
-    """Normaliza nomes de analitos para deduplicação"""
-    analito_lower = analito.lower()
-    
-    # Mapeamento de nomes alternativos para nomes padrão
-    mapeamento = {
-        'plaquetas_alt': 'plaquetas',
-        'plaquetas_alt2': 'plaquetas',
-        'plaquetas_ponto': 'plaquetas',
-        'plaquetas_ponto_alt': 'plaquetas',
-        'plaquetas_formato_exato': 'plaquetas',
-        'hemacias_alt': 'hemacias',
-        'leucocitos_novo': 'leucocitos',
-        'neutrofilos_novo': 'neutrofilos',
-        'eosinofilos_novo': 'eosinofilos',
-        'eosinofilos_formato_exato': 'eosinofilos',
-        'eosinofilos_compacto': 'eosinofilos',
-        'eosinofilos_spaced': 'eosinofilos',
-        'eosinofilos_fragmentado': 'eosinofilos',
-        'eosinofilos_space_tolerant': 'eosinofilos',
-         'eosinofilos_reverse': 'eosinofilos',
-         'eosinofilos_flex': 'eosinofilos',
-         'eosinofilos_percent_only': 'eosinofilos',
-         'eosinofilos_percent_fragmentado': 'eosinofilos',
-        'basofilos_novo': 'basofilos',
-        'linfocitos_novo': 'linfocitos',
-        'monocitos_novo': 'monocitos',
-        'leucocitos_hemograma': 'leucocitos',
-        'neutrofilos_hemograma': 'neutrofilos',
-        'eosinofilos_hemograma': 'eosinofilos',
-        'eosinofilos_hemograma_alt': 'eosinofilos',
-        'basofilos_hemograma': 'basofilos',
-        'linfocitos_hemograma': 'linfocitos',
-        'monocitos_hemograma': 'monocitos',
-        'leucocitos_sus': 'leucocitos',
-        'neutrofilos_sus': 'neutrofilos',
-        'eosinofilos_sus': 'eosinofilos',
-        'basofilos_sus': 'basofilos',
-        'linfocitos_sus': 'linfocitos',
-        'monocitos_sus': 'monocitos'
-    }
-    
-    return mapeamento.get(analito_lower, analito_lower)
-
-def deduplicate_analitos(resultados: List[dict]) -> List[dict]:
+def deduplicate_analitos(resultados: List[LabValue]) -> List[LabValue]:
     """Remove analitos duplicados, mantendo apenas um por tipo normalizado"""
     analitos_unicos = {}
     
     for resultado in resultados:
-        analito_original = resultado['analito']
+        analito_original = resultado.analito
         analito_normalizado = normalize_analito_name(analito_original)
-        valor = resultado['valor']
+        valor = resultado.valor
         
         # Se é o primeiro deste tipo normalizado, adiciona
         if analito_normalizado not in analitos_unicos:
-            analitos_unicos[analito_normalizado] = {
-                'analito': analito_normalizado,  # Usar nome normalizado
-                'valor': valor
-            }
+            # Usar nome normalizado; o registro só é recriado se o nome mudar
+            analitos_unicos[analito_normalizado] = (
+                resultado if analito_original == analito_normalizado else LabValue(analito_normalizado, valor)
+            )
         else:
             # Se já existe, verifica se é o mesmo valor
-            valor_existente = analitos_unicos[analito_normalizado]['valor']
+            valor_existente = analitos_unicos[analito_normalizado].valor
             if abs(valor - valor_existente) > 0.01:  # Valores diferentes
                 logger.warning(f"⚠️ Valores diferentes para {analito_normalizado}: {valor_existente} vs {valor}")
                 # Manter o primeiro valor encontrado
@@ -163,20 +113,102 @@ def deduplicate_analitos(resultados: List[dict]) -> List[dict]:
     
     return list(analitos_unicos.values())
 
-def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None) -> List[dict]:
-    # Determinar caminho absoluto do arquivo patterns.csv
-    if patterns_path is None:
-        import os
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        patterns_path = os.path.join(project_root, "data", "patterns.csv")
-    logger.info("🔍 Iniciando extração de valores laboratoriais")
-    
-    # Validar PDF primeiro
+def notify_progress(progress_callback, pagina: int, total: int, etapa: str):
+    """Repassa o progresso por página; falhas no callback não interrompem a extração."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(pagina, total, etapa)
+    except Exception as e:
+        logger.debug(f"⚠️ Erro no callback de progresso: {e}")
+
+
+class PatternRegistry:
+    """
+    Padrões de patterns.csv já compilados, com a versão do arquivo (hash do
+    conteúdo). Imutável: uma recarga cria um novo registro em vez de alterar
+    o que está em uso.
+    """
+
+    def __init__(self, patterns: List[dict], versao: str):
+        self.patterns = patterns
+        self.versao = versao
+
+    @classmethod
+    def load(cls, patterns_path: str = None) -> "PatternRegistry":
+        patterns_path = patterns_path or PATTERNS_PATH
+        try:
+            with open(patterns_path, "rb") as f:
+                conteudo = f.read()
+        except FileNotFoundError:
+            logger.error(f"❌ Arquivo de padrões não encontrado: {patterns_path}")
+            raise Exception(f"Arquivo de configuração não encontrado: {patterns_path}")
+
+        try:
+            patterns = []
+            reader = csv.DictReader(io.StringIO(conteudo.decode("utf-8"), newline=''))
+            for row in reader:
+                try:
+                    regex = CompiledPattern(row["pattern"])
+                except re.error as e:
+                    # Padrão inválido é ignorado, como antes na aplicação por requisição
+                    logger.warning(f"⚠️ Padrão inválido para {row['analito']}: {e}")
+                    continue
+                patterns.append({
+                    "analito": row["analito"],
+                    "pattern": row["pattern"],
+                    "regex": regex,
+                    "grupo": int(row["grupo_decimal"])
+                })
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar padrões: {e}")
+            raise Exception(f"Erro ao carregar configurações: {e}")
+
+        versao = hashlib.sha256(conteudo).hexdigest()[:12]
+        logger.info(f"📋 Carregados {len(patterns)} padrões de análise (versão {versao})")
+        return cls(patterns, versao)
+
+    def subset(self, nomes: List[str], rotulo: str) -> "PatternRegistry":
+        """Registro só com os padrões nomeados, na ordem do arquivo (reaproveita os compilados)."""
+        incluidos = set(nomes)
+        return PatternRegistry([p for p in self.patterns if p["analito"] in incluidos],
+                               f"{self.versao}:{rotulo}")
+
+
+_pattern_registry = None
+_pattern_registry_lock = threading.Lock()
+
+
+def get_pattern_registry() -> PatternRegistry:
+    """Registro de padrões em uso, carregado no primeiro acesso."""
+    global _pattern_registry
+    if _pattern_registry is None:
+        with _pattern_registry_lock:
+            if _pattern_registry is None:
+                _pattern_registry = PatternRegistry.load()
+    return _pattern_registry
+
+
+def set_pattern_registry(registry: PatternRegistry) -> None:
+    """Troca o registro em uso (recarga a quente); quem já o obteve segue com o anterior."""
+    global _pattern_registry
+    _pattern_registry = registry
+
+
+def check_pdf(pdf_content: Union[str, bytes]) -> None:
+    """Valida o PDF; levanta Exception com a mensagem da validação."""
     is_valid, error_msg = validate_pdf(pdf_content)
     if not is_valid:
         logger.error(f"❌ Validação falhou: {error_msg}")
         raise Exception(f"Erro na validação do PDF: {error_msg}")
+
+
+def extract_full_text(pdf_content: Union[str, bytes], ocr_budget: OCRBudget = None,
+                      progress_callback=None, validar: bool = True) -> str:
+    """Texto do laudo (PyPDF2, com OCR como fallback), já sanitizado e normalizado para os padrões."""
+    # Validar PDF primeiro
+    if validar:
+        check_pdf(pdf_content)
     
     # Tentativa 1: Extração padrão com PyPDF2
     try:
@@ -186,7 +218,9 @@ def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None
             reader = PdfReader(pdf_content)
         
         full_text = ""
+        total_pages = len(reader.pages)
         for i, page in enumerate(reader.pages):
+            notify_progress(progress_callback, i + 1, total_pages, "texto")
             try:
                 page_text = page.extract_text()
                 if page_text:
@@ -209,7 +243,7 @@ def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None
         logger.warning("⚠️ Texto insuficiente com PyPDF2")
         if OCR_AVAILABLE:
             logger.info("🔍 Tentando extração com OCR...")
-            ocr_text = extract_text_with_ocr(pdf_content)
+            ocr_text = extract_text_with_ocr(pdf_content, ocr_budget, progress_callback)
             if len(ocr_text.strip()) > len(full_text.strip()):
                 full_text = ocr_text
                 logger.info(f"✅ OCR extraiu {len(full_text)} caracteres")
@@ -221,79 +255,95 @@ def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None
     if len(full_text.strip()) == 0:
         raise Exception("Não foi possível extrair texto do PDF. Possíveis causas: PDF baseado em imagens sem OCR disponível, arquivo corrompido, ou formato não suportado.")
     
-    # Sanitização unicode para normalizar acentos e remover espaços invisíveis
-    full_text = sanitize_unicode_text(full_text)
-    # Normalização de termos fragmentados antes de aplicar regex
-    full_text = normalize_fragmented_terms(full_text)
+    # Acentos, espaços invisíveis e termos fragmentados, numa única passada
+    full_text = normalize_text(full_text)
 
-    # Lê os padrões do CSV
-    try:
-        patterns = []
-        with open(patterns_path, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                patterns.append({
-                    "analito": row["analito"],
-                    "pattern": row["pattern"],
-                    "grupo": int(row["grupo_decimal"])
-                })
-        logger.info(f"📋 Carregados {len(patterns)} padrões de análise")
-    except FileNotFoundError:
-        logger.error(f"❌ Arquivo de padrões não encontrado: {patterns_path}")
-        raise Exception(f"Arquivo de configuração não encontrado: {patterns_path}")
-    except Exception as e:
-        logger.error(f"❌ Erro ao carregar padrões: {e}")
-        raise Exception(f"Erro ao carregar configurações: {e}")
+    return full_text
 
-    # Aplica os padrões
-    resultados = []
-    matches_found = 0
-    patterns_not_found = []
-    
-    for item in patterns:
-        try:
-            match = re.search(item["pattern"], full_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                matches_found += 1
-                valor_str = match.group(item["grupo"])
-                logger.debug(f"🎯 {item['analito']}: valor bruto '{valor_str}'")
-                
-                # Processamento inteligente de separadores de milhares vs decimais
-                normalized_name = normalize_analito_name(item["analito"])  # usa mapeamento interno
-                if "." in valor_str:
-                    partes = valor_str.split(".")
-                    if len(partes) == 2 and len(partes[1]) == 3:  # formato X.XXX = separador de milhares
-                        # Para leucócitos, neutrófilos, linfócitos, plaquetas: ponto é separador de milhares
-                        if normalized_name in ["leucocitos", "neutrofilos", "linfocitos", "plaquetas"]:
-                            valor_str = valor_str.replace(".", "")  # 7.010 → 7010, 282.000 → 282000
-                
-                # Para plaquetas, vírgula é sempre separador de milhares
-                if "," in valor_str and normalized_name == "plaquetas":
-                    valor_str = valor_str.replace(",", "")  # 282,000 → 282000
-                
-                # Processamento padrão (agora sem conversão desnecessária)
-                valor_processado = valor_str.replace(",", ".")  # Apenas vírgula → ponto para decimais
-                
-                try:
-                    valor = float(valor_processado)
-                    resultados.append({
-                        "analito": item["analito"],
-                        "valor": valor
-                    })
-                    logger.info(f"✅ Analito encontrado: {item['analito']} = {valor}")
-                except ValueError as e:
-                    logger.warning(f"⚠️ Erro ao converter '{valor_processado}' para {item['analito']}: {e}")
-                    continue
+
+def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None,
+                       ocr_budget: OCRBudget = None, progress_callback=None,
+                       registry: PatternRegistry = None, regex_budget: RegexBudget = None) -> List[LabValue]:
+    """
+    Extrai os valores do laudo (texto do PDF, com OCR como fallback).
+
+    `ocr_budget` limita o tempo total de OCR; se ele se esgotar, a extração
+    segue com o texto parcial e `ocr_budget.esgotado` fica True.
+    `progress_callback(pagina, total, etapa)` é chamado a cada página concluída.
+    `registry` fixa a versão dos padrões; sem ele, usa `patterns_path` (lido
+    nesta chamada) ou o registro em uso. `regex_budget` limita o tempo dos
+    padrões (ver regex_engine); se algum não terminar, `regex_budget.incompleto`
+    fica True.
+
+    Os valores vêm primeiro da tabela de resultados lida por coordenadas
+    (table_extractor); os padrões só são aplicados se o laudo mencionar
+    analitos que ela não trouxe, ou se não houver tabela. Com o layout do
+    laudo reconhecido (layout_fingerprint), só o pacote de padrões desse
+    layout é aplicado; os analitos do pacote que ele não encontrar são
+    buscados com os demais padrões do registro.
+    """
+    logger.info("🔍 Iniciando extração de valores laboratoriais")
+    check_pdf(pdf_content)
+
+    # Padrões compilados
+    if registry is None:
+        registry = PatternRegistry.load(patterns_path) if patterns_path else get_pattern_registry()
+    # Extração amostrada para o perfil: todos os padrões são avaliados, com ou sem tabela
+    perfil = sampled_profile(registry)
+
+    # Caminho principal em PDFs com camada de texto: a tabela lida por coordenadas
+    tabela, pendentes = extract_table_values(pdf_content) if table_extraction_enabled() else ([], [])
+    if tabela and not pendentes and perfil is None:
+        logger.info("📊 Todos os analitos do laudo lidos da tabela; padrões não aplicados")
+        return tabela
+    da_tabela = {v.analito for v in tabela}
+    if pendentes and tabela:
+        logger.info(f"📊 Analitos fora da tabela, buscados pelos padrões: {', '.join(pendentes)}")
+
+    full_text = extract_full_text(pdf_content, ocr_budget, progress_callback, validar=False)
+
+    if regex_budget is None:
+        regex_budget = RegexBudget.from_env()  # um só orçamento para o pacote e o eventual fallback
+
+    # Padrões para o que a tabela não trouxe: só o pacote do layout reconhecido
+    if perfil is None and layout_dispatch_enabled():
+        catalogo = get_layout_catalog()
+        impressao, layout, pacote = catalogo.select(full_text, registry)
+        fallback = False
+        faltantes, recuperados = set(), 0
+        if layout is not None:
+            logger.info(f"🗂️ Layout {layout}: {len(pacote.patterns)} de {len(registry.patterns)} padrões")
+            resultados, patterns_not_found = apply_patterns(full_text, pacote, regex_budget=regex_budget,
+                                                            resolvidos=da_tabela)
+            fallback = not resultados and not tabela
+            if fallback:
+                logger.warning(f"⚠️ Pacote do layout {layout} não extraiu valores; aplicando todos os padrões")
             else:
-                # Padrão não encontrou match
-                patterns_not_found.append(item['analito'])
-                logger.debug(f"❌ Padrão não encontrou match para: {item['analito']} - Pattern: {item['pattern'][:100]}...")
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao processar padrão para {item['analito']}: {e}")
-            continue
-    
-    logger.info(f"🎯 Encontrados {matches_found} matches, {len(resultados)} valores válidos extraídos")
-    
+                # Analitos do pacote que ele não achou: os demais aliases do registro ainda podem achá-los
+                extraidos = da_tabela | {normalize_analito_name(r.analito) for r in resultados}
+                faltantes = {normalize_analito_name(p["analito"]) for p in pacote.patterns} - extraidos
+            if faltantes:
+                outros = {normalize_analito_name(p["analito"]) for p in registry.patterns} - faltantes
+                extras, nao_encontrados = apply_patterns(full_text, registry, regex_budget=regex_budget,
+                                                         resolvidos=outros | extraidos)
+                recuperados = len({normalize_analito_name(r.analito) for r in extras})
+                logger.warning(f"⚠️ Pacote do layout {layout} sem {', '.join(sorted(faltantes))}; "
+                               f"{recuperados} recuperado(s) pelos demais padrões")
+                resultados += extras
+                patterns_not_found = [p for p in patterns_not_found
+                                      if normalize_analito_name(p) not in faltantes] + nao_encontrados
+        if layout is None or fallback:
+            resultados, patterns_not_found = apply_patterns(full_text, registry, regex_budget=regex_budget,
+                                                            resolvidos=da_tabela)
+        catalogo.record(impressao, layout, fallback, len(faltantes), recuperados)
+    else:
+        # Sem despacho, os padrões também só buscam o que a tabela não trouxe (o perfil avalia todos)
+        resultados, patterns_not_found = apply_patterns(full_text, registry, perfil, regex_budget,
+                                                        resolvidos=da_tabela)
+
+    if tabela:
+        resultados = tabela + [r for r in resultados if normalize_analito_name(r.analito) not in da_tabela]
+
     # Log dos padrões que não encontraram match
     if patterns_not_found:
         logger.warning(f"❌ Padrões sem match ({len(patterns_not_found)}): {', '.join(patterns_not_found)}")
@@ -318,78 +368,346 @@ def extract_lab_values(pdf_content: Union[str, bytes], patterns_path: str = None
     
     if len(resultados) == 0:
         logger.warning("⚠️ Nenhum valor laboratorial encontrado no PDF")
+
+    return resultados
+
+
+def apply_patterns(full_text: str, registry: PatternRegistry, perfil=None,
+                   regex_budget: RegexBudget = None, resolvidos: set = None) -> Tuple[List[LabValue], List[str]]:
+    """
+    Aplica os padrões ao texto já normalizado. Retorna (valores deduplicados,
+    padrões sem match).
+
+    Um analito resolvido por um valor absoluto dispensa os aliases seguintes
+    (o primeiro match é o que a deduplicação manteria); `resolvidos` são os
+    analitos (normalizados) já extraídos por outro caminho, cujos aliases nem
+    são avaliados. Com `perfil` (PatternProfile), todos os padrões são
+    avaliados e cronometrados. `regex_budget` limita o tempo por busca e do
+    documento; padrões interrompidos ou não avaliados deixam
+    `regex_budget.incompleto` True.
+    """
+    if regex_budget is None:
+        regex_budget = RegexBudget.from_env()
+    regex_budget.start()  # o prazo do documento conta a partir daqui, não da extração do texto
+    resultados = []
+    origens = []  # padrão, nome normalizado e unidade de cada resultado, para a conversão
+    normalizados = []
+    unidades = []
+    resolvidos = set(resolvidos or ())
+    matches_found = 0
+    patterns_not_found = []
+    if perfil is not None:
+        tempos = np.zeros(len(registry.patterns))
+        valores_padrao = np.full(len(registry.patterns), np.nan)
+
+    for indice, item in enumerate(registry.patterns):
+        normalized_name = normalize_analito_name(item["analito"])  # usa mapeamento interno
+        if perfil is None and normalized_name in resolvidos:
+            continue
+        if regex_budget.expired():
+            break
+        try:
+            inicio = time.perf_counter()
+            try:
+                match = item["regex"].search(full_text, regex_budget.timeout())
+            except PatternTimeout:
+                regex_budget.record(item["analito"], time.perf_counter() - inicio, interrompido=True)
+                continue
+            decorrido = time.perf_counter() - inicio
+            regex_budget.record(item["analito"], decorrido)
+            if perfil is not None:
+                tempos[indice] = decorrido
+            if match:
+                matches_found += 1
+                valor_str = match.group(item["grupo"])
+                logger.debug(f"🎯 {item['analito']}: valor bruto '{valor_str}'")
+                
+                try:
+                    valor = parse_lab_number(valor_str, normalized_name)
+                    unidade = unit_after(full_text, match.end(item["grupo"]))
+                    resultados.append(LabValue(item["analito"], valor))
+                    origens.append(indice)
+                    normalizados.append(normalized_name)
+                    unidades.append(unidade)
+                    if unidade != "pct" or normalized_name not in DIFERENCIAL:
+                        resolvidos.add(normalized_name)  # % do diferencial ainda aceita o absoluto
+                    if perfil is not None:
+                        valores_padrao[indice] = valor
+                    logger.info(f"✅ Analito encontrado: {item['analito']} = {valor}")
+                except ValueError as e:
+                    logger.warning(f"⚠️ Erro ao converter '{valor_str}' para {item['analito']}: {e}")
+                    continue
+            else:
+                # Padrão não encontrou match
+                patterns_not_found.append(item['analito'])
+                logger.debug(f"❌ Padrão não encontrou match para: {item['analito']} - Pattern: {item['pattern'][:100]}...")
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao processar padrão para {item['analito']}: {e}")
+            continue
     
+    logger.info(f"🎯 Encontrados {matches_found} matches, {len(resultados)} valores válidos extraídos")
+
+    # Conversão para as unidades de referência (e diferencial em % → absoluto)
+    vencedores = {}
+    if resultados:
+        indices, valores = normalize_units(normalizados, [r.valor for r in resultados], unidades)
+        convertidos = []
+        for i, valor in zip(indices, valores.tolist()):
+            resultado = resultados[i]
+            if valor != resultado.valor:
+                logger.info(f"📏 {resultado.analito}: {resultado.valor} "
+                            f"{unidades[i] or 'sem unidade'} → {valor}")
+                resultado = LabValue(resultado.analito, valor)
+            convertidos.append(resultado)
+            vencedores.setdefault(normalizados[i], origens[i])
+        resultados = convertidos
+
+    if perfil is not None:
+        perfil.record(tempos, valores_padrao, list(vencedores.values()))
+
     # Deduplicar analitos com mesmo valor normalizado
     resultados_deduplificados = deduplicate_analitos(resultados)
     logger.info(f"🔄 Deduplicação: {len(resultados)} → {len(resultados_deduplificados)} analitos únicos")
-    
-    return resultados_deduplificados
 
-def preprocess_image_for_ocr(img: Image.Image) -> Image.Image:
+    return resultados_deduplificados, patterns_not_found
+
+# Limiares do desvio-padrão estimado do ruído (níveis de cinza) para o denoise
+NOISE_SKIP_SIGMA = 2.0     # abaixo: render limpo, sem denoise
+NOISE_MEDIAN_SIGMA = 6.0   # abaixo: filtro de mediana 3x3; acima: Non-Local Means
+
+def render_page_gray(page, zoom: float) -> np.ndarray:
+    """Rasteriza a página direto em escala de cinza (sem PPM/PIL intermediário)."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    return gray[:, :pix.width]
+
+def estimate_noise_sigma(gray: np.ndarray) -> float:
+    """
+    Estima o desvio-padrão do ruído gaussiano (método de Immerkær, 1996).
+    Custa uma convolução 3x3 — ordens de grandeza mais barato que o denoise.
     """
-    Aplica pré-processamento avançado na imagem para melhorar OCR
+    height, width = gray.shape[:2]
+    if height < 3 or width < 3:
+        return 0.0
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(gray.astype(np.float32), -1, kernel)[1:-1, 1:-1]
+    return float(np.sqrt(np.pi / 2) * np.abs(response).sum() / (6 * (width - 2) * (height - 2)))
+
+def preprocess_image_for_ocr(img: Union[Image.Image, np.ndarray], timings: dict = None) -> Image.Image:
     """
+    Aplica pré-processamento na imagem para melhorar OCR.
+
+    O denoise é escolhido pelo nível de ruído medido: renders limpos do PDF
+    pulam a etapa, ruído moderado usa mediana e só escaneamentos ruidosos pagam
+    o Non-Local Means. Se `timings` for informado, recebe o custo (s) de cada etapa.
+    """
+    if timings is None:
+        timings = {}
     try:
-        # Converter para numpy array para processamento com OpenCV
-        img_array = np.array(img)
-        
+        start = time.perf_counter()
+
         # Converter para escala de cinza se necessário
-        if len(img_array.shape) == 3:
+        img_array = np.asarray(img)
+        if img_array.ndim == 3:
             gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
         else:
             gray = img_array
-        
-        # 1. Denoising (remoção de ruído)
-        denoised = cv2.fastNlMeansDenoising(gray)
-        
+        timings['escala_cinza'] = time.perf_counter() - start
+
+        # 1. Denoising adaptativo
+        start = time.perf_counter()
+        sigma = estimate_noise_sigma(gray)
+        timings['estimativa_ruido'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if sigma < NOISE_SKIP_SIGMA:
+            denoised = gray
+        elif sigma < NOISE_MEDIAN_SIGMA:
+            denoised = cv2.medianBlur(gray, 3)
+        else:
+            denoised = cv2.fastNlMeansDenoising(gray)
+        timings['denoise'] = time.perf_counter() - start
+        logger.debug(f"🧹 Ruído estimado σ={sigma:.1f}")
+
         # 2. Melhorar contraste com CLAHE (Contrast Limited Adaptive Histogram Equalization)
+        start = time.perf_counter()
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
         enhanced = clahe.apply(denoised)
-        
+        timings['clahe'] = time.perf_counter() - start
+
         # 3. Binarização adaptativa (melhor para documentos escaneados)
+        start = time.perf_counter()
         binary = cv2.adaptiveThreshold(
             enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
         )
-        
-        # 4. Morfologia para limpar a imagem
-        kernel = np.ones((1,1), np.uint8)
-        cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        
+        timings['binarizacao'] = time.perf_counter() - start
+
         # Converter de volta para PIL Image
-        processed_img = Image.fromarray(cleaned)
+        processed_img = Image.fromarray(binary)
         
         logger.debug("✅ Pré-processamento de imagem concluído")
         return processed_img
         
     except Exception as e:
         logger.warning(f"⚠️ Erro no pré-processamento: {e}, usando imagem original")
-        return img
+        return img if isinstance(img, Image.Image) else Image.fromarray(np.asarray(img))
 
-def detect_and_correct_orientation(img: Image.Image) -> Image.Image:
+def detect_text_rows(gray: np.ndarray) -> List[dict]:
     """
-    Detecta e corrige a orientação da imagem
+    Localiza as linhas de texto da página com OpenCV (sem OCR).
+
+    Cada linha é um dict com 'box' (x, y, w, h) e 'colunas' (número de blocos de
+    texto separados por espaço largo — rótulo, resultado, referência...).
+    """
+    height, width = gray.shape[:2]
+
+    # Texto em branco sobre fundo preto para as operações morfológicas
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    # Remover réguas horizontais da tabela para que não fundam linhas vizinhas
+    rule_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(40, width // 15), 1))
+    rules = cv2.morphologyEx(binary, cv2.MORPH_OPEN, rule_kernel)
+    text_only = cv2.subtract(binary, rules)
+
+    # Dilatação horizontal: junta letras em palavras/blocos, mas preserva as colunas
+    join_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, width // 80), 3))
+    dilated = cv2.dilate(text_only, join_kernel, iterations=1)
+    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_h, max_h = max(4, int(height * 0.004)), int(height * 0.06)
+    blocks = sorted(
+        (b for b in (cv2.boundingRect(c) for c in contours) if min_h <= b[3] <= max_h and b[2] >= 4),
+        key=lambda b: b[1]
+    )
+
+    # Agrupar blocos com sobreposição vertical na mesma linha
+    rows = []
+    for x, y, w, h in blocks:
+        center = y + h / 2
+        for row in rows:
+            rx, ry, rw, rh = row['box']
+            if ry <= center <= ry + rh:
+                nx, ny = min(rx, x), min(ry, y)
+                row['box'] = (nx, ny, max(rx + rw, x + w) - nx, max(ry + rh, y + h) - ny)
+                row['colunas'] += 1
+                break
+        else:
+            rows.append({'box': (x, y, w, h), 'colunas': 1})
+
+    return sorted(rows, key=lambda r: r['box'][1])
+
+def detect_results_region(img: Image.Image, min_rows: int = 4) -> Optional[dict]:
+    """
+    Encontra a região da tabela de resultados (linhas com rótulo + valor).
+
+    Retorna {'box': (x, y, w, h), 'linhas': [...]} ou None quando não há uma
+    tabela clara ou quando ela ocupa praticamente a página inteira.
     """
     try:
-        # Usar Tesseract para detectar orientação
-        osd = pytesseract.image_to_osd(img, output_type=pytesseract.Output.DICT)
-        angle = osd['rotate']
-        
-        if angle != 0:
-            logger.info(f"🔄 Corrigindo rotação: {angle} graus")
-            img = img.rotate(-angle, expand=True, fillcolor='white')
-        
-        return img
+        gray = np.array(img.convert('L')) if isinstance(img, Image.Image) else img
+        height, width = gray.shape[:2]
+        rows = detect_text_rows(gray)
+        tabular = [i for i, r in enumerate(rows) if r['colunas'] >= 2]
+        if len(tabular) < min_rows:
+            return None
+
+        # Agrupar linhas tabulares consecutivas: próximas (gap até 3x a altura
+        # típica) ou separadas apenas por cabeçalhos/notas curtas (até 3 linhas)
+        row_height = float(np.median([rows[i]['box'][3] for i in tabular]))
+        clusters = [[tabular[0]]]
+        for i in tabular[1:]:
+            prev = clusters[-1][-1]
+            gap = rows[i]['box'][1] - (rows[prev]['box'][1] + rows[prev]['box'][3])
+            if gap <= 3 * row_height or (i - prev - 1 <= 3 and gap <= 12 * row_height):
+                clusters[-1].append(i)
+            else:
+                clusters.append([i])
+
+        # Linhas tabulares isoladas (ex.: "Nome ... Data") ficam de fora; blocos
+        # separados por cabeçalhos (série vermelha, série branca) entram juntos
+        best = [rows[i] for cluster in clusters if len(cluster) >= 2 for i in cluster]
+        if len(best) < min_rows:
+            return None
+
+        pad = int(row_height)
+        x0 = max(0, min(r['box'][0] for r in best) - pad)
+        y0 = max(0, best[0]['box'][1] - pad)
+        x1 = min(width, max(r['box'][0] + r['box'][2] for r in best) + pad)
+        y1 = min(height, best[-1]['box'][1] + best[-1]['box'][3] + pad)
+
+        if (x1 - x0) * (y1 - y0) > 0.9 * width * height:
+            return None
+
+        return {'box': (x0, y0, x1 - x0, y1 - y0), 'linhas': best}
+
+    except Exception as e:
+        logger.debug(f"⚠️ Não foi possível localizar a tabela de resultados: {e}")
+        return None
+
+def ocr_timeout(budget: OCRBudget = None) -> float:
+    """
+    Timeout (s) de uma chamada ao Tesseract dentro do orçamento; 0 = sem
+    limite (sem orçamento). Com o orçamento acabando entre a checagem e a
+    chamada, devolve 1 ms em vez de 0, que o pytesseract trataria como sem limite.
+    """
+    return max(budget.remaining(), 0.001) if budget else 0
+
+def detect_page_rotation(img: Union[Image.Image, np.ndarray], budget: OCRBudget = None) -> int:
+    """
+    Retorna a rotação (graus, sentido horário) que corrige a orientação da
+    página segundo o OSD do Tesseract; 0 quando não é possível detectar.
+    """
+    if budget and budget.expired():
+        return 0
+    try:
+        return get_ocr_engine().detect_rotation(img, timeout=ocr_timeout(budget))
     except Exception as e:
         logger.debug(f"⚠️ Não foi possível detectar orientação: {e}")
-        return img
+        return 0
+
+def rotate_page_image(gray: np.ndarray, angle: int) -> np.ndarray:
+    """Aplica a rotação do OSD (múltiplo de 90°, sentido horário) sem reamostrar."""
+    if angle % 360 == 0:
+        return gray
+    return np.ascontiguousarray(np.rot90(gray, k=-(angle // 90)))
 
-def detect_medical_document_type(img: Image.Image) -> str:
+def detect_and_correct_orientation(img: Image.Image) -> Image.Image:
+    """
+    Detecta e corrige a orientação da imagem
+    """
+    angle = detect_page_rotation(img)
+    if angle != 0:
+        logger.info(f"🔄 Corrigindo rotação: {angle} graus")
+        img = img.rotate(-angle, expand=True, fillcolor='white')
+    return img
+
+# Zoom do render de sondagem da página (OSD + tipo de documento)
+PROBE_ZOOM = 1.5
+
+def probe_page(page, budget: OCRBudget = None) -> dict:
+    """
+    Fatos da página que não dependem da resolução do OCR — rotação e tipo de
+    documento — calculados uma única vez num render de baixa resolução e
+    reaproveitados por todas as resoluções candidatas.
+    """
+    gray = render_page_gray(page, PROBE_ZOOM)
+    angle = detect_page_rotation(gray, budget)
+    if angle != 0:
+        logger.info(f"🔄 Corrigindo rotação: {angle} graus")
+        gray = rotate_page_image(gray, angle)
+    return {'rotacao': angle, 'tipo_documento': detect_medical_document_type(gray, budget)}
+
+def detect_medical_document_type(img: Union[Image.Image, np.ndarray], budget: OCRBudget = None) -> str:
     """
     Detecta o tipo de documento médico para aplicar processamento específico
     """
+    if budget and budget.expired():
+        return 'geral'
     try:
         # Fazer OCR rápido para detectar palavras-chave
-        quick_text = pytesseract.image_to_string(img, lang='por', config='--psm 6 --oem 3').lower()
+        quick_text = get_ocr_engine().image_to_string(
+            img, lang='por', config='--psm 6 --oem 3', timeout=ocr_timeout(budget)
+        ).lower()
         
         # Palavras-chave para diferentes tipos de exames
         if any(word in quick_text for word in ['hemograma', 'hemacias', 'leucocitos', 'plaquetas', 'serie']):
@@ -404,74 +722,129 @@ def detect_medical_document_type(img: Image.Image) -> str:
     except Exception:
         return 'geral'
 
-def extract_text_with_medical_ocr(img: Image.Image, page_num: int) -> str:
+# Confiança média (0-100, por palavra) abaixo da qual uma linha é refeita
+OCR_LINE_MIN_CONFIDENCE = 60
+
+HEMOGRAMA_WHITELIST = '-c tessedit_char_whitelist=0123456789.,ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÀÁÂÃÇÉÊÍÓÔÕÚÜàáâãçéêíóôõúü%/³²μ '
+
+# Tentativas alternativas (idioma, configuração) para linhas de baixa confiança
+LINE_RETRY_CONFIGS = [
+    ('por', '--psm 7 --oem 3'),
+    ('por+eng', '--psm 7 --oem 3'),
+    ('eng', '--psm 7 --oem 3'),
+]
+
+def ocr_lines_with_confidence(img: Image.Image, lang: str, config: str, budget: OCRBudget = None) -> List[dict]:
+    """
+    Uma única passada do Tesseract (image_to_data), agrupada por linha.
+
+    Retorna, em ordem de leitura, dicts com 'texto', 'confianca' (média das
+    palavras, 0-100) e 'box' (x, y, w, h) da linha na imagem. Com o orçamento
+    esgotado, não chama o Tesseract e retorna lista vazia.
+    """
+    if budget and budget.expired():
+        return []
+    data = get_ocr_engine().image_to_data(img, lang=lang, config=config, timeout=ocr_timeout(budget))
+
+    lines = {}
+    for i, word in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+        line = lines.get(key)
+        if line is None:
+            lines[key] = {'palavras': [word], 'confs': [conf], 'box': (x, y, x + w, y + h)}
+        else:
+            line['palavras'].append(word)
+            line['confs'].append(conf)
+            x0, y0, x1, y1 = line['box']
+            line['box'] = (min(x0, x), min(y0, y), max(x1, x + w), max(y1, y + h))
+
+    result = []
+    for line in lines.values():
+        x0, y0, x1, y1 = line['box']
+        result.append({
+            'texto': ' '.join(line['palavras']),
+            'confianca': sum(line['confs']) / len(line['confs']),
+            'box': (x0, y0, x1 - x0, y1 - y0)
+        })
+    return result
+
+def retry_low_confidence_line(img: Image.Image, line: dict, budget: OCRBudget = None) -> dict:
+    """Refaz o OCR só no recorte da linha, com PSM de linha única e idiomas alternativos."""
+    x, y, w, h = line['box']
+    pad = max(2, h // 4)
+    crop = img.crop((max(0, x - pad), max(0, y - pad), min(img.width, x + w + pad), min(img.height, y + h + pad)))
+
+    best = line
+    for lang, config in LINE_RETRY_CONFIGS:
+        try:
+            candidates = ocr_lines_with_confidence(crop, lang, config, budget)
+        except Exception as e:
+            logger.debug(f"⚠️ Erro ao refazer linha com {lang} + {config}: {e}")
+            continue
+        if not candidates:
+            continue
+        conf = sum(c['confianca'] for c in candidates) / len(candidates)
+        if conf > best['confianca']:
+            best = {'texto': ' '.join(c['texto'] for c in candidates), 'confianca': conf, 'box': line['box']}
+        if best['confianca'] >= OCR_LINE_MIN_CONFIDENCE or (budget and budget.expired()):
+            break
+    return best
+
+def extract_text_with_medical_ocr(img: Image.Image, page_num: int, doc_type: str = None,
+                                  budget: OCRBudget = None) -> str:
     """
-    Extrai texto usando OCR otimizado para documentos médicos
+    Extrai texto usando OCR otimizado para documentos médicos.
+
+    Faz uma passada com confiança por palavra (image_to_data) e refaz apenas as
+    linhas de baixa confiança, em vez de repetir a página inteira com várias
+    combinações de PSM e idioma. `doc_type` vem da sondagem da página
+    (probe_page); só é detectado aqui quando não informado. Com o orçamento
+    esgotado, as linhas ainda não refeitas ficam como na primeira passada.
     """
     # Detectar tipo de documento
-    doc_type = detect_medical_document_type(img)
+    if doc_type is None:
+        doc_type = detect_medical_document_type(img, budget)
     logger.debug(f"📋 Página {page_num+1}: Detectado como documento tipo '{doc_type}'")
-    
-    best_text = ""
-    best_confidence = 0
-    
-    # Configurações PSM específicas para documentos médicos
+
+    # Recortar a tabela de resultados: menos pixels para o Tesseract
+    region = detect_results_region(img) if doc_type == 'hemograma' else None
+    if region:
+        x, y, w, h = region['box']
+        logger.debug(f"✂️ Página {page_num+1}: OCR restrito à tabela ({len(region['linhas'])} linhas, "
+                     f"{100 * w * h / (img.width * img.height):.0f}% da página)")
+        img = img.crop((x, y, x + w, y + h))
+
+    config = '--psm 6 --oem 3'
     if doc_type == 'hemograma':
-        # Hemogramas geralmente têm layout tabular
-        psm_configs = [
-            ('--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789.,ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzÀÁÂÃÇÉÊÍÓÔÕÚÜàáâãçéêíóôõúü%/³²μ ', 'Hemograma com caracteres específicos'),
-            ('--psm 7 --oem 3', 'Linha única para valores'),
-            ('--psm 8 --oem 3', 'Palavra única para analitos'),
-            ('--psm 11 --oem 3', 'Texto esparso para tabelas')
-        ]
-    else:
-        # Configurações gerais para outros documentos
-        psm_configs = [
-            ('--psm 6 --oem 3', 'Bloco uniforme de texto'),
-            ('--psm 7 --oem 3', 'Linha única de texto'),
-            ('--psm 8 --oem 3', 'Palavra única'),
-            ('--psm 11 --oem 3', 'Texto esparso'),
-            ('--psm 12 --oem 3', 'Texto esparso com OSD'),
-            ('--psm 13 --oem 3', 'Linha crua - bypass de heurísticas')
-        ]
-    
-    # Idiomas para tentar (português primeiro para documentos médicos brasileiros)
-    languages = ['por', 'por+eng', 'eng']
-    
-    for lang in languages:
-        for config, description in psm_configs:
-            try:
-                # Extrair texto com configuração específica
-                text = pytesseract.image_to_string(img, lang=lang, config=config)
-                
-                # Pós-processamento específico para documentos médicos
-                text = post_process_medical_text(text, doc_type)
-                
-                # Calcular confiança (aproximada pelo comprimento e caracteres válidos)
-                confidence = calculate_medical_text_confidence(text, doc_type)
-                
-                if confidence > best_confidence and len(text.strip()) > 10:
-                    best_text = text
-                    best_confidence = confidence
-                    logger.debug(f"✅ Página {page_num+1}: Melhor resultado com {lang} + {description} (confiança: {confidence:.2f})")
-                    
-            except Exception as e:
-                logger.debug(f"⚠️ Erro com {lang} + {config}: {e}")
-                continue
-    
-    return best_text
+        config = f"{config} {HEMOGRAMA_WHITELIST}"
 
-def sanitize_unicode_text(text: str) -> str:
-    """Normaliza acentos (NFKC) e remove caracteres invisíveis/controle que atrapalham regex."""
-    if not text:
-        return text
-    normalized = unicodedata.normalize('NFKC', text)
-    for ch in ("\u200B","\u200C","\u200D","\u2060","\u00A0"):
-        normalized = normalized.replace(ch, " ")
-    import re
-    normalized = re.sub(r"\s{2,}", " ", normalized)
-    return normalized
+    try:
+        lines = ocr_lines_with_confidence(img, 'por', config, budget)
+        if not lines:
+            # Nada em bloco uniforme: tentar texto esparso uma única vez
+            lines = ocr_lines_with_confidence(img, 'por', '--psm 11 --oem 3', budget)
+    except Exception as e:
+        logger.debug(f"⚠️ Erro no OCR da página {page_num+1}: {e}")
+        return ""
 
+    retried = 0
+    for i, line in enumerate(lines):
+        if budget and budget.expired():
+            break
+        if line['confianca'] < OCR_LINE_MIN_CONFIDENCE:
+            lines[i] = retry_low_confidence_line(img, line, budget)
+            retried += 1
+
+    if lines:
+        mean_conf = sum(line['confianca'] for line in lines) / len(lines)
+        logger.debug(f"✅ Página {page_num+1}: {len(lines)} linhas, {retried} refeitas, confiança média {mean_conf:.0f}")
+
+    text = "\n".join(line['texto'] for line in lines)
+    return post_process_medical_text(text, doc_type)
 
 def post_process_medical_text(text: str, doc_type: str) -> str:
     """
@@ -517,116 +890,22 @@ def post_process_medical_text(text: str, doc_type: str) -> str:
     
     return processed_text
 
-# Normalização de termos com espaçamento interno incomum
-def normalize_fragmented_terms(text: str) -> str:
-    """Normaliza termos e tokens numéricos fragmentados (ex.: 'E o s i n ó f i l o s', '5 , 0 %', 'μ L')."""
-    import re
-    processed = text
-    # 1) Termos médicos com letras separadas por espaços
-    label_patterns = [
-        r"(?i)E\s*o\s*s\s*i\s*n\s*[óo]\s*f\s*i\s*l\s*o\s*s",
-        r"(?i)N\s*e\s*u\s*t\s*r\s*[óo]\s*f\s*i\s*l\s*o\s*s",
-        r"(?i)L\s*i\s*n\s*f\s*[óo]\s*c\s*i\s*t\s*o\s*s",
-        r"(?i)M\s*o\s*n\s*[óo]\s*c\s*i\s*t\s*o\s*s",
-        r"(?i)B\s*a\s*s\s*[óo]\s*f\s*i\s*l\s*o\s*s",
-        r"(?i)H\s*e\s*m\s*[áa]\s*c\s*i\s*a\s*s",
-        r"(?i)L\s*e\s*u\s*c\s*[óo]\s*c\s*i\s*t\s*o\s*s",
-        r"(?i)P\s*l\s*a\s*q\s*u\s*e\s*t\s*a\s*s",
-    ]
-    replacements = [
-        "Eosinófilos", "Neutrófilos", "Linfócitos", "Monócitos", "Basófilos",
-        "Hemácias", "Leucócitos", "Plaquetas"
-    ]
-    for pat, rep in zip(label_patterns, replacements):
-        processed = re.sub(pat, rep, processed)
-
-    # 2) Colapsar espaços em números e símbolos (vírgula, ponto, porcento)
-    # Ex.: '5 , 0' -> '5,0', '7 . 010' -> '7.010', '3 5' -> '35'
-    processed = re.sub(r"(\d)\s*,\s*(\d)", r"\1,\2", processed)
-    processed = re.sub(r"(\d)\s*\.\s*(\d{3})", r"\1.\2", processed)
-    processed = re.sub(r"(\d)\s+([\d]{1,3})(?=[^\d])", r"\1\2", processed)
-    processed = re.sub(r"(\d)\s*%", r"\1%", processed)
-
-    # 3) Colapsar espaços em unidades comuns
-    processed = re.sub(r"μ\s*L", "μL", processed)
-    processed = re.sub(r"mm\s*3", "mm3", processed)
-    processed = re.sub(r"/\s*μ\s*L", "/μL", processed)
-
-    return processed
-
-def calculate_medical_text_confidence(text: str, doc_type: str) -> float:
-    """
-    Calcula confiança específica para texto médico
-    """
-    if not text.strip():
-        return 0.0
-    
-    base_confidence = calculate_text_confidence(text)
-    
-    # Bônus para termos médicos específicos
-    medical_terms_bonus = 0.0
-    
-    if doc_type == 'hemograma':
-        hemograma_terms = [
-            'hemácias', 'hemacias', 'leucócitos', 'leucocitos', 'plaquetas',
-            'neutrófilos', 'neutrofilos', 'linfócitos', 'linfocitos',
-            'monócitos', 'monocitos', 'eosinófilos', 'eosinofilos',
-            'basófilos', 'basofilos', 'hematócrito', 'hemoglobina',
-            'série', 'serie', 'vermelha', 'branca', 'plaquetária'
-        ]
-        
-        text_lower = text.lower()
-        found_terms = sum(1 for term in hemograma_terms if term in text_lower)
-        medical_terms_bonus = min(0.3, found_terms * 0.05)  # Máximo 30% de bônus
-    
-    # Bônus para valores numéricos (importantes em exames)
-    import re
-    numeric_values = re.findall(r'\d+[.,]?\d*', text)
-    numeric_bonus = min(0.2, len(numeric_values) * 0.02)  # Máximo 20% de bônus
-    
-    final_confidence = base_confidence + medical_terms_bonus + numeric_bonus
-    return max(0.0, min(1.0, final_confidence))
-
-def extract_text_with_advanced_ocr(img: Image.Image, page_num: int) -> str:
+def extract_text_with_advanced_ocr(img: Image.Image, page_num: int, doc_type: str = None,
+                                   budget: OCRBudget = None) -> str:
     """
-    Extrai texto usando OCR avançado com múltiplas configurações
+    Extrai texto usando OCR avançado (passada única + retentativa por linha)
     """
     # Usar OCR médico especializado
-    return extract_text_with_medical_ocr(img, page_num)
+    return extract_text_with_medical_ocr(img, page_num, doc_type, budget)
 
-def calculate_text_confidence(text: str) -> float:
-    """
-    Calcula uma pontuação de confiança aproximada para o texto extraído
+def extract_text_with_ocr(pdf_content: Union[str, bytes], budget: OCRBudget = None,
+                          progress_callback=None) -> str:
     """
-    if not text.strip():
-        return 0.0
-    
-    # Fatores que indicam boa extração
-    total_chars = len(text)
-    alpha_chars = sum(1 for c in text if c.isalpha())
-    digit_chars = sum(1 for c in text if c.isdigit())
-    space_chars = sum(1 for c in text if c.isspace())
-    
-    # Penalizar caracteres estranhos
-    weird_chars = sum(1 for c in text if not (c.isalnum() or c.isspace() or c in '.,;:!?()[]{}"\'-+=/\n\r'))
-    
-    if total_chars == 0:
-        return 0.0
-    
-    # Calcular pontuação
-    alpha_ratio = alpha_chars / total_chars
-    digit_ratio = digit_chars / total_chars
-    space_ratio = space_chars / total_chars
-    weird_ratio = weird_chars / total_chars
-    
-    # Pontuação baseada em características de texto médico/laboratorial
-    confidence = (alpha_ratio * 0.4 + digit_ratio * 0.3 + space_ratio * 0.2) - (weird_ratio * 0.5)
-    
-    return max(0.0, min(1.0, confidence))
+    Extrai texto usando OCR avançado como fallback.
 
-def extract_text_with_ocr(pdf_content: Union[str, bytes]) -> str:
-    """
-    Extrai texto usando OCR avançado como fallback
+    Todas as páginas, resoluções e retentativas dividem o mesmo `budget`; ao
+    esgotá-lo, retorna o melhor texto obtido até então (budget.esgotado indica
+    resultado parcial).
     """
     if not OCR_AVAILABLE:
         logger.warning("⚠️ OCR não disponível")
@@ -644,6 +923,11 @@ def extract_text_with_ocr(pdf_content: Union[str, bytes]) -> str:
         for page_num in range(len(doc)):
             try:
                 page = doc.load_page(page_num)
+
+                if budget and budget.expired():
+                    logger.warning(f"⏱️ Página {page_num+1} em diante sem OCR (orçamento esgotado)")
+                    break
+                notify_progress(progress_callback, page_num + 1, len(doc), "ocr")
                 
                 # Tenta extrair texto primeiro com PyMuPDF
                 page_text = page.get_text()
@@ -654,26 +938,27 @@ def extract_text_with_ocr(pdf_content: Union[str, bytes]) -> str:
                     # OCR avançado como último recurso
                     logger.info(f"🔍 Página {page_num+1}: Aplicando OCR avançado...")
                     
+                    # Rotação e tipo de documento: uma sondagem por página
+                    probe = probe_page(page, budget)
+                    logger.debug(f"📋 Página {page_num+1}: tipo '{probe['tipo_documento']}', rotação {probe['rotacao']}°")
+
                     # Tentar múltiplas resoluções
                     resolutions = [2, 3, 4]  # 2x, 3x, 4x zoom
                     best_page_text = ""
                     
                     for resolution in resolutions:
+                        if budget and budget.expired():
+                            break
                         try:
-                            # Extrair imagem com resolução específica
-                            matrix = fitz.Matrix(resolution, resolution)
-                            pix = page.get_pixmap(matrix=matrix)
-                            img_data = pix.tobytes("ppm")
-                            img = Image.open(io.BytesIO(img_data))
-                            
-                            # Detectar e corrigir orientação
-                            img = detect_and_correct_orientation(img)
+                            # Extrair imagem em escala de cinza com resolução específica,
+                            # já na orientação detectada pela sondagem
+                            gray = rotate_page_image(render_page_gray(page, resolution), probe['rotacao'])
                             
                             # Pré-processar imagem
-                            processed_img = preprocess_image_for_ocr(img)
+                            processed_img = preprocess_image_for_ocr(gray)
                             
                             # Extrair texto com OCR avançado
-                            ocr_text = extract_text_with_advanced_ocr(processed_img, page_num)
+                            ocr_text = extract_text_with_advanced_ocr(processed_img, page_num, probe['tipo_documento'], budget)
                             
                             # Usar o melhor resultado
                             if len(ocr_text.strip()) > len(best_page_text.strip()):
@@ -0,0 +1,77 @@
+"""
+Representação intermediária tipada do pipeline: valores, achados e comparações.
+
+Entre as etapas (extract_lab_values → apply_rules → select_specialties →
+build_briefing, e comparar_referencias) os dados trafegavam como dicts
+recriados a cada etapa (deduplicação, nomes de exibição, comparação). Aqui
+são dataclasses com __slots__: sem o dict por instância, cada registro ocupa
+uma fração da memória de um dict com as mesmas chaves, o que pesa nos lotes
+(/interpret-batch, fila de jobs). tests/benchmark_registros.py mede os dois.
+
+Os registros também aceitam leitura por chave (registro["analito"],
+registro.get("descricao_achado")), para as funções que recebem tanto
+registros quanto dicts (entrada manual, testes, bulk_io). A conversão para
+dict acontece uma única vez, na fronteira da API (to_payload).
+"""
+from dataclasses import dataclass
+
+DIRETRIZ_REFERENCIA = "Valores de Referência Laboratoriais"
+
+
+class _Registro:
+    __slots__ = ()
+
+    def __getitem__(self, campo: str):
+        try:
+            return getattr(self, campo)
+        except AttributeError:
+            raise KeyError(campo) from None
+
+    def get(self, campo: str, padrao=None):
+        return getattr(self, campo, padrao)
+
+    def to_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+@dataclass
+class LabValue(_Registro):
+    """Valor extraído de um analito (ID do catálogo ou nome de exibição)."""
+    __slots__ = ("analito", "valor")
+    analito: str
+    valor: float
+
+
+@dataclass
+class Finding(_Registro):
+    """Achado anormal de apply_rules, já com severidade e especialidade."""
+    __slots__ = ("analito", "valor", "resultado", "severidade", "especialidade", "descricao_achado", "diretriz")
+    analito: str
+    valor: float
+    resultado: str
+    severidade: int
+    especialidade: str
+    descricao_achado: str
+    diretriz: str
+
+
+@dataclass
+class ReferenceComparison(_Registro):
+    """Classificação de um analito pela referência PNS e pela laboratorial."""
+    __slots__ = ("analito", "valor", "classificacao_pns", "classificacao_lab", "divergente")
+    analito: str
+    valor: float
+    classificacao_pns: str
+    classificacao_lab: str
+    divergente: bool
+
+
+def to_payload(obj):
+    """Resposta pronta para serialização: registros viram dicts, recursivamente em listas e dicts."""
+    if isinstance(obj, _Registro):
+        return obj.to_dict()
+    if isinstance(obj, dict):
+        return {chave: to_payload(valor) for chave, valor in obj.items()}
+    if isinstance(obj, list):
+        return [to_payload(valor) for valor in obj]
+    return obj
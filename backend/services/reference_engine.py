@@ -0,0 +1,251 @@
+import math
+import logging
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .analyte_catalog import analyte_key, normalize_key
+from .rule_engine import get_references
+from .reference_index import age_end, VERDADEIRO
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Leitura de Parquet em lotes (opcional)
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+CLASSES = ["baixo", "normal", "alto"]
+SEM_REFERENCIA = 3  # código para analito/sexo/idade sem intervalo
+SEXOS = ["F", "M"]
+IDADE_MAX = 150
+
+# Sinônimos aceitos na coluna de sexo da tabela de resultados
+SEXO_CODIGOS = {"f": 0, "feminino": 0, "m": 1, "masculino": 1}
+
+
+def _as_records(regras) -> List[dict]:
+    """Regras como lista de dicts no formato das linhas do CSV (aceita DataFrame)."""
+    if isinstance(regras, pd.DataFrame):
+        return regras.to_dict('records')
+    return list(regras)
+
+
+def _integer_ages(linha) -> range:
+    """Idades inteiras (anos completos) cobertas por uma regra, dentro da grade."""
+    inicio = max(0, math.ceil(float(linha['idade_min'])))
+    fim = min(IDADE_MAX + 1, math.ceil(age_end(float(linha['idade_max']))))
+    return range(inicio, fim)
+
+
+def _interpolates(linha) -> bool:
+    valor = linha.get('interpolar')
+    if isinstance(valor, str):
+        return valor.strip().lower() in VERDADEIRO
+    return bool(valor) and valor == valor  # NaN (coluna vazia no DataFrame) = não
+
+
+class ReferenceGrid:
+    """
+    Intervalos de uma tabela de referência expandidos numa grade densa
+    [analito, sexo, idade] → (inferior, superior), para classificar colunas
+    inteiras com indexação NumPy. Regras de sexo específico prevalecem sobre
+    'Todos'; combinações sem regra ficam NaN. `regra` guarda a posição da
+    regra aplicada (-1 sem regra), para buscar a especialidade. A grade tem
+    resolução de um ano: faixas pediátricas menores que isso valem pela idade
+    inteira que contêm, e regras interpoladas são avaliadas em cada idade.
+    """
+
+    def __init__(self, regras, analitos: List[str]):
+        self.regras = _as_records(regras)
+        self.analitos = analitos
+        self.especialidades = [str(r.get('especialidade') or "") for r in self.regras]
+        forma = (len(analitos), len(SEXOS), IDADE_MAX + 1)
+        self.inferior = np.full(forma, np.nan)
+        self.superior = np.full(forma, np.nan)
+        self.regra = np.full(forma, -1, dtype=np.int32)
+
+        posicao = {a: i for i, a in enumerate(analitos)}
+        # Faixa seguinte de cada regra (mesmo analito/sexo), para a interpolação
+        grupos = {}
+        for k, linha in enumerate(self.regras):
+            grupos.setdefault((analyte_key(linha['analito_id']), normalize_key(linha['sexo'])), []).append(k)
+        seguinte = {}
+        for ks in grupos.values():
+            ks.sort(key=lambda k: float(self.regras[k]['idade_min']))
+            seguinte.update(zip(ks, ks[1:]))
+
+        # 'Todos' primeiro, para ser sobrescrito pelas regras específicas
+        ordem = sorted(range(len(self.regras)), key=lambda k: normalize_key(self.regras[k]['sexo']) != 'todos')
+        for k in ordem:
+            linha = self.regras[k]
+            chave = analyte_key(linha['analito_id'])
+            sexo_norm = normalize_key(linha['sexo'])
+            if chave not in posicao:
+                continue
+            sexos = range(len(SEXOS)) if sexo_norm == 'todos' else [SEXO_CODIGOS.get(sexo_norm)]
+            idades = _integer_ages(linha)
+            if not idades:
+                continue
+            inferior, superior = float(linha['limite_inferior']), float(linha['limite_superior'])
+            if _interpolates(linha) and k in seguinte:
+                proxima = self.regras[seguinte[k]]
+                inicio, fim = float(linha['idade_min']), float(proxima['idade_min'])
+                t = np.clip((np.arange(idades.start, idades.stop) - inicio) / (fim - inicio), 0.0, 1.0)
+                inferior = inferior + t * (float(proxima['limite_inferior']) - inferior)
+                superior = superior + t * (float(proxima['limite_superior']) - superior)
+            faixa = slice(idades.start, idades.stop)
+            for s in sexos:
+                if s is None:
+                    continue
+                self.inferior[posicao[chave], s, faixa] = inferior
+                self.superior[posicao[chave], s, faixa] = superior
+                self.regra[posicao[chave], s, faixa] = k
+
+    def classify(self, analito: np.ndarray, sexo: np.ndarray, idade: np.ndarray,
+                 valor: np.ndarray) -> np.ndarray:
+        """Códigos por linha: 0 baixo, 1 normal, 2 alto, 3 sem referência."""
+        inf = self.inferior[analito, sexo, idade]
+        sup = self.superior[analito, sexo, idade]
+        codigos = np.where(valor < inf, 0, np.where(valor > sup, 2, 1)).astype(np.int8)
+        codigos[np.isnan(inf)] = SEM_REFERENCIA
+        return codigos
+
+
+def reference_grids(pns=None, lab=None):
+    """
+    Grades PNS e laboratorial sobre o mesmo eixo de analitos: (analitos, pns,
+    lab). Sem argumentos, usa o índice de referências do rule_engine.
+    """
+    referencias = get_references()
+    pns = _as_records(referencias.records("pns") if pns is None else pns)
+    lab = _as_records(referencias.records("lab") if lab is None else lab)
+    analitos = sorted({analyte_key(r['analito_id']) for r in pns + lab})
+    return analitos, ReferenceGrid(pns, analitos), ReferenceGrid(lab, analitos)
+
+
+def age_band_edges(*tabelas) -> np.ndarray:
+    """
+    Bordas das faixas etárias em que nenhuma referência muda de intervalo
+    (regras interpoladas mudam a cada ano).
+    """
+    bordas = {0, IDADE_MAX + 1}
+    for regras in tabelas:
+        for r in _as_records(regras):
+            idades = _integer_ages(r)
+            if _interpolates(r):
+                bordas.update(idades)
+            bordas.update((idades.start, idades.stop))
+    return np.array(sorted(b for b in bordas if 0 <= b <= IDADE_MAX + 1))
+
+
+def cohen_kappa_matrix(conf: np.ndarray) -> np.ndarray:
+    """Kappa de Cohen para uma pilha de matrizes de confusão (..., k, k)."""
+    conf = conf.astype(float)
+    n = conf.sum(axis=(-2, -1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        po = np.trace(conf, axis1=-2, axis2=-1) / n
+        pe = (conf.sum(axis=-1) * conf.sum(axis=-2)).sum(axis=-1) / (n * n)
+        kappa = np.where(pe < 1, (po - pe) / (1 - pe), 1.0)
+    return np.where(n > 0, kappa, np.nan)
+
+
+class PopulationComparison:
+    """
+    Compara, em lotes, a classificação PNS × referência laboratorial de uma
+    tabela de resultados (colunas analito, valor, sexo, idade). Só as
+    contagens por estrato (analito × sexo × faixa etária × classe PNS × classe
+    lab) ficam em memória, qualquer que seja o tamanho da tabela.
+    """
+
+    def __init__(self, pns=None, lab=None):
+        self.analitos, self.pns, self.lab = reference_grids(pns, lab)
+        self._posicao = {a: i for i, a in enumerate(self.analitos)}
+        self.bordas = age_band_edges(self.pns.regras, self.lab.regras)
+        self.contagens = np.zeros(
+            (len(self.analitos), len(SEXOS), len(self.bordas) - 1, 4, 4), dtype=np.int64
+        )
+        self.linhas = 0
+        self.descartadas = 0
+
+    def _codes(self, coluna: pd.Series, mapa) -> np.ndarray:
+        """Mapeia os valores distintos da coluna (não cada linha) para códigos inteiros."""
+        cat = pd.Categorical(coluna)
+        tabela = np.array([mapa(c) for c in cat.categories] + [-1], dtype=np.int64)
+        return tabela[cat.codes]  # código -1 (nulo) cai no -1 final
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Acumula as contagens de um lote de resultados."""
+        coluna_sexo = 'sexo' if 'sexo' in chunk.columns else 'genero'
+        analito = self._codes(chunk['analito'], lambda a: self._posicao.get(analyte_key(a), -1))
+        sexo = self._codes(chunk[coluna_sexo], lambda s: SEXO_CODIGOS.get(normalize_key(s).strip(), -1))
+        idade = pd.to_numeric(chunk['idade'], errors='coerce').to_numpy(dtype=float)
+        valor = pd.to_numeric(chunk['valor'], errors='coerce').to_numpy(dtype=float)
+
+        validas = (analito >= 0) & (sexo >= 0) & ~np.isnan(idade) & ~np.isnan(valor)
+        self.linhas += len(chunk)
+        self.descartadas += int((~validas).sum())
+        analito, sexo, valor = analito[validas], sexo[validas], valor[validas]
+        idade = np.clip(idade[validas], 0, IDADE_MAX).astype(np.int64)
+
+        faixa = np.searchsorted(self.bordas, idade, side='right') - 1
+        classe_pns = self.pns.classify(analito, sexo, idade, valor)
+        classe_lab = self.lab.classify(analito, sexo, idade, valor)
+
+        indice = np.ravel_multi_index((analito, sexo, faixa, classe_pns, classe_lab), self.contagens.shape)
+        self.contagens += np.bincount(indice, minlength=self.contagens.size).reshape(self.contagens.shape)
+
+    def summary(self) -> pd.DataFrame:
+        """Uma linha por estrato com resultados: discordância e kappa entre as referências."""
+        total = self.contagens.sum(axis=(-2, -1))
+        conf = self.contagens[..., :3, :3]
+        comparaveis = conf.sum(axis=(-2, -1))
+        concordantes = np.trace(conf, axis1=-2, axis2=-1)
+        kappa = cohen_kappa_matrix(conf)
+        pns_anormal = conf[..., [0, 2], :].sum(axis=(-2, -1))
+        lab_anormal = conf[..., :, [0, 2]].sum(axis=(-2, -1))
+
+        a, s, f = np.nonzero(total)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            taxa = 1 - concordantes[a, s, f] / comparaveis[a, s, f]
+        return pd.DataFrame({
+            "analito": np.array(self.analitos, dtype=object)[a],
+            "sexo": np.array(SEXOS)[s],
+            "faixa_etaria": [f"{self.bordas[i]}–{self.bordas[i + 1] - 1}" for i in f],
+            "n": total[a, s, f],
+            "n_sem_referencia": total[a, s, f] - comparaveis[a, s, f],
+            "pns_anormal": pns_anormal[a, s, f],
+            "lab_anormal": lab_anormal[a, s, f],
+            "taxa_discordancia": taxa,
+            "kappa": kappa[a, s, f],
+        })
+
+
+def iter_result_chunks(caminho: str, chunksize: int = 500_000,
+                       colunas: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Lê uma tabela de resultados (CSV ou Parquet) em lotes de até `chunksize` linhas."""
+    if caminho.lower().endswith((".parquet", ".pq")):
+        if not PYARROW_AVAILABLE:
+            raise Exception("Leitura de Parquet requer o pacote pyarrow")
+        arquivo = pq.ParquetFile(caminho)
+        if colunas:
+            colunas = [c for c in colunas if c in arquivo.schema_arrow.names]
+        for lote in arquivo.iter_batches(batch_size=chunksize, columns=colunas):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(caminho, chunksize=chunksize, usecols=lambda c: colunas is None or c in colunas)
+
+
+def compare_population(caminho: str, chunksize: int = 500_000,
+                       pns=None, lab=None) -> pd.DataFrame:
+    """Discordância e kappa PNS × laboratório por estrato de uma tabela de resultados."""
+    comparacao = PopulationComparison(pns, lab)
+    for chunk in iter_result_chunks(caminho, chunksize, ["analito", "valor", "sexo", "genero", "idade"]):
+        comparacao.add(chunk)
+    logger.info(f"📊 {comparacao.linhas} linha(s) comparada(s), {comparacao.descartadas} descartada(s)")
+    return comparacao.summary()
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Índice compilado das tabelas de referência (guideline_map.csv e
+lab_reference.csv).
+
+O passo de build grava em data/ um array estruturado NumPy (.npy, carregado
+com memory-map) com os limites de cada regra, já com analito, sexo e
+especialidade convertidos em códigos inteiros e ordenado por
+(tabela, analito, sexo, idade_min), mais um JSON com os textos internados e a
+versão (hash dos CSVs de origem). Se o artefato não existe ou está
+desatualizado em relação aos CSVs, o índice é montado direto dos CSVs.
+
+Idades em anos, com decimais para faixas pediátricas (ex.: 0.25 = 3 meses).
+idade_max inteiro conta anos completos (18–59 vale até 59 anos e 11 meses);
+idade_max fracionário é o limite exclusivo da faixa (0–0.5 e 0.5–1 não se
+sobrepõem). Com a coluna opcional `interpolar` (1/sim), os limites da regra
+valem na idade_min e variam linearmente até os da faixa seguinte do mesmo
+analito/sexo — curvas contínuas por idade descritas por pontos.
+
+Build:
+    python backend/services/reference_index.py
+"""
+import os
+import csv
+import json
+import bisect
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Import relativo como módulo ou absoluto na execução direta (build do índice)
+try:
+    from .analyte_catalog import normalize_key
+except ImportError:
+    from analyte_catalog import normalize_key
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+DATA_DIR = os.path.join(project_root, "data")
+
+# Tabelas indexadas: nome → arquivo em data/
+TABELAS = {
+    "pns": "guideline_map.csv",
+    "lab": "lab_reference.csv",
+}
+
+ARTEFATO = "reference_index.npy"
+METADADOS = "reference_index.json"
+FORMATO = 2
+
+# Códigos de sexo; TODOS vale para qualquer sexo quando não há regra específica
+SEXOS = ["F", "M", "Todos"]
+SEXO_F, SEXO_M, TODOS = 0, 1, 2
+
+# Idade usada quando não informada (0 anos e 0 meses): referência adulta
+IDADE_PADRAO = 30
+
+DTYPE = np.dtype([
+    ("tabela", "u1"),
+    ("analito", "u2"),
+    ("sexo", "u1"),
+    ("idade_min", "f8"),
+    ("idade_max", "f8"),
+    ("inferior", "f8"),
+    ("superior", "f8"),
+    ("especialidade", "i2"),  # -1 sem especialidade (lab_reference.csv)
+    ("interpolar", "u1"),
+])
+
+VERDADEIRO = ("1", "sim", "s", "true", "linear")
+
+
+def sex_code(sexo: str) -> Optional[int]:
+    """'M'/'masculino' → SEXO_M, 'F'/'feminino' → SEXO_F, 'Todos' → TODOS."""
+    chave = normalize_key(sexo).strip()
+    if chave in ("m", "masculino"):
+        return SEXO_M
+    if chave in ("f", "feminino"):
+        return SEXO_F
+    if chave == "todos":
+        return TODOS
+    return None
+
+
+def age_end(idade_max: float) -> float:
+    """Fim exclusivo da faixa: idade_max inteiro inclui o ano completo."""
+    return idade_max + 1 if float(idade_max).is_integer() else idade_max
+
+
+def source_hashes(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    """SHA-256 de cada CSV de origem (ausente = '')."""
+    hashes = {}
+    for arquivo in TABELAS.values():
+        caminho = os.path.join(data_dir, arquivo)
+        if os.path.exists(caminho):
+            with open(caminho, "rb") as f:
+                hashes[arquivo] = hashlib.sha256(f.read()).hexdigest()
+        else:
+            hashes[arquivo] = ""
+    return hashes
+
+
+def version_of(hashes: Dict[str, str]) -> str:
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def _read_csv(caminho: str) -> List[dict]:
+    """Linhas do CSV de referência, ignorando comentários (#)."""
+    with open(caminho, newline='', encoding='utf-8') as f:
+        linhas = (linha for linha in f if not linha.lstrip().startswith('#'))
+        return list(csv.DictReader(linhas))
+
+
+def compile_tables(data_dir: str = DATA_DIR) -> Tuple[np.ndarray, dict]:
+    """Compila os CSVs em (array estruturado ordenado, metadados)."""
+    analitos: Dict[str, int] = {}
+    nomes_analitos: List[str] = []
+    especialidades: Dict[str, int] = {}
+    linhas = []
+    for t, (tabela, arquivo) in enumerate(TABELAS.items()):
+        caminho = os.path.join(data_dir, arquivo)
+        if not os.path.exists(caminho):
+            logger.warning(f"⚠️ Arquivo de referência não encontrado: {caminho}")
+            continue
+        for row in _read_csv(caminho):
+            chave = normalize_key(row["analito_id"])
+            sexo = sex_code(row["sexo"])
+            if sexo is None:
+                logger.warning(f"⚠️ Sexo inválido em {arquivo}: {row['sexo']}")
+                continue
+            if chave not in analitos:
+                analitos[chave] = len(nomes_analitos)
+                nomes_analitos.append(row["analito_id"])
+            especialidade = row.get("especialidade")
+            if especialidade:
+                especialidade = especialidades.setdefault(especialidade, len(especialidades))
+            else:
+                especialidade = -1
+            interpolar = (row.get("interpolar") or "").strip().lower() in VERDADEIRO
+            linhas.append((t, analitos[chave], sexo, float(row["idade_min"]), float(row["idade_max"]),
+                           float(row["limite_inferior"]), float(row["limite_superior"]), especialidade,
+                           interpolar))
+
+    regras = np.array(linhas, dtype=DTYPE)
+    regras.sort(order=["tabela", "analito", "sexo", "idade_min"], kind="stable")
+    hashes = source_hashes(data_dir)
+    metadados = {
+        "formato": FORMATO,
+        "versao": version_of(hashes),
+        "fontes": hashes,
+        "tabelas": list(TABELAS),
+        "analitos": list(analitos),
+        "nomes_analitos": nomes_analitos,
+        "especialidades": list(especialidades),
+    }
+    return regras, metadados
+
+
+def build(data_dir: str = DATA_DIR) -> str:
+    """Grava o artefato compilado em data/; retorna a versão."""
+    regras, metadados = compile_tables(data_dir)
+    # Grava em arquivos temporários e renomeia: leitores nunca veem artefato parcial
+    caminho = os.path.join(data_dir, ARTEFATO)
+    with open(caminho + ".tmp", "wb") as f:
+        np.save(f, regras)
+    with open(os.path.join(data_dir, METADADOS + ".tmp"), "w", encoding="utf-8") as f:
+        json.dump(metadados, f, ensure_ascii=False, indent=1)
+    os.replace(caminho + ".tmp", caminho)
+    os.replace(os.path.join(data_dir, METADADOS + ".tmp"), os.path.join(data_dir, METADADOS))
+    logger.info(f"✅ Índice de referências compilado: {len(regras)} regra(s), versão {metadados['versao']}")
+    return metadados["versao"]
+
+
+class ReferenceIndex:
+    """
+    Regras de referência indexadas por (tabela, analito, sexo), com as faixas
+    etárias ordenadas: a busca por idade é uma bissecção sobre idade_min, de
+    custo logarítmico no número de faixas do analito.
+    """
+
+    def __init__(self, regras: np.ndarray, metadados: dict):
+        self.regras = regras
+        self.versao = metadados["versao"]
+        self.tabelas = {nome: i for i, nome in enumerate(metadados["tabelas"])}
+        self.analitos = {chave: i for i, chave in enumerate(metadados["analitos"])}
+        self.nomes_analitos = metadados["nomes_analitos"]
+        self.especialidades = metadados["especialidades"]
+
+        # Colunas como listas: consultas escalares sem overhead de escalares NumPy
+        self._idade_min = regras["idade_min"].tolist()
+        self._idade_fim = [age_end(m) for m in regras["idade_max"].tolist()]
+        self._inferior = regras["inferior"].tolist()
+        self._superior = regras["superior"].tolist()
+        self._especialidade = regras["especialidade"].tolist()
+        self._interpolar = regras["interpolar"].tolist()
+
+        # Intervalo [início, fim) de cada (tabela, analito, sexo) no array ordenado
+        chaves = list(zip(regras["tabela"].tolist(), regras["analito"].tolist(), regras["sexo"].tolist()))
+        self._faixas: Dict[tuple, Tuple[int, int]] = {}
+        for i, chave in enumerate(chaves):
+            inicio, _ = self._faixas.get(chave, (i, i))
+            self._faixas[chave] = (inicio, i + 1)
+        # Faixa seguinte do mesmo (tabela, analito, sexo), para a interpolação
+        self._seguinte = [-1] * len(chaves)
+        for inicio, fim in self._faixas.values():
+            for k in range(inicio, fim - 1):
+                self._seguinte[k] = k + 1
+
+    def has_table(self, tabela: str) -> bool:
+        t = self.tabelas.get(tabela)
+        return t is not None and any(chave[0] == t for chave in self._faixas)
+
+    def find(self, tabela: str, analito_key: str, sexo: Optional[int], idade: float) -> int:
+        """Posição da regra aplicável (sexo específico antes de 'Todos'), ou -1."""
+        t = self.tabelas.get(tabela)
+        a = self.analitos.get(analito_key)
+        if t is None or a is None:
+            return -1
+        for s in (sexo, TODOS):
+            if s is None:
+                continue
+            faixa = self._faixas.get((t, a, s))
+            if faixa is None:
+                continue
+            inicio, fim = faixa
+            k = bisect.bisect_right(self._idade_min, idade, inicio, fim) - 1
+            if k >= inicio and idade < self._idade_fim[k]:
+                return k
+        return -1
+
+    def interval(self, tabela: str, analito_key: str, sexo: Optional[int], idade: float):
+        """(limite_inferior, limite_superior) aplicável, ou None."""
+        k = self.find(tabela, analito_key, sexo, idade)
+        return self.bounds(k, idade) if k >= 0 else None
+
+    def bounds(self, k: int, idade: float = None) -> Tuple[float, float]:
+        """Limites da regra `k`; em regras interpoladas, os limites na `idade`."""
+        inferior, superior = self._inferior[k], self._superior[k]
+        j = self._seguinte[k]
+        if idade is None or not self._interpolar[k] or j < 0:
+            return inferior, superior
+        inicio, fim = self._idade_min[k], self._idade_min[j]
+        t = min(max((idade - inicio) / (fim - inicio), 0.0), 1.0)
+        return (inferior + t * (self._inferior[j] - inferior),
+                superior + t * (self._superior[j] - superior))
+
+    def specialty(self, k: int) -> str:
+        codigo = self._especialidade[k]
+        return self.especialidades[codigo] if codigo >= 0 else ""
+
+    def records(self, tabela: str) -> List[dict]:
+        """Regras de uma tabela no formato das linhas do CSV (para a grade vetorizada)."""
+        t = self.tabelas.get(tabela)
+        return [
+            {
+                "analito_id": self.nomes_analitos[r["analito"]],
+                "sexo": SEXOS[r["sexo"]],
+                "idade_min": float(r["idade_min"]),
+                "idade_max": float(r["idade_max"]),
+                "limite_inferior": float(r["inferior"]),
+                "limite_superior": float(r["superior"]),
+                "especialidade": self.specialty(k),
+                "interpolar": bool(r["interpolar"]),
+            }
+            for k, r in enumerate(self.regras)
+            if r["tabela"] == t
+        ]
+
+
+def load_reference_index(data_dir: str = DATA_DIR) -> ReferenceIndex:
+    """
+    Carrega o artefato compilado (memory-map) se ele corresponde aos CSVs
+    atuais; caso contrário, compila os CSVs em memória.
+    """
+    hashes = source_hashes(data_dir)
+    caminho_meta = os.path.join(data_dir, METADADOS)
+    try:
+        with open(caminho_meta, encoding="utf-8") as f:
+            metadados = json.load(f)
+        if metadados.get("formato") == FORMATO and metadados.get("fontes") == hashes:
+            regras = np.load(os.path.join(data_dir, ARTEFATO), mmap_mode="r")
+            logger.info(f"✅ Índice de referências carregado do artefato (versão {metadados['versao']})")
+            return ReferenceIndex(regras, metadados)
+        logger.warning("⚠️ Índice de referências desatualizado; compilando a partir dos CSVs")
+    except FileNotFoundError:
+        logger.info("ℹ️ Índice de referências não compilado; lendo os CSVs")
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao carregar índice de referências ({e}); lendo os CSVs")
+    return ReferenceIndex(*compile_tables(data_dir))
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,191 @@
+"""
+Execução dos padrões de extração com limite de tempo (proteção contra ReDoS).
+
+Os padrões de patterns.csv rodam com DOTALL sobre o texto inteiro do laudo;
+um texto de OCR patológico pode fazer um padrão com backtracking levar
+segundos. O motor é escolhido por REGEX_ENGINE (auto | regex | re2 | re):
+
+    - regex: mesma sintaxe e semântica do re, com `timeout` por busca;
+    - re2 (google-re2): autômato de tempo linear, sem backtracking. Padrões
+      com recursos que o RE2 não implementa (retrovisores, lookaround) ficam
+      no regex (ou no re). Em laudos comuns é ~4× mais lento que o re, pela
+      conversão do texto a cada busca, por isso não é o padrão;
+    - re: biblioteca padrão; a busca não é interrompível, então o limite por
+      padrão só é conferido ao fim dela (o padrão lento vai para as métricas)
+      e o orçamento do documento impede as buscas seguintes.
+
+`auto` usa o primeiro disponível nessa ordem. A sintaxe de referência é a do
+re: todo padrão é validado com ele antes de ir para outro motor.
+
+Limites (RegexBudget): PATTERN_TIMEOUT_MS por busca (padrão 100) e
+REGEX_BUDGET_MS por documento (padrão 1000). Buscas interrompidas, padrões
+lentos e orçamentos esgotados são contados em regex_metrics() (/metrics).
+"""
+import os
+import re
+import time
+import logging
+import threading
+from collections import Counter
+from typing import List, Optional
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Motor de tempo linear (opcional)
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Motor compatível com re e com timeout por busca (opcional)
+try:
+    import regex
+    REGEX_AVAILABLE = True
+except ImportError:
+    REGEX_AVAILABLE = False
+
+MOTORES = ("regex", "re2", "re")  # ordem do auto
+FLAGS = re.IGNORECASE | re.DOTALL
+
+
+class PatternTimeout(Exception):
+    """A busca de um padrão excedeu o limite de tempo e foi interrompida."""
+
+
+def _motores_disponiveis() -> List[str]:
+    disponivel = {"regex": REGEX_AVAILABLE, "re2": RE2_AVAILABLE, "re": True}
+    return [m for m in MOTORES if disponivel[m]]
+
+
+def preferred_engine() -> str:
+    """Motor configurado em REGEX_ENGINE (auto = regex > re2 > re), se disponível."""
+    escolhido = os.getenv('REGEX_ENGINE', 'auto').lower()
+    disponiveis = _motores_disponiveis()
+    if escolhido in disponiveis:
+        return escolhido
+    if escolhido not in ("auto", ""):
+        logger.warning(f"⚠️ Motor de regex '{escolhido}' indisponível; usando {disponiveis[0]}")
+    return disponiveis[0]
+
+
+class CompiledPattern:
+    """Padrão compilado num dos motores, com a mesma interface de busca."""
+
+    def __init__(self, pattern: str, motor: str = None):
+        self.pattern = pattern
+        re.compile(pattern, FLAGS)  # valida na sintaxe de referência (levanta re.error)
+        motor = motor or preferred_engine()
+        # Padrão que o motor escolhido não compila fica no regex ou no re
+        candidatos = [motor] + [m for m in ("regex", "re") if m != motor and m in _motores_disponiveis()]
+        for candidato in candidatos:
+            try:
+                self._regex = self._compilar(pattern, candidato)
+                self.motor = candidato
+                break
+            except Exception as e:
+                logger.info(f"ℹ️ Padrão não suportado pelo motor {candidato} ({e}); tentando o próximo")
+
+    @staticmethod
+    def _compilar(pattern: str, motor: str):
+        if motor == "re2":
+            return re2.compile("(?s)(?i)" + pattern)
+        if motor == "regex":
+            return regex.compile(pattern, regex.IGNORECASE | regex.DOTALL)
+        return re.compile(pattern, FLAGS)
+
+    def search(self, texto: str, timeout: Optional[float] = None):
+        """
+        Primeiro match no texto. `timeout` (s) interrompe a busca no motor
+        regex (PatternTimeout); nos demais motores é ignorado aqui.
+        """
+        if self.motor == "regex" and timeout is not None:
+            try:
+                return self._regex.search(texto, timeout=max(timeout, 1e-3))
+            except TimeoutError:
+                raise PatternTimeout(f"busca excedeu {timeout * 1000:.0f} ms")
+        return self._regex.search(texto)
+
+
+_metricas = {"buscas_interrompidas": 0, "padroes_lentos": 0, "orcamentos_esgotados": 0}
+_padroes_lentos = Counter()
+_metricas_lock = threading.Lock()
+
+
+class RegexBudget:
+    """
+    Limites de tempo da aplicação dos padrões a um documento: por busca e
+    para o documento inteiro. `incompleto` indica que algum padrão foi
+    interrompido ou deixou de ser avaliado.
+
+    O prazo do documento só começa a contar em start() (chamado por
+    apply_patterns), não na criação: o orçamento é criado antes da extração
+    do texto, e a tabela, o PyPDF2 e o OCR não podem consumi-lo.
+    """
+
+    def __init__(self, por_padrao: float = 0.1, documento: float = 1.0):
+        self.por_padrao = por_padrao
+        self.documento = documento
+        self.deadline: Optional[float] = None
+        self.esgotado = False
+        self.interrompidos: List[str] = []
+        self.lentos: List[str] = []
+
+    @classmethod
+    def from_env(cls) -> "RegexBudget":
+        return cls(float(os.getenv('PATTERN_TIMEOUT_MS', '100')) / 1000,
+                   float(os.getenv('REGEX_BUDGET_MS', '1000')) / 1000)
+
+    @property
+    def incompleto(self) -> bool:
+        return self.esgotado or bool(self.interrompidos)
+
+    def start(self) -> None:
+        """Inicia o prazo do documento; chamadas seguintes (ex.: fallback após o pacote do layout) não o reiniciam."""
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.documento
+
+    def timeout(self) -> float:
+        """Limite da próxima busca: o por padrão, sem passar do que resta do documento."""
+        self.start()
+        return max(0.0, min(self.por_padrao, self.deadline - time.monotonic()))
+
+    def expired(self) -> bool:
+        self.start()
+        if not self.esgotado and time.monotonic() >= self.deadline:
+            self.esgotado = True
+            logger.warning(f"⏱️ Orçamento de regex do documento ({self.documento * 1000:.0f} ms) "
+                           f"esgotado; padrões restantes não avaliados")
+            with _metricas_lock:
+                _metricas["orcamentos_esgotados"] += 1
+        return self.esgotado
+
+    def record(self, analito: str, segundos: float, interrompido: bool = False) -> None:
+        """Registra uma busca interrompida ou acima do limite por padrão."""
+        if interrompido:
+            self.interrompidos.append(analito)
+            logger.warning(f"⏱️ Padrão {analito} interrompido após {segundos * 1000:.0f} ms")
+        elif segundos > self.por_padrao:
+            self.lentos.append(analito)
+            logger.warning(f"🐢 Padrão {analito} levou {segundos * 1000:.0f} ms "
+                           f"(limite {self.por_padrao * 1000:.0f} ms)")
+        else:
+            return
+        with _metricas_lock:
+            _metricas["buscas_interrompidas" if interrompido else "padroes_lentos"] += 1
+            _padroes_lentos[analito] += 1
+
+
+def regex_metrics() -> dict:
+    """Motor em uso, limites e contadores de buscas interrompidas/lentas por padrão."""
+    orcamento = RegexBudget.from_env()
+    with _metricas_lock:
+        return {
+            "motor": preferred_engine(),
+            "timeout_padrao_ms": orcamento.por_padrao * 1000,
+            "orcamento_documento_ms": orcamento.documento * 1000,
+            **_metricas,
+            "padroes_problematicos": dict(_padroes_lentos.most_common(10)),
+        }
@@ -1,108 +1,24 @@
-import pandas as pd
 from typing import List, Dict
-import unicodedata
-
-# O DataFrame com as regras é carregado eficientemente uma única vez.
-try:
-    import os
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(os.path.dirname(current_dir))
-    guideline_path = os.path.join(project_root, "data", "guideline_map.csv")
-    df_regras = pd.read_csv(guideline_path, comment="#")
-except FileNotFoundError:
-    print("AVISO: Arquivo de regras 'guideline_map.csv' não encontrado.")
-    df_regras = pd.DataFrame()
-
-# Referência clássica/laboratorial (impressa no laudo do SUS), para comparação
-try:
-    lab_ref_path = os.path.join(project_root, "data", "lab_reference.csv")
-    df_lab_ref = pd.read_csv(lab_ref_path, comment="#")
-except FileNotFoundError:
-    print("AVISO: Arquivo 'lab_reference.csv' não encontrado.")
-    df_lab_ref = pd.DataFrame()
-
-
-def normalize_analito_name(analito_name: str) -> str:
-    """
-    Normaliza nomes de analitos para correspondência com guideline_map.csv
-    """
-    analito_lower = analito_name.lower()
-    
-    # Mapeamento de nomes alternativos para nomes padrão
-    mapping = {
-        'plaquetas_alt': 'plaquetas',
-        'plaquetas_alt2': 'plaquetas',
-        'plaquetas_ponto': 'plaquetas',
-        'plaquetas_ponto_alt': 'plaquetas',
-        'plaquetas_formato_exato': 'plaquetas',
-        'hemacias_alt': 'hemacias',
-        'leucocitos_novo': 'leucocitos',
-        'neutrofilos_novo': 'neutrofilos',
-        'eosinofilos_novo': 'eosinofilos',
-        'eosinofilos_formato_exato': 'eosinofilos',
-        'basofilos_novo': 'basofilos',
-        'linfocitos_novo': 'linfocitos',
-        'monocitos_novo': 'monocitos',
-        'neutrofilos_hemograma': 'neutrofilos',
-        'eosinofilos_hemograma': 'eosinofilos',
-        'eosinofilos_hemograma_alt': 'eosinofilos',
-        'basofilos_hemograma': 'basofilos',
-        'linfocitos_hemograma': 'linfocitos',
-        'monocitos_hemograma': 'monocitos',
-        'leucocitos_hemograma': 'leucocitos',
-        'leucocitos_sus': 'leucocitos',
-        'neutrofilos_sus': 'neutrofilos',
-        'eosinofilos_sus': 'eosinofilos',
-        'basofilos_sus': 'basofilos',
-        'linfocitos_sus': 'linfocitos',
-        'monocitos_sus': 'monocitos'
-    }
-    
-    return mapping.get(analito_lower, analito_lower)
-
-
-def get_display_name(analito_id: str) -> str:
-    """Mapeia IDs técnicos de analitos para nomes amigáveis com acento e capitalização."""
-    base = normalize_analito_name(analito_id)
-    display_map = {
-        'leucocitos': 'Leucócitos',
-        'hemacias': 'Hemácias',
-        'hemoglobina': 'Hemoglobina',
-        'hematocrito': 'Hematócrito',
-        'plaquetas': 'Plaquetas',
-        'neutrofilos': 'Neutrófilos',
-        'linfocitos': 'Linfócitos',
-        'monocitos': 'Monócitos',
-        'eosinofilos': 'Eosinófilos',
-        'basofilos': 'Basófilos',
-        'vcm': 'VCM',
-        'hcm': 'HCM',
-        'chcm': 'CHCM',
-        'rdw': 'RDW'
-    }
-    return display_map.get(base, base.capitalize())
-
-def _normalize_text(s: str) -> str:
-    if not isinstance(s, str):
-        s = str(s)
-    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn').lower()
-
-
-def _get_interval(df, analito_norm_key: str, sexo_paciente: str, idade: int):
-    """Retorna (limite_inferior, limite_superior) de um analito num DataFrame de referência."""
-    if df.empty:
-        return None
-    aplicaveis = df[
-        (df['analito_id'].apply(_normalize_text) == analito_norm_key)
-        & (df['idade_min'] <= idade)
-        & (df['idade_max'] >= idade)
-        & (df['sexo'].apply(_normalize_text).isin([_normalize_text(sexo_paciente), 'todos']))
-    ]
-    if aplicaveis.empty:
-        return None
-    # Prioriza regra específica do sexo sobre 'Todos'
-    linha = aplicaveis.sort_values(by='sexo', ascending=False).iloc[0]
-    return float(linha['limite_inferior']), float(linha['limite_superior'])
+
+from .analyte_catalog import analyte_key, display_name as get_display_name
+from .records import DIRETRIZ_REFERENCIA, Finding, ReferenceComparison
+from .reference_index import load_reference_index, sex_code
+from .severity import severity_scores
+
+# Regras PNS (guideline_map.csv) e referência clássica/laboratorial impressa no
+# laudo do SUS (lab_reference.csv), compiladas uma única vez num índice
+REFERENCIAS = load_reference_index()
+
+
+def get_references():
+    """Índice de referências em uso."""
+    return REFERENCIAS
+
+
+def set_references(referencias) -> None:
+    """Troca o índice em uso (recarga a quente); quem já o obteve segue com o anterior."""
+    global REFERENCIAS
+    REFERENCIAS = referencias
 
 
 def _classificar(valor: float, intervalo) -> str:
@@ -116,22 +32,24 @@ def _classificar(valor: float, intervalo) -> str:
     return "normal"
 
 
-def comparar_referencias(lab_values: List[Dict], genero: str, idade: int) -> List[Dict]:
+def comparar_referencias(lab_values: List[Dict], genero: str, idade: int,
+                         referencias=None) -> List[ReferenceComparison]:
     """
     Classifica cada analito segundo a referência da PNS (população brasileira)
     e a referência clássica/laboratorial, sinalizando divergências.
+    `referencias` fixa a versão do índice (padrão: o índice em uso).
     """
-    sexo_map = {'masculino': 'M', 'feminino': 'F'}
-    sexo_paciente = sexo_map.get(genero.lower(), 'Todos')
+    referencias = referencias or REFERENCIAS
+    sexo_paciente = sex_code(genero)
 
     comparacoes = []
     for valor_exame in lab_values:
         analito_id = valor_exame["analito"]
         valor = valor_exame["valor"]
-        chave = _normalize_text(normalize_analito_name(analito_id))
+        chave = analyte_key(analito_id)
 
-        intervalo_pns = _get_interval(df_regras, chave, sexo_paciente, idade)
-        intervalo_lab = _get_interval(df_lab_ref, chave, sexo_paciente, idade)
+        intervalo_pns = referencias.interval("pns", chave, sexo_paciente, idade)
+        intervalo_lab = referencias.interval("lab", chave, sexo_paciente, idade)
 
         classif_pns = _classificar(valor, intervalo_pns)
         classif_lab = _classificar(valor, intervalo_lab)
@@ -146,73 +64,59 @@ def comparar_referencias(lab_values: List[Dict], genero: str, idade: int) -> Lis
             and classif_pns != classif_lab
         )
 
-        comparacoes.append({
-            "analito": get_display_name(analito_id),
-            "valor": valor,
-            "classificacao_pns": classif_pns,
-            "classificacao_lab": classif_lab,
-            "divergente": divergente,
-        })
+        comparacoes.append(ReferenceComparison(get_display_name(analito_id), valor,
+                                               classif_pns, classif_lab, divergente))
 
     return comparacoes
 
 
-def apply_rules(lab_values: List[Dict], genero: str, idade: int) -> List[Dict]:
+def apply_rules(lab_values: List[Dict], genero: str, idade: int, referencias=None) -> List[Finding]:
     """
     O coração do sistema. Compara os valores do exame com as diretrizes
     e retorna uma lista de achados anormais já enriquecidos.
+    `referencias` fixa a versão do índice (padrão: o índice em uso).
     """
-    if df_regras.empty:
+    referencias = referencias or REFERENCIAS
+    if not referencias.has_table("pns"):
         return []
 
-    resultados_analisados = []
-    sexo_map = {'masculino': 'M', 'feminino': 'F'}
-    sexo_paciente = sexo_map.get(genero.lower(), 'Todos')
+    anormais = []
+    limites = []
+    sexo_paciente = sex_code(genero)
 
     for valor_exame in lab_values:
         analito_id = valor_exame["analito"]
         valor_paciente = valor_exame["valor"]
-        
-        # Normalizar nome do analito para correspondência
-        analito_normalizado = normalize_analito_name(analito_id)
-
-        # 1. Filtra as regras para o analito, idade e sexo corretos (comparação case-insensitive)
-        def normalize_text(s: str) -> str:
-            if not isinstance(s, str):
-                s = str(s)
-            return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn').lower()
-
-        analito_norm_key = normalize_text(analito_normalizado)
-        regras_aplicaveis = df_regras[
-            (df_regras['analito_id'].apply(normalize_text) == analito_norm_key) &
-            (df_regras['idade_min'] <= idade) &
-            (df_regras['idade_max'] >= idade) &
-            (df_regras['sexo'].isin([sexo_paciente, 'Todos']))
-            ]
-
-        if regras_aplicaveis.empty:
-            continue
 
-        regra = regras_aplicaveis.sort_values(by='sexo', ascending=False).iloc[0]
+        # 1. Busca a regra para o analito, idade e sexo corretos (chave do catálogo de analitos)
+        regra = referencias.find("pns", analyte_key(analito_id), sexo_paciente, idade)
+        if regra < 0:
+            continue
+        limite_inferior, limite_superior = referencias.bounds(regra, idade)
 
         # 2. Aplica a regra de forma segura
         resultado_final = "normal"
-        if valor_paciente < regra['limite_inferior']:
+        if valor_paciente < limite_inferior:
             resultado_final = "baixo"
-        elif valor_paciente > regra['limite_superior']:
+        elif valor_paciente > limite_superior:
             resultado_final = "alto"
 
-        # 3. Adiciona à lista de achados apenas se for anormal
+        # 3. Guarda apenas os anormais; o achado é montado depois da severidade
         if resultado_final != "normal":
-            display = get_display_name(analito_id)
-            resultados_analisados.append({
-                "analito": display,
-                "valor": valor_paciente,
-                "resultado": resultado_final,
-                "severidade": 1,  # Valor fixo simplificado
-                "especialidade": regra['especialidade'],
-                "descricao_achado": f"{display} {resultado_final}",
-                "diretriz": "Valores de Referência Laboratoriais"
-            })
-
-    return resultados_analisados
\ No newline at end of file
+            anormais.append((analito_id, valor_paciente, resultado_final, regra))
+            limites.append((valor_paciente, limite_inferior, limite_superior))
+
+    if not anormais:
+        return []
+
+    # Severidade pela distância do valor aos limites (escore z na referência), para todos de uma vez
+    valores, inferiores, superiores = zip(*limites)
+    resultados_analisados = []
+    for (analito_id, valor_paciente, resultado_final, regra), severidade in zip(
+            anormais, severity_scores(valores, inferiores, superiores)):
+        display = get_display_name(analito_id)
+        resultados_analisados.append(Finding(display, valor_paciente, resultado_final, int(severidade),
+                                             referencias.specialty(regra), f"{display} {resultado_final}",
+                                             DIRETRIZ_REFERENCIA))
+
+    return resultados_analisados
@@ -0,0 +1,46 @@
+"""
+Severidade dos achados (1–5) a partir da distância do valor aos limites da
+referência.
+
+O intervalo de referência é tratado como os 95% centrais da distribuição da
+população (percentis 2,5–97,5, como nas faixas da PNS): média no centro do
+intervalo e desvio-padrão = largura / (2 × 1,96). Para analitos com limite
+inferior positivo a distribuição é assimétrica (contagens, concentrações) e o
+escore z é calculado na escala logarítmica. A severidade sai de limiares
+graduados sobre |z|: logo fora do intervalo (|z| ≈ 1,96) é 1; a partir de
+|z| = 3, 4, 5 e 6 sobe um grau por limiar.
+
+Tudo opera sobre arrays NumPy: um exame (apply_rules) ou milhares de valores
+(bulk_io) passam pela mesma função.
+"""
+import numpy as np
+
+Z_INTERVALO = 1.959964  # meia-largura do intervalo central de 95%, em desvios-padrão
+LIMIARES_Z = np.array([3.0, 4.0, 5.0, 6.0])
+SEVERIDADE_MAX = len(LIMIARES_Z) + 1
+
+
+def z_scores(valor, inferior, superior) -> np.ndarray:
+    """Escore z do valor na distribuição de referência (log quando inferior > 0)."""
+    valor = np.asarray(valor, dtype=float)
+    inferior = np.asarray(inferior, dtype=float)
+    superior = np.asarray(superior, dtype=float)
+    log = (inferior > 0) & (valor > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        v = np.where(log, np.log(np.where(log, valor, 1.0)), valor)
+        inf = np.where(log, np.log(np.where(log, inferior, 1.0)), inferior)
+        sup = np.where(log, np.log(np.where(log, superior, 1.0)), superior)
+        desvio = (sup - inf) / (2 * Z_INTERVALO)
+        z = (v - (inf + sup) / 2) / desvio
+        # Intervalo degenerado (largura 0): qualquer valor fora dele é extremo
+        return np.where(desvio > 0, z, np.sign(v - inf) * np.inf)
+
+
+def severity_scores(valor, inferior, superior) -> np.ndarray:
+    """Severidade 1–5 de cada valor fora do intervalo de referência."""
+    valor = np.asarray(valor, dtype=float)
+    inferior = np.asarray(inferior, dtype=float)
+    z = np.abs(z_scores(valor, inferior, superior))
+    # Valor ≤ 0 com limite inferior positivo: ausência total, grau máximo
+    z = np.where((inferior > 0) & (valor <= 0), np.inf, z)
+    return (1 + np.searchsorted(LIMIARES_Z, z, side='right')).astype(np.int8)
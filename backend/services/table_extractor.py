@@ -0,0 +1,264 @@
+"""
+Extração por coordenadas das tabelas de resultado do laudo.
+
+PDFs com camada de texto trazem a posição de cada palavra. Em vez de achatar
+a página em texto e procurar cada valor com os padrões de patterns.csv, as
+linhas da tabela são remontadas pelas coordenadas: palavras com o mesmo
+centro vertical formam uma linha, e o cabeçalho da tabela ("RESULTADO",
+"UNIDADE", "INTERVALO/VALORES DE REFERÊNCIA") define as colunas. Cada linha
+vira rótulo, resultado, unidade e referência; o rótulo identifica o analito
+(ROTULOS) e o valor é lido da célula de resultado — o intervalo de
+referência na mesma linha nunca é confundido com ele.
+
+As palavras vêm do PyMuPDF (page.get_text("words")) ou, sem ele, do
+pdfplumber. Uma página sem cabeçalho herda as colunas da anterior (tabela
+que continua). Valores e unidades passam pela mesma leitura de números e
+conversão de unidades da extração por regex (units.py).
+TABLE_EXTRACTION=0 desativa este caminho.
+"""
+import io
+import os
+import re
+import logging
+import unicodedata
+from typing import List, Optional, Tuple, Union
+
+from .records import LabValue
+from .units import normalize_units, parse_lab_number, unit_after
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Palavras com coordenadas (opcional; preferido pela velocidade)
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+# Alternativa às palavras do PyMuPDF (opcional)
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+# Rótulo da linha (sem acentos, pontuação e parênteses) → analito normalizado
+ROTULOS = {
+    "eritrocitos": "hemacias",
+    "hemacias": "hemacias",
+    "hemoglobina": "hemoglobina",
+    "hematocrito": "hematocrito",
+    "vcm": "vcm",
+    "volume corpuscular medio": "vcm",
+    "hcm": "hcm",
+    "hemoglobina corpuscular media": "hcm",
+    "chcm": "chcm",
+    "concentracao de hemoglobina corpuscular media": "chcm",
+    "rdw": "rdw",
+    "leucocitos": "leucocitos",
+    "leucocitos totais": "leucocitos",
+    "neutrofilos": "neutrofilos",
+    "segmentados": "segmentados",
+    "bastonetes": "bastonetes",
+    "mielocitos": "mielocitos",
+    "metamielocitos": "metamielocitos",
+    "eosinofilos": "eosinofilos",
+    "basofilos": "basofilos",
+    "linfocitos": "linfocitos",
+    "linfocitos tipicos": "linfocitos",
+    "monocitos": "monocitos",
+    "plaquetas": "plaquetas",
+    "contagem de plaquetas": "plaquetas",
+}
+# Palavras do cabeçalho de cada coluna (normalizadas)
+CABECALHO_RESULTADO = {"resultado", "resultados"}
+CABECALHO_UNIDADE = {"unidade", "unidades"}
+CABECALHO_REFERENCIA = {"referencia", "referencias"}
+# Fração da altura da linha: tolerância vertical ao agrupar palavras e recuo das colunas
+TOLERANCIA_LINHA = 0.5
+RECUO_COLUNA = 0.5
+NUMERO_RE = re.compile(r"[0-9]+(?:[.,][0-9]+)*")
+# Menção a um analito em qualquer ponto da página (rótulos mais longos primeiro)
+MENCAO_RE = re.compile(r"\b(?:" + "|".join(re.escape(r) for r in sorted(ROTULOS, key=len, reverse=True)) + r")\b")
+
+
+def table_extraction_enabled() -> bool:
+    return os.getenv('TABLE_EXTRACTION', '1').lower() not in ('0', 'false', 'no')
+
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r"\(.*?\)", " ", texto)
+    texto = re.sub(r"[.:*]", "", texto)
+    return " ".join(texto.split())
+
+
+def page_words(pdf_content: Union[str, bytes]) -> Optional[List[List[tuple]]]:
+    """
+    Palavras de cada página como (x0, y0, x1, y1, texto), com y crescendo
+    para baixo. None se nenhuma biblioteca de coordenadas estiver instalada.
+    """
+    if PYMUPDF_AVAILABLE:
+        if isinstance(pdf_content, bytes):
+            doc = fitz.open(stream=pdf_content, filetype="pdf")
+        else:
+            doc = fitz.open(pdf_content)
+        try:
+            return [[tuple(w[:5]) for w in page.get_text("words")] for page in doc]
+        finally:
+            doc.close()
+    if PDFPLUMBER_AVAILABLE:
+        fonte = io.BytesIO(pdf_content) if isinstance(pdf_content, bytes) else pdf_content
+        with pdfplumber.open(fonte) as pdf:
+            return [[(w["x0"], w["top"], w["x1"], w["bottom"], w["text"]) for w in page.extract_words()]
+                    for page in pdf.pages]
+    return None
+
+
+def group_rows(palavras: List[tuple]) -> List[List[tuple]]:
+    """Linhas da página: palavras com o mesmo centro vertical, ordenadas da esquerda para a direita."""
+    linhas = []
+    for palavra in sorted(palavras, key=lambda w: (w[1] + w[3]) / 2):
+        centro = (palavra[1] + palavra[3]) / 2
+        if linhas:
+            ultima = linhas[-1]
+            altura = ultima[0][3] - ultima[0][1]
+            if abs(centro - (ultima[0][1] + ultima[0][3]) / 2) <= altura * TOLERANCIA_LINHA:
+                ultima.append(palavra)
+                continue
+        linhas.append([palavra])
+    return [sorted(linha, key=lambda w: w[0]) for linha in linhas]
+
+
+def detect_columns(linha: List[tuple]) -> Optional[List[tuple]]:
+    """
+    Colunas definidas por uma linha de cabeçalho: [(x inicial, coluna)] em
+    ordem, ou None se a linha não for cabeçalho (exige RESULTADO).
+    """
+    normalizadas = [_normalizar(w[4]) for w in linha]
+    if not CABECALHO_RESULTADO & set(normalizadas):
+        return None
+    colunas = []
+    for i, (palavra, nome) in enumerate(zip(linha, normalizadas)):
+        recuo = (palavra[3] - palavra[1]) * RECUO_COLUNA
+        if nome in CABECALHO_RESULTADO:
+            colunas.append((palavra[0] - recuo, "resultado"))
+        elif nome in CABECALHO_UNIDADE:
+            colunas.append((palavra[0] - recuo, "unidade"))
+        elif nome in CABECALHO_REFERENCIA:
+            # "INTERVALO DE REFERÊNCIA", "VALORES DE REFERÊNCIA": a coluna começa na primeira palavra do título
+            inicio = i
+            while inicio > 0 and normalizadas[inicio - 1] not in CABECALHO_RESULTADO | CABECALHO_UNIDADE \
+                    and linha[inicio][0] - linha[inicio - 1][2] < (palavra[3] - palavra[1]):
+                inicio -= 1
+            colunas.append((linha[inicio][0] - recuo, "referencia"))
+    return sorted(colunas)
+
+
+def split_cells(linha: List[tuple], colunas: List[tuple]) -> dict:
+    """Texto de cada coluna da linha; palavras à esquerda da primeira coluna formam o rótulo."""
+    celulas = {"rotulo": [], **{nome: [] for _, nome in colunas}}
+    for palavra in linha:
+        centro = (palavra[0] + palavra[2]) / 2
+        coluna = "rotulo"
+        for inicio, nome in colunas:
+            if centro >= inicio:
+                coluna = nome
+        celulas[coluna].append(palavra[4])
+    return {nome: " ".join(textos) for nome, textos in celulas.items()}
+
+
+def read_result(celula: str, analito: str) -> Optional[tuple]:
+    """
+    (valor, unidade) da célula de resultado. Em "50,9 % 3.548 /μL" vale o
+    absoluto após o percentual, como nos padrões do diferencial.
+    """
+    numeros = list(NUMERO_RE.finditer(celula))
+    if not numeros:
+        return None
+    escolhido = numeros[0]
+    unidade = unit_after(celula, escolhido.end())
+    if unidade == "pct" and len(numeros) > 1:
+        seguinte = numeros[1]
+        absoluto = unit_after(celula, seguinte.end())
+        if absoluto != "pct":
+            escolhido, unidade = seguinte, absoluto
+    try:
+        return parse_lab_number(escolhido.group(), analito), unidade
+    except ValueError:
+        return None
+
+
+def read_table_rows(pdf_content: Union[str, bytes]) -> Tuple[List[dict], set]:
+    """
+    Linhas de resultado reconhecidas (analito, rótulo, resultado, unidade e
+    referência como no laudo) e os analitos mencionados em qualquer ponto
+    do documento, dentro ou fora das tabelas.
+    """
+    paginas = page_words(pdf_content)
+    if paginas is None:
+        logger.warning("⚠️ Extração por tabela indisponível: instale PyMuPDF ou pdfplumber")
+        return [], set()
+
+    linhas_resultado = []
+    mencionados = set()
+    colunas = None
+    for palavras in paginas:
+        texto = _normalizar(" ".join(w[4] for w in palavras))
+        mencionados.update(ROTULOS[m] for m in MENCAO_RE.findall(texto))
+        for linha in group_rows(palavras):
+            cabecalho = detect_columns(linha)
+            if cabecalho is not None:
+                colunas = cabecalho
+                continue
+            if colunas is None:
+                continue
+            celulas = split_cells(linha, colunas)
+            analito = ROTULOS.get(_normalizar(celulas["rotulo"]))
+            if analito is None or not celulas.get("resultado"):
+                continue
+            linhas_resultado.append({
+                "analito": analito,
+                "rotulo": celulas["rotulo"],
+                "resultado": celulas["resultado"],
+                "unidade": celulas.get("unidade", ""),
+                "referencia": celulas.get("referencia", ""),
+            })
+    return linhas_resultado, mencionados
+
+
+def extract_table_values(pdf_content: Union[str, bytes]) -> Tuple[List[LabValue], List[str]]:
+    """
+    Valores das tabelas de resultado do PDF (camada de texto), já nas
+    unidades de referência, e os analitos pendentes: mencionados no
+    documento, mas não lidos de uma tabela (ficam para os padrões). Sem
+    tabela reconhecível (ex.: PDF escaneado), a lista de valores é vazia.
+    """
+    try:
+        linhas, mencionados = read_table_rows(pdf_content)
+    except Exception as e:
+        logger.warning(f"⚠️ Erro na extração por tabela: {e}")
+        return [], []
+
+    analitos, valores, unidades = [], [], []
+    for linha in linhas:
+        if linha["analito"] in analitos:
+            continue  # primeira linha do analito, como na extração por regex
+        lido = read_result(f"{linha['resultado']} {linha['unidade']}".strip(), linha["analito"])
+        if lido is None:
+            logger.debug(f"❌ Tabela: sem valor numérico para {linha['rotulo']}: '{linha['resultado']}'")
+            continue
+        analitos.append(linha["analito"])
+        valores.append(lido[0])
+        unidades.append(lido[1])
+
+    resultados = []
+    if analitos:
+        indices, convertidos = normalize_units(analitos, valores, unidades)
+        resultados = [LabValue(analitos[i], valor) for i, valor in zip(indices, convertidos.tolist())]
+        logger.info(f"📊 Tabela: {len(resultados)} valores extraídos por coordenadas")
+    pendentes = sorted(mencionados - {r.analito for r in resultados})
+    return resultados, pendentes
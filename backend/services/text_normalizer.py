@@ -0,0 +1,107 @@
+"""
+Normalização do texto extraído do laudo numa única passada.
+
+O texto do PyPDF2 e, principalmente, o do OCR chega com caracteres
+invisíveis, espaços repetidos e termos fragmentados ("E o s i n ó f i l o s",
+"5 , 0 %", "μ L", "mm 3"). Antes, cada correção era um re.sub sobre o texto
+inteiro (mais de 15 passadas); aqui são:
+
+    1. NFKC (acentos compostos, "µ" → "μ", "³" → "3");
+    2. os caracteres invisíveis (zero-width, NBSP) viram espaço, só se
+       presentes (str.replace; str.translate com destino não ASCII é bem
+       mais lento no CPython);
+    3. uma única regex com uma alternativa por correção, despachada pelo
+       nome do grupo (_despachar).
+
+A saída é idêntica à da sequência antiga (sanitize_unicode_text seguida de
+normalize_fragmented_terms), em que cada passada via o resultado da
+anterior. Por isso algumas alternativas usam lookahead em vez de consumir o
+texto: "μ l e u c ó c i t o s" virava "μ Leucócitos" e só então "μLeucócitos",
+então a alternativa do μ só remove os espaços e deixa o rótulo para a
+alternativa dele. Os trechos numéricos com espaços ("5 , 0 %", "7 . 010",
+"3 5") são corrigidos dentro do próprio trecho com as regras em sequência,
+como antes. Só trechos que mudam chegam ao callback: números sem espaço
+depois de um dígito, "μL" e "mm3" já juntos não casam com nenhuma alternativa.
+tests/test_text_normalizer.py compara as duas implementações e
+tests/benchmark_normalizacao.py mede ambas em saídas de OCR grandes.
+"""
+import re
+import unicodedata
+
+# Caracteres invisíveis que viram espaço (NBSP já vira espaço no NFKC)
+INVISIVEIS = ("\u200B", "\u200C", "\u200D", "\u2060", "\u00A0")
+
+# Termos médicos com letras separadas por espaços → forma canônica
+ROTULOS_FRAGMENTADOS = [
+    (r"E\s*o\s*s\s*i\s*n\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Eosinófilos"),
+    (r"N\s*e\s*u\s*t\s*r\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Neutrófilos"),
+    (r"L\s*i\s*n\s*f\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Linfócitos"),
+    (r"M\s*o\s*n\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Monócitos"),
+    (r"B\s*a\s*s\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Basófilos"),
+    (r"H\s*e\s*m\s*[áa]\s*c\s*i\s*a\s*s", "Hemácias"),
+    (r"L\s*e\s*u\s*c\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Leucócitos"),
+    (r"P\s*l\s*a\s*q\s*u\s*e\s*t\s*a\s*s", "Plaquetas"),
+]
+# "L" maiúsculo depois de μ, já escrito ou produzido pela forma canônica de um rótulo
+_L_DEPOIS_DE_MU = "(?:L|(?i:" + "|".join(p for p, rep in ROTULOS_FRAGMENTADOS if rep.startswith("L")) + "))"
+
+_INICIAIS_ROTULOS = "".join(sorted({c for padrao, _ in ROTULOS_FRAGMENTADOS for c in (padrao[0], padrao[0].lower())}))
+
+# Cada alternativa começa pelo seu primeiro caractere fora do grupo: o re descarta a
+# alternativa olhando só esse caractere, sem entrar nela (o que pesa em cada posição do texto)
+NORMALIZADOR_RE = re.compile("|".join([
+    # Trecho numérico com espaço entre dígitos/separadores (até o % que o fecha): regras em sequência
+    r"\d(?P<numero>[\d,.]*\s+[\d,.][\d\s,.]*%?)",
+    # '5 %' isolado: só a última regra numérica se aplica
+    r"\s(?<=\d\s)(?P<porcento>\s*)(?=%)",
+    r"\s(?P<espacos>\s+)",
+    f"[{_INICIAIS_ROTULOS}](?:" + "|".join(
+        f"(?<=[{padrao[0]}{padrao[0].lower()}])(?P<rotulo{i}>(?i:{padrao[1:]}))"
+        for i, (padrao, _) in enumerate(ROTULOS_FRAGMENTADOS)) + ")",
+    r"m(?P<mm3>m\s+(?=3))",
+    rf"/(?P<barra_mu>\s+(?=μ\s*{_L_DEPOIS_DE_MU}))",
+    rf"μ(?P<mu>\s+(?={_L_DEPOIS_DE_MU}))",
+]))
+
+# Regras dos trechos numéricos, na ordem em que eram aplicadas ao texto inteiro, com o
+# caractere sem o qual a regra não casa (None: sempre aplicada)
+REGRAS_NUMERICAS = [
+    (",", re.compile(r"(\d)\s*,\s*(\d)"), r"\1,\2"),      # '5 , 0' → '5,0'
+    (".", re.compile(r"(\d)\s*\.\s*(\d{3})"), r"\1.\2"),  # '7 . 010' → '7.010'
+    (None, re.compile(r"(\d)\s+([\d]{1,3})(?=[^\d])"), r"\1\2"),  # '3 5' → '35'
+    ("%", re.compile(r"(\d)\s*%"), r"\1%"),
+]
+_ESPACOS_RE = re.compile(r"\s{2,}")
+_SUBSTITUICOES = {f"rotulo{i}": rep for i, (_, rep) in enumerate(ROTULOS_FRAGMENTADOS)}
+_SUBSTITUICOES.update({"porcento": "", "espacos": " ", "mm3": "mm", "barra_mu": "/", "mu": "μ"})
+
+
+def _normalizar_numero(trecho: str, continua: bool) -> str:
+    # Sentinela: o lookahead '(?=[^\d])' falha no fim do texto, mas não antes de um caractere não numérico
+    trecho = _ESPACOS_RE.sub(" ", trecho) + ("\0" if continua else "")
+    for necessario, regex, substituto in REGRAS_NUMERICAS:
+        if necessario is None or necessario in trecho:
+            trecho = regex.sub(substituto, trecho)
+    return trecho[:-1] if continua else trecho
+
+
+def _despachar(match: re.Match) -> str:
+    grupo = match.lastgroup
+    if grupo == "numero":
+        return _normalizar_numero(match.group(), match.end() < len(match.string))
+    return _SUBSTITUICOES[grupo]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza o texto extraído: NFKC, invisíveis → espaço, espaços repetidos
+    colapsados e termos fragmentados ('E o s i n ó f i l o s', '5 , 0 %',
+    'μ L', 'mm 3') reunidos.
+    """
+    if not text:
+        return text
+    text = unicodedata.normalize("NFKC", text)
+    for ch in INVISIVEIS:
+        if ch in text:
+            text = text.replace(ch, " ")
+    return NORMALIZADOR_RE.sub(_despachar, text)
@@ -0,0 +1,140 @@
+"""
+Normalização de unidades dos valores extraídos do laudo.
+
+Cada match de patterns.csv leva junto o token de unidade escrito logo após o
+valor (/μL, /mm³, 10^3/μL, mil/mm³, milhões/mm³, %, g/dL...). A conversão
+para a unidade das tabelas de referência é feita por tabela (grandeza do
+analito × unidade → fator), numa única passada NumPy sobre todos os valores
+do exame:
+
+    - contagens (leucócitos, diferencial, plaquetas): /μL;
+    - hemácias: milhões/μL (10^6/μL);
+    - hemoglobina e CHCM: g/dL.
+
+Um fator só é aplicado se o valor convertido cair na faixa plausível da
+grandeza: "7.010 10^3/μL" já foi lido como 7010 pela heurística de milhares
+e não vira 7 milhões; "4,50 /μL" nas hemácias segue em milhões.
+
+Diferencial em % (neutrófilos 52,3%) vira contagem absoluta % × leucócitos
+/ 100 quando o analito não tem valor absoluto no laudo; sem leucócitos totais
+o percentual é descartado, pois não é comparável às referências em /μL.
+"""
+import re
+import logging
+from typing import List
+
+import numpy as np
+
+from .analyte_catalog import ANALITOS
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Token de unidade logo após o valor (espaços opcionais; OCR troca μ por u)
+_VOLUME = r"(?:[μµu]\s*l|mm\s*[³3])"
+UNIDADE_RE = re.compile(
+    r"\s*(?:"
+    rf"(?P<e3>(?:x\s*)?10\s*(?:\^\s*3|³)\s*/\s*{_VOLUME}|mil\s*/\s*{_VOLUME}|10\s*(?:\^\s*9|⁹)\s*/\s*l\b)"
+    rf"|(?P<e6>(?:x\s*)?10\s*(?:\^\s*6|⁶)\s*/\s*{_VOLUME}|milh[õo]es\s*/\s*{_VOLUME}|10\s*(?:\^\s*12|¹²)\s*/\s*l\b)"
+    rf"|(?P<ul>/\s*{_VOLUME})"
+    r"|(?P<pct>%)"
+    r"|(?P<gdl>g\s*/\s*dl)"
+    r"|(?P<gl>g\s*/\s*l\b)"
+    r")",
+    re.IGNORECASE,
+)
+JANELA_UNIDADE = 24  # caracteres lidos após o valor
+
+# Unidades canônicas (índice = código); "" = sem unidade no laudo
+UNIDADES = ["", "ul", "e3", "e6", "pct", "gdl", "gl"]
+_CODIGO_UNIDADE = {u: i for i, u in enumerate(UNIDADES)}
+SEM_UNIDADE, PERCENTUAL = _CODIGO_UNIDADE[""], _CODIGO_UNIDADE["pct"]
+
+# Grandeza de cada analito normalizado (catálogo de analitos); os demais passam sem conversão
+GRANDEZAS = ["outra", "contagem", "diferencial", "hemacias", "concentracao"]
+GRANDEZA_ANALITO = {a: info["grandeza"] for a, info in ANALITOS.items() if info["grandeza"] != "outra"}
+DIFERENCIAL = tuple(a for a, grandeza in GRANDEZA_ANALITO.items() if grandeza == "diferencial")
+_CODIGO_GRANDEZA = {g: i for i, g in enumerate(GRANDEZAS)}
+
+# Fator grandeza × unidade para a unidade de referência (1 = já na unidade);
+# o percentual do diferencial é resolvido à parte, com os leucócitos
+FATORES = {
+    "contagem": {"ul": 1, "e3": 1e3},
+    "diferencial": {"ul": 1, "e3": 1e3},
+    "hemacias": {"ul": 1e-6, "e6": 1},
+    "concentracao": {"gdl": 1, "gl": 0.1},
+}
+# Faixa plausível (na unidade de referência) para aceitar a conversão
+FAIXA_PLAUSIVEL = {
+    "outra": (-np.inf, np.inf),
+    "contagem": (10.0, 5e6),
+    "diferencial": (0.0, 5e5),
+    "hemacias": (0.3, 15.0),
+    "concentracao": (1.0, 60.0),
+}
+
+_MATRIZ_FATORES = np.ones((len(GRANDEZAS), len(UNIDADES)))
+for _grandeza, _fatores in FATORES.items():
+    for _unidade, _fator in _fatores.items():
+        _MATRIZ_FATORES[_CODIGO_GRANDEZA[_grandeza], _CODIGO_UNIDADE[_unidade]] = _fator
+_FAIXAS = np.array([FAIXA_PLAUSIVEL[g] for g in GRANDEZAS])
+
+
+# Analitos em que "X.XXX" é separador de milhares (7.010 → 7010, 282.000 → 282000)
+MILHAR_COM_PONTO = ("leucocitos", "neutrofilos", "linfocitos", "plaquetas")
+
+
+def parse_lab_number(valor_str: str, analito: str) -> float:
+    """Número escrito no laudo (vírgula decimal), com a heurística de milhares do analito normalizado."""
+    # Processamento inteligente de separadores de milhares vs decimais
+    if "." in valor_str:
+        partes = valor_str.split(".")
+        if len(partes) == 2 and len(partes[1]) == 3 and analito in MILHAR_COM_PONTO:
+            valor_str = valor_str.replace(".", "")
+    # Para plaquetas, vírgula é sempre separador de milhares
+    if "," in valor_str and analito == "plaquetas":
+        valor_str = valor_str.replace(",", "")  # 282,000 → 282000
+    return float(valor_str.replace(",", "."))  # vírgula → ponto para decimais
+
+
+def unit_after(texto: str, posicao: int) -> str:
+    """Unidade canônica escrita logo após `posicao` no texto ("" se não houver)."""
+    match = UNIDADE_RE.match(texto, posicao, posicao + JANELA_UNIDADE)
+    return match.lastgroup if match else ""
+
+
+def normalize_units(analitos: List[str], valores, unidades: List[str]):
+    """
+    Converte os valores de um exame para as unidades de referência.
+
+    `analitos` são os nomes normalizados (um por match, na ordem dos padrões),
+    `unidades` os tokens canônicos de unit_after. Retorna (índices, valores):
+    as posições mantidas, na ordem original, e os valores convertidos.
+    """
+    valores = np.asarray(valores, dtype=float)
+    grandeza = np.array([_CODIGO_GRANDEZA[GRANDEZA_ANALITO.get(a, "outra")] for a in analitos], dtype=np.intp)
+    unidade = np.array([_CODIGO_UNIDADE.get(u, SEM_UNIDADE) for u in unidades], dtype=np.intp)
+
+    convertido = valores * _MATRIZ_FATORES[grandeza, unidade]
+    inferior, superior = _FAIXAS[grandeza].T
+    plausivel = (convertido >= inferior) & (convertido <= superior)
+    valores = np.where(plausivel, convertido, valores)
+
+    # Diferencial em %: absoluto = % × leucócitos / 100, só sem valor absoluto do mesmo analito
+    percentual = (grandeza == _CODIGO_GRANDEZA["diferencial"]) & (unidade == PERCENTUAL)
+    mantidos = ~percentual
+    if percentual.any():
+        nomes = np.asarray(analitos, dtype=object)
+        com_absoluto = set(nomes[~percentual & (grandeza == _CODIGO_GRANDEZA["diferencial"])])
+        derivar = percentual & np.array([a not in com_absoluto for a in nomes])
+        leucocitos = np.flatnonzero((nomes == "leucocitos") & (unidade != PERCENTUAL))
+        if derivar.any() and leucocitos.size:
+            valores = np.where(derivar, np.round(valores * valores[leucocitos[0]] / 100), valores)
+            mantidos |= derivar
+        elif derivar.any():
+            logger.warning(f"⚠️ Diferencial só em % sem leucócitos totais, descartado: "
+                           f"{', '.join(sorted(set(nomes[derivar])))}")
+
+    indices = np.flatnonzero(mantidos)
+    return indices, valores[indices]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Interpretação offline em lote
+=============================
+
+Aplica o motor de regras (referência PNS) e a comparação com a referência
+laboratorial a um arquivo inteiro de exames, sem passar pela API.
+
+Entrada (Parquet, Arrow/Feather ou CSV), em um dos formatos:
+  - largo: uma linha por exame, como em /interpret-manual
+    (exame_id, genero, idade, hemoglobina, plaquetas, ...);
+  - longo: uma linha por valor (exame_id, genero, idade, analito, valor).
+
+Saída: achados (simples e compostos) e comparações nas mesmas colunas das
+respostas da API, mais exame_id, e o ranking de especialidades de cada exame (soma das
+severidades), no formato indicado pela extensão de cada arquivo.
+
+Uso:
+    python interpretar_lote.py exames.parquet
+    python interpretar_lote.py exames.parquet --achados achados.parquet --comparacoes comparacoes.parquet
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+from services.bulk_io import read_table, write_table, interpret_lab_values  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("entrada", help="Arquivo de exames (.parquet, .arrow, .feather ou .csv)")
+    parser.add_argument("--achados", default=None, help="Saída dos achados (padrão: <entrada>_achados.parquet)")
+    parser.add_argument("--comparacoes", default=None,
+                        help="Saída das comparações de referência (padrão: <entrada>_comparacoes.parquet)")
+    parser.add_argument("--compostos", default=None,
+                        help="Saída dos achados compostos (padrão: <entrada>_compostos.parquet)")
+    parser.add_argument("--especialidades", default=None,
+                        help="Saída do ranking de especialidades (padrão: <entrada>_especialidades.parquet)")
+    args = parser.parse_args()
+
+    base = os.path.splitext(args.entrada)[0]
+    saida_achados = args.achados or f"{base}_achados.parquet"
+    saida_comparacoes = args.comparacoes or f"{base}_comparacoes.parquet"
+    saida_compostos = args.compostos or f"{base}_compostos.parquet"
+    saida_especialidades = args.especialidades or f"{base}_especialidades.parquet"
+
+    inicio = time.perf_counter()
+    tabela = read_table(args.entrada)
+    t_leitura = time.perf_counter() - inicio
+
+    resultado = interpret_lab_values(tabela)
+    t_regras = time.perf_counter() - inicio - t_leitura
+
+    write_table(resultado["achados"], saida_achados)
+    write_table(resultado["comparacoes"], saida_comparacoes)
+    write_table(resultado["achados_compostos"], saida_compostos)
+    write_table(resultado["especialidades"], saida_especialidades)
+    t_total = time.perf_counter() - inicio
+
+    print(f"Exames lidos..........: {tabela.num_rows} linha(s) em {t_leitura:.2f}s")
+    print(f"Regras aplicadas......: {t_regras:.2f}s")
+    print(f"Achados...............: {resultado['achados'].num_rows} → {saida_achados}")
+    print(f"Achados compostos.....: {resultado['achados_compostos'].num_rows} → {saida_compostos}")
+    print(f"Comparações...........: {resultado['comparacoes'].num_rows} → {saida_comparacoes}")
+    print(f"Especialidades........: {resultado['especialidades'].num_rows} → {saida_especialidades}")
+    print(f"Tempo total...........: {t_total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
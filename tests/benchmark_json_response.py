@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resposta validada pelo response_model × FastJSONResponse
+===================================================================
+
+Monta respostas de /interpret-batch com N arquivos (14 analitos por laudo,
+com achados, comparações de referência e regras compostas reais) e mede o
+caminho da resposta até os bytes:
+
+    - validado: o que o FastAPI fazia com o dict devolvido pela rota —
+      to_payload, validação contra BatchInterpretationResponse, model_dump
+      para JSON e JSONResponse (json da biblioteca padrão);
+    - json: FastJSONResponse sem orjson (registros serializados direto pelo
+      json da biblioteca padrão, sem validação);
+    - orjson: FastJSONResponse com orjson, o caminho padrão.
+
+Imprime a vazão em respostas/s e MB/s e confere que os três JSONs são iguais.
+
+Uso:
+    python tests/benchmark_json_response.py
+    python tests/benchmark_json_response.py --arquivos 10 100 1000 --repeticoes 5
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, THIS_DIR)
+
+from starlette.responses import JSONResponse  # noqa: E402
+
+import main  # noqa: E402
+from benchmark_registros import valores_do_lote  # noqa: E402
+from services import json_response  # noqa: E402
+from services.compound_rules import get_compound_rules  # noqa: E402
+from services.records import LabValue, to_payload  # noqa: E402
+from services.rule_engine import apply_rules, comparar_referencias, get_display_name  # noqa: E402
+from services.specialty_selector import select_specialties  # noqa: E402
+
+
+def resposta_de_lote(arquivos: int, semente: int = 0) -> dict:
+    """Conteúdo de /interpret-batch como a rota o devolve (registros do pipeline)."""
+    rng = random.Random(semente)
+    itens = []
+    for exame in valores_do_lote(arquivos, semente):
+        valores = [LabValue(analito, valor) for analito, valor in exame]
+        genero = rng.choice(["masculino", "feminino"])
+        achados = apply_rules(valores, genero, 40)
+        compostos = get_compound_rules().apply(valores, genero, 40)
+        itens.append({
+            "arquivo": f"laudo_{len(itens)}.pdf",
+            "tempo_extracao_ms": rng.uniform(5, 50),
+            "tempo_total_ms": rng.uniform(50, 100),
+            "erro": None,
+            "resultado": {
+                "lab_findings": achados,
+                "achados_compostos": compostos,
+                "recommended_specialties": select_specialties(achados + compostos),
+                "patient_briefing": "",
+                "lab_values_raw": [LabValue(get_display_name(v.analito), v.valor) for v in valores],
+                "comparacao_referencias": comparar_referencias(valores, genero, 40),
+                "resultado_parcial": False,
+                "analitos_ausentes": [],
+                "historico_salvo": False,
+                "versao_config": "bench",
+                "idade_presumida": False,
+            },
+        })
+    return {"arquivos": itens, "resultado_mesclado": None, "tempo_total_ms": 123.4}
+
+
+def validado(conteudo: dict) -> bytes:
+    modelo = main.BatchInterpretationResponse.model_validate(to_payload(conteudo))
+    return JSONResponse(modelo.model_dump(mode="json")).body
+
+
+def sem_orjson(conteudo: dict) -> bytes:
+    disponivel = json_response.ORJSON_AVAILABLE
+    json_response.ORJSON_AVAILABLE = False
+    try:
+        return json_response.FastJSONResponse(conteudo).body
+    finally:
+        json_response.ORJSON_AVAILABLE = disponivel
+
+
+def rapido(conteudo: dict) -> bytes:
+    return json_response.FastJSONResponse(conteudo).body
+
+
+def medir(funcao, conteudo: dict, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(conteudo)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arquivos", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    caminhos = {"validado": validado, "json": sem_orjson}
+    if json_response.ORJSON_AVAILABLE:
+        caminhos["orjson"] = rapido
+    else:
+        print("⚠️ orjson não instalado: só o caminho com o json da biblioteca padrão")
+
+    print("=" * 72)
+    print(f"RESPOSTA DE /interpret-batch — melhor de {args.repeticoes} repetição(ões)")
+    print("=" * 72)
+    print(f"{'Arquivos':>9}{'KB':>9}" + "".join(f"{nome + ' (resp/s)':>18}" for nome in caminhos) + f"{'Ganho':>9}")
+    divergentes = 0
+    for arquivos in args.arquivos:
+        conteudo = resposta_de_lote(arquivos)
+        saidas = [json.loads(funcao(conteudo)) for funcao in caminhos.values()]
+        divergentes += any(saida != saidas[0] for saida in saidas)
+        tamanho = len(validado(conteudo))
+        tempos = [medir(funcao, conteudo, args.repeticoes) for funcao in caminhos.values()]
+        print(f"{arquivos:>9,}{tamanho / 1024:>9.0f}" + "".join(f"{1 / t:>18.1f}" for t in tempos)
+              + f"{tempos[0] / tempos[-1]:>8.1f}×")
+        print(f"{'':>18}" + "".join(f"{tamanho / t / 2**20:>13.1f} MB/s" for t in tempos))
+    if divergentes:
+        print("❌ Os caminhos produziram JSONs diferentes")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos motores de OCR
+============================
+
+Roda o mesmo OCR de página (sondagem + passada com confiança por palavra +
+retentativas por linha) com cada motor disponível — tesserocr (em processo)
+e pytesseract (um processo por chamada) — sobre os laudos escaneados, e
+reporta o tempo por página e a concordância do texto com o primeiro motor.
+
+Uso:
+    python tests/benchmark_motores_ocr.py
+    python tests/benchmark_motores_ocr.py --laudos tests/laudos --zoom 3 --repeticoes 3
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+import fitz  # noqa: E402
+
+from services import ocr_engine, pdf_parser  # noqa: E402
+
+
+def ocr_paginas(caminho: str, zoom: float) -> list:
+    """OCR de todas as páginas do PDF (independe de haver camada de texto)."""
+    textos = []
+    doc = fitz.open(caminho)
+    for num_pagina in range(len(doc)):
+        page = doc.load_page(num_pagina)
+        probe = pdf_parser.probe_page(page)
+        gray = pdf_parser.rotate_page_image(pdf_parser.render_page_gray(page, zoom), probe["rotacao"])
+        img = pdf_parser.preprocess_image_for_ocr(gray)
+        textos.append(pdf_parser.extract_text_with_medical_ocr(img, num_pagina, probe["tipo_documento"]))
+    doc.close()
+    return textos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--laudos", default=os.path.join(THIS_DIR, "exemplos"),
+                        help="Pasta com os PDFs escaneados (padrão: tests/exemplos)")
+    parser.add_argument("--zoom", type=float, default=3)
+    parser.add_argument("--repeticoes", type=int, default=1)
+    args = parser.parse_args()
+
+    pdfs = sorted(f for f in os.listdir(args.laudos) if f.lower().endswith(".pdf"))
+    if not pdfs:
+        print(f"Nenhum PDF encontrado em {args.laudos}")
+        raise SystemExit(1)
+
+    referencia = {}
+    for nome_motor in ocr_engine.ENGINES:
+        motor = ocr_engine.create_ocr_engine(nome_motor)
+        if motor is None:
+            print(f"⏭️  {nome_motor}: não instalado, ignorado")
+            continue
+        ocr_engine.set_ocr_engine(motor)
+
+        paginas = 0
+        inicio = time.perf_counter()
+        similaridades = []
+        for _ in range(args.repeticoes):
+            for nome in pdfs:
+                textos = ocr_paginas(os.path.join(args.laudos, nome), args.zoom)
+                paginas += len(textos)
+                texto = "\n".join(textos)
+                if nome not in referencia:
+                    referencia[nome] = texto
+                similaridades.append(difflib.SequenceMatcher(None, referencia[nome], texto).ratio())
+        total = time.perf_counter() - inicio
+
+        print(f"{nome_motor:>12}: {paginas} página(s) em {total:.2f}s "
+              f"→ {1000 * total / max(paginas, 1):.0f} ms/página | "
+              f"concordância com o 1º motor: {sum(similaridades) / len(similaridades):.3f}")
+
+
+if __name__ == "__main__":
+    main()
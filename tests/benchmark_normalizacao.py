@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: normalização do texto extraído em passada única × sequência antiga
+============================================================================
+
+Compara normalize_text (services/text_normalizer.py) com a sequência de
+re.sub que ela substituiu, em textos do tamanho de saídas de OCR grandes:
+laudos com termos fragmentados, números com espaços e caracteres invisíveis,
+repetidos até o tamanho pedido. Confere também que as duas saídas são
+idênticas.
+
+Uso:
+    python tests/benchmark_normalizacao.py
+    python tests/benchmark_normalizacao.py --tamanhos 10000 100000 1000000 --repeticoes 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, THIS_DIR)
+
+from services.text_normalizer import normalize_text  # noqa: E402
+from test_text_normalizer import LAUDO, normalizacao_legada, texto_ocr  # noqa: E402
+
+
+def texto_grande(tamanho: int, semente: int = 0) -> str:
+    """Laudo limpo alternado com trechos de OCR defeituoso, até `tamanho` caracteres."""
+    rng = random.Random(semente)
+    partes, total = [], 0
+    while total < tamanho:
+        parte = LAUDO if rng.random() < 0.5 else texto_ocr(rng, 400)
+        partes.append(parte + "\n")
+        total += len(parte) + 1
+    return "".join(partes)[:tamanho]
+
+
+def medir(funcao, texto: str, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(texto)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print("=" * 64)
+    print(f"NORMALIZAÇÃO DO TEXTO — melhor de {args.repeticoes} repetição(ões)")
+    print("=" * 64)
+    print(f"{'Caracteres':>12}{'Antiga (ms)':>14}{'Única (ms)':>13}{'Ganho':>9}{'Idêntica':>11}")
+    divergentes = 0
+    for tamanho in args.tamanhos:
+        texto = texto_grande(tamanho)
+        identica = normalize_text(texto) == normalizacao_legada(texto)
+        divergentes += not identica
+        antiga = medir(normalizacao_legada, texto, args.repeticoes)
+        unica = medir(normalize_text, texto, args.repeticoes)
+        print(f"{tamanho:>12,}{antiga * 1000:>14.2f}{unica * 1000:>13.2f}{antiga / unica:>8.1f}×"
+              f"{'sim' if identica else 'NÃO':>11}")
+    if divergentes:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
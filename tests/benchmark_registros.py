@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: registros com __slots__ × dicts nos dados do pipeline
+================================================================
+
+Monta os valores e achados de um lote de exames (14 analitos do hemograma
+por exame, 5 achados) nas duas representações e mede a memória retida
+(tracemalloc) e o tempo de criação. Mede também o pipeline de regras sobre
+o lote (apply_rules + comparar_referencias + select_specialties) e a
+conversão para dict na fronteira da API (to_payload).
+
+Uso:
+    python tests/benchmark_registros.py
+    python tests/benchmark_registros.py --exames 1000 10000 100000 --repeticoes 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+from services.records import DIRETRIZ_REFERENCIA, Finding, LabValue, to_payload  # noqa: E402
+from services.rule_engine import apply_rules, comparar_referencias  # noqa: E402
+from services.specialty_selector import select_specialties  # noqa: E402
+
+# Faixas plausíveis (com valores fora da referência) por analito
+FAIXAS = {
+    "hemacias": (3.5, 6.0), "hemoglobina": (9.0, 18.0), "hematocrito": (30.0, 52.0), "vcm": (75.0, 105.0),
+    "hcm": (25.0, 35.0), "chcm": (30.0, 37.0), "rdw": (10.0, 17.0), "leucocitos": (2500.0, 14000.0),
+    "neutrofilos": (1000.0, 9000.0), "eosinofilos": (0.0, 1200.0), "basofilos": (0.0, 250.0),
+    "linfocitos": (800.0, 5000.0), "monocitos": (100.0, 1200.0), "plaquetas": (90000.0, 500000.0),
+}
+ACHADOS_POR_EXAME = 5
+
+
+def valores_do_lote(exames: int, semente: int = 0) -> list:
+    rng = random.Random(semente)
+    return [[(analito, round(rng.uniform(*faixa), 2)) for analito, faixa in FAIXAS.items()] for _ in range(exames)]
+
+
+def como_dicts(lote: list) -> list:
+    return [([{"analito": a, "valor": v} for a, v in exame],
+             [{"analito": a, "valor": v, "resultado": "alto", "severidade": 2, "especialidade": "Hematologia",
+               "descricao_achado": f"{a} alto", "diretriz": DIRETRIZ_REFERENCIA} for a, v in exame[:ACHADOS_POR_EXAME]])
+            for exame in lote]
+
+
+def como_registros(lote: list) -> list:
+    return [([LabValue(a, v) for a, v in exame],
+             [Finding(a, v, "alto", 2, "Hematologia", f"{a} alto", DIRETRIZ_REFERENCIA)
+              for a, v in exame[:ACHADOS_POR_EXAME]])
+            for exame in lote]
+
+
+def medir(funcao, repeticoes: int):
+    """Melhor tempo de `funcao()` e memória retida pelo resultado."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    tracemalloc.start()
+    resultado = funcao()
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del resultado
+    return melhor, memoria
+
+
+def pipeline(lote_registros: list) -> list:
+    saidas = []
+    for valores, _ in lote_registros:
+        achados = apply_rules(valores, genero="masculino", idade=40)
+        saidas.append((achados, comparar_referencias(valores, genero="masculino", idade=40),
+                       select_specialties(achados)))
+    return saidas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exames", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 78)
+    print(f"REGISTROS × DICTS — {len(FAIXAS)} valores e {ACHADOS_POR_EXAME} achados por exame, "
+          f"melhor de {args.repeticoes}")
+    print("=" * 78)
+    print(f"{'Exames':>9}{'Dicts (MB)':>12}{'Registros (MB)':>16}{'Dicts (ms)':>12}{'Registros (ms)':>16}"
+          f"{'Regras (ms)':>13}")
+    for exames in args.exames:
+        lote = valores_do_lote(exames)
+        t_dicts, m_dicts = medir(lambda: como_dicts(lote), args.repeticoes)
+        t_registros, m_registros = medir(lambda: como_registros(lote), args.repeticoes)
+        registros = como_registros(lote)
+        inicio = time.perf_counter()
+        pipeline(registros)
+        t_regras = time.perf_counter() - inicio
+        print(f"{exames:>9,}{m_dicts / 2**20:>12.1f}{m_registros / 2**20:>16.1f}{t_dicts * 1000:>12.1f}"
+              f"{t_registros * 1000:>16.1f}{t_regras * 1000:>13.1f}")
+
+    # Conversão única na fronteira da API (resposta de um lote de exames)
+    registros = como_registros(valores_do_lote(args.exames[0]))
+    inicio = time.perf_counter()
+    to_payload([{"lab_values_raw": valores, "lab_findings": achados} for valores, achados in registros])
+    print(f"\nto_payload de {args.exames[0]:,} exames: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
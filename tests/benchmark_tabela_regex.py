@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: extração por tabela (coordenadas) × regex
+====================================================
+
+Para cada laudo do gabarito, extrai os valores por três caminhos e compara
+tempo e acurácia:
+
+    - regex: texto achatado (PyPDF2) + todos os padrões de patterns.csv;
+    - tabela: linhas da tabela remontadas pelas coordenadas das palavras
+      (table_extractor), sem regex;
+    - combinado: extract_lab_values, o caminho usado pela API (tabela
+      primeiro; padrões só para analitos mencionados fora dela).
+
+O tempo é o menor de --repeticoes execuções por laudo, incluindo a leitura
+do PDF. Use o mesmo gabarito de tests/validacao_extracao.py.
+
+Uso:
+    python tests/benchmark_tabela_regex.py
+    python tests/benchmark_tabela_regex.py --gabarito gabarito.json --laudos tests/laudos --repeticoes 10
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, THIS_DIR)
+
+from services.pdf_parser import (PatternRegistry, apply_patterns, extract_full_text,  # noqa: E402
+                                 extract_lab_values, normalize_analito_name)
+from services.table_extractor import extract_table_values  # noqa: E402
+from validacao_extracao import avaliar_laudo  # noqa: E402
+
+
+def como_dict(resultados: list) -> dict:
+    saida = {}
+    for r in resultados:
+        saida.setdefault(normalize_analito_name(r["analito"]), r["valor"])
+    return saida
+
+
+def caminhos(registro: PatternRegistry) -> dict:
+    return {
+        "regex": lambda pdf: apply_patterns(extract_full_text(pdf), registro)[0],
+        "tabela": lambda pdf: extract_table_values(pdf)[0],
+        "combinado": lambda pdf: extract_lab_values(pdf, registry=registro),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gabarito", default=os.path.join(THIS_DIR, "gabarito_exemplo.json"))
+    parser.add_argument("--laudos", default=os.path.join(THIS_DIR, "exemplos"))
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.gabarito, encoding="utf-8") as f:
+        gabarito = json.load(f)
+
+    exemplo = os.path.join(THIS_DIR, "exemplos", "hemograma_tabela.pdf")
+    if args.laudos == os.path.join(THIS_DIR, "exemplos") and not os.path.exists(exemplo):
+        sys.path.insert(0, PROJECT_ROOT)
+        import generate_sample_pdf
+        generate_sample_pdf.main()
+
+    logging.disable(logging.WARNING)  # a extração registra cada match; aqui só interessa o resumo
+    registro = PatternRegistry.load()
+    totais = {nome: {"tempo": 0.0, "corretos": 0, "total": 0, "falsos_positivos": 0} for nome in caminhos(registro)}
+    laudos = 0
+
+    for nome_laudo, esperado in gabarito.items():
+        caminho = os.path.join(args.laudos, nome_laudo)
+        if not os.path.exists(caminho):
+            print(f"[!] Laudo não encontrado: {caminho} (pulando)")
+            continue
+        with open(caminho, "rb") as f:
+            pdf = f.read()
+        laudos += 1
+        for nome, extrair in caminhos(registro).items():
+            melhor = float("inf")
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                resultados = extrair(pdf)
+                melhor = min(melhor, time.perf_counter() - inicio)
+            avaliacao = avaliar_laudo(nome_laudo, esperado, como_dict(resultados))
+            totais[nome]["tempo"] += melhor
+            for chave in ("corretos", "total", "falsos_positivos"):
+                totais[nome][chave] += avaliacao[chave]
+
+    if not laudos:
+        print("Nenhum laudo do gabarito encontrado")
+        raise SystemExit(1)
+
+    print("=" * 72)
+    print(f"EXTRAÇÃO POR TABELA × REGEX — {laudos} laudo(s), {args.repeticoes} repetição(ões)")
+    print("=" * 72)
+    print(f"{'Caminho':<12}{'ms/laudo':>10}{'Acertos':>12}{'Acurácia':>11}{'Falsos+':>9}")
+    for nome, t in totais.items():
+        acuracia = t["corretos"] / t["total"] * 100 if t["total"] else 0
+        print(f"{nome:<12}{t['tempo'] / laudos * 1000:>10.2f}{t['corretos']:>7}/{t['total']:<4}"
+              f"{acuracia:>10.1f}%{t['falsos_positivos']:>9}")
+
+
+if __name__ == "__main__":
+    main()
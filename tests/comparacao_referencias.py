@@ -15,13 +15,20 @@ Para cada analito × sexo × faixa etária, calcula:
   - as ZONAS DE DISCORDÂNCIA (faixas de valor em que a classificação muda);
   - a taxa de discordância e o coeficiente kappa sob amostragem uniforme.
 
+Com --resultados, aplica as duas referências a uma tabela real de resultados
+(CSV ou Parquet, colunas analito, valor, sexo, idade — milhões de linhas,
+lidas em lotes) e reporta discordância e kappa por estrato observado.
+
 Uso:
     python tests/comparacao_referencias.py
     python tests/comparacao_referencias.py --relatorio comparacao.csv
+    python tests/comparacao_referencias.py --resultados exames.parquet --relatorio estratos.csv
 """
 import argparse
 import csv
 import os
+import sys
+import time
 import unicodedata
 
 import pandas as pd
@@ -122,13 +129,45 @@ def descreve_zona(lim_pns, lim_lab, extremo: str) -> str:
         return f"PNS alto / Lab normal em [{lim_pns:g}, {lim_lab:g}] (PNS mais sensível a valores altos)"
 
 
+def comparar_populacao(args):
+    """Discordância e kappa por estrato numa tabela de resultados (motor vetorizado)."""
+    sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+    from services.reference_engine import compare_population
+
+    inicio = time.perf_counter()
+    resumo = compare_population(args.resultados, chunksize=args.chunksize,
+                                pns=pd.read_csv(args.pns, comment="#"),
+                                lab=pd.read_csv(args.lab, comment="#"))
+    duracao = time.perf_counter() - inicio
+
+    print("=" * 78)
+    print(f"COMPARAÇÃO POPULACIONAL — {args.resultados}")
+    print("=" * 78)
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(resumo.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    n = int(resumo["n"].sum())
+    print(f"\n{n} resultado(s) em {duracao:.2f}s ({n / duracao:,.0f} linhas/s)")
+
+    if args.relatorio:
+        resumo.to_csv(args.relatorio, index=False)
+        print(f"Relatório por estrato salvo em: {args.relatorio}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Comparação PNS × referência laboratorial (Frente B).")
     parser.add_argument("--pns", default=os.path.join(DATA_DIR, "guideline_map.csv"))
     parser.add_argument("--lab", default=os.path.join(DATA_DIR, "lab_reference.csv"))
     parser.add_argument("--relatorio", default=None, help="(Opcional) salva CSV detalhado.")
+    parser.add_argument("--resultados", default=None,
+                        help="(Opcional) tabela de resultados (CSV/Parquet) para comparação populacional.")
+    parser.add_argument("--chunksize", type=int, default=500_000,
+                        help="Linhas por lote na comparação populacional.")
     args = parser.parse_args()
 
+    if args.resultados:
+        comparar_populacao(args)
+        return
+
     pns = carregar(args.pns)
     lab = carregar(args.lab)
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Perfil de cobertura e custo dos padrões (patterns.csv)
+======================================================
+
+Roda todos os padrões sobre um corpus de laudos (PDFs, ou .txt com o texto já
+extraído) e mostra, por padrão: matches, vitórias (o valor ficou no
+resultado), tempo médio/máximo e marcações — morto, sombreado e, com
+--estresse, backtracking (tempo superlinear em textos adversariais).
+
+Com --podado, grava um patterns.csv sem os padrões mortos/sombreados e com os
+aliases reordenados por vitórias, e confere que o corpus extrai exatamente os
+mesmos valores com ele (comparando também o tempo de extração).
+
+Uso:
+    python tests/perfil_padroes.py
+    python tests/perfil_padroes.py --laudos tests/laudos --estresse \\
+                                   --relatorio perfil_padroes.csv --podado patterns_podado.csv
+
+O perfil só vale para o corpus usado: um padrão "morto" aqui pode ser o único
+que reconhece um layout ausente do corpus. Revise o relatório antes de trocar
+data/patterns.csv. PRIVACIDADE/LGPD: laudos reais ficam fora do Git (ex.:
+tests/laudos/).
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+from services.pdf_parser import PATTERNS_PATH, PatternRegistry, apply_patterns, extract_full_text  # noqa: E402
+from services.pattern_profiler import PatternProfile, write_patterns_csv  # noqa: E402
+
+COLUNAS = ["analito", "normalizado", "matches", "taxa_match", "vitorias",
+           "tempo_medio_ms", "tempo_max_ms", "razao_estresse", "marcacoes"]
+
+
+def carregar_corpus(pasta: str) -> dict:
+    """{arquivo: texto normalizado} dos PDFs e .txt da pasta (recursivo)."""
+    textos = {}
+    for raiz, _, arquivos in os.walk(pasta):
+        for nome in sorted(arquivos):
+            caminho = os.path.join(raiz, nome)
+            try:
+                if nome.lower().endswith(".pdf"):
+                    with open(caminho, "rb") as f:
+                        textos[os.path.relpath(caminho, pasta)] = extract_full_text(f.read())
+                elif nome.lower().endswith(".txt"):
+                    with open(caminho, encoding="utf-8") as f:
+                        textos[os.path.relpath(caminho, pasta)] = f.read()
+            except Exception as e:
+                print(f"[!] Erro ao ler {caminho}: {e} (pulando)")
+    return textos
+
+
+def extrair_corpus(textos: dict, registro: PatternRegistry, perfil=None):
+    """Valores por laudo e tempo total (s) da aplicação dos padrões."""
+    valores = {}
+    inicio = time.perf_counter()
+    for nome, texto in textos.items():
+        resultados, _ = apply_patterns(texto, registro, perfil)
+        valores[nome] = {r["analito"]: r["valor"] for r in resultados}
+    return valores, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de cobertura e custo dos padrões de extração.")
+    parser.add_argument("--laudos", default=os.path.join(THIS_DIR, "exemplos"),
+                        help="Pasta com os laudos (PDF ou .txt).")
+    parser.add_argument("--padroes", default=PATTERNS_PATH, help="patterns.csv a perfilar.")
+    parser.add_argument("--estresse", action="store_true",
+                        help="Mede o risco de backtracking com textos adversariais.")
+    parser.add_argument("--relatorio", default=None, help="(Opcional) Relatório CSV por padrão.")
+    parser.add_argument("--podado", default=None, help="(Opcional) Grava o patterns.csv podado e reordenado.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições na comparação de tempo.")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # a extração registra cada match; aqui só interessa o relatório
+    registro = PatternRegistry.load(args.padroes)
+    textos = carregar_corpus(args.laudos)
+    if not textos:
+        print(f"[!] Nenhum laudo em {args.laudos}")
+        return 1
+
+    perfil = PatternProfile(registro)
+    referencia, _ = extrair_corpus(textos, registro, perfil)
+    linhas = perfil.report(estresse=args.estresse)
+
+    print("=" * 96)
+    print(f"PERFIL DOS PADRÕES — {len(registro.patterns)} padrões, {perfil.documentos} laudos")
+    print("=" * 96)
+    print(f"{'Padrão':<34}{'Matches':>8}{'Vitórias':>9}{'Médio ms':>10}{'Máx ms':>9}   Marcações")
+    for l in linhas:
+        print(f"{l['analito']:<34}{l['matches']:>8}{l['vitorias']:>9}{l['tempo_medio_ms']:>10.3f}"
+              f"{l['tempo_max_ms']:>9.3f}   {', '.join(l['marcacoes'])}")
+    resumo = perfil.summary()
+    print("-" * 96)
+    print(f"Mortos: {resumo['mortos']} | Sombreados: {resumo['sombreados']} | "
+          f"Tempo médio por laudo (todos os padrões): {resumo['tempo_medio_ms']:.3f} ms")
+
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8", newline="") as f:
+            escritor = csv.DictWriter(f, fieldnames=COLUNAS, extrasaction="ignore")
+            escritor.writeheader()
+            for l in linhas:
+                escritor.writerow({**l, "marcacoes": ";".join(l["marcacoes"])})
+        print(f"Relatório salvo em: {args.relatorio}")
+
+    if args.podado:
+        write_patterns_csv(perfil.pruned_patterns(), args.podado)
+        podado = PatternRegistry.load(args.podado)
+        # Extração normal (com o atalho por analito resolvido), original × podado
+        antes = min(extrair_corpus(textos, registro)[1] for _ in range(args.repeticoes))
+        depois = min(extrair_corpus(textos, podado)[1] for _ in range(args.repeticoes))
+        valores, _ = extrair_corpus(textos, podado)
+        divergentes = [nome for nome in textos if valores[nome] != referencia[nome]]
+        print(f"Padrões podados: {len(registro.patterns)} → {len(podado.patterns)} ({args.podado})")
+        print(f"Tempo do corpus: {antes * 1000:.2f} ms → {depois * 1000:.2f} ms")
+        if divergentes:
+            print(f"❌ Valores diferentes em {len(divergentes)} laudo(s): {', '.join(divergentes)}")
+            return 1
+        print("✅ Mesmos valores extraídos em todos os laudos do corpus")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
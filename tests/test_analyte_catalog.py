@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Testes do catálogo canônico de analitos (IDs, aliases, nomes, unidades e explicações).
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services.analyte_catalog import (ANALITOS, analyte_id, analyte_key, display_name,  # noqa: E402
+                                      explanation, normalize_key, unit)
+from services.nlg import get_analito_explanation  # noqa: E402
+from services.pdf_parser import PATTERNS_PATH, PatternRegistry, normalize_analito_name  # noqa: E402
+from services.rule_engine import apply_rules, get_display_name  # noqa: E402
+from services.units import DIFERENCIAL, GRANDEZA_ANALITO  # noqa: E402
+
+
+@pytest.mark.parametrize("grafia", ["eosinofilos", "eosinofilos_sus", "EOSINOFILOS_COMPACTO",
+                                    "eosinofilos_percent_fragmentado", "Eosinófilos", "eosinófilos"])
+def test_grafias_resolvem_para_o_mesmo_id(grafia):
+    assert analyte_id(grafia) == "eosinofilos"
+    assert analyte_key(grafia) == "eosinofilos"
+    assert display_name(grafia) == "Eosinófilos"
+    # IDs internados: a resolução devolve sempre o mesmo objeto
+    assert analyte_id(grafia) is analyte_id("eosinofilos")
+
+
+def test_nome_fora_do_catalogo_segue_como_antes():
+    assert analyte_id("Ácido_Úrico") == "ácido_úrico"
+    assert analyte_key("Ácido_Úrico") == "acido_urico"
+    assert display_name("acido_urico") == "Acido_urico"
+    assert unit("ferritina") == "" and explanation("ferritina") is None
+    assert normalize_key("Feminino") == "feminino" and normalize_key("Hemácias") == "hemacias"
+
+
+def test_todo_analito_dos_padroes_esta_no_catalogo():
+    nomes = {p["analito"] for p in PatternRegistry.load(PATTERNS_PATH).patterns}
+
+    assert sorted(n for n in nomes if analyte_id(n) not in ANALITOS) == []
+    assert analyte_id("leucócitos_alt") == "leucocitos" and analyte_id("hemacias_milhoes") == "hemacias"
+
+
+def test_parser_regras_e_nlg_usam_o_catalogo():
+    assert normalize_analito_name("eosinofilos_compacto") == "eosinofilos"
+    assert get_display_name("hemacias_alt") == "Hemácias"
+    # Alias que só o parser conhecia agora encontra a regra de referência
+    achados = apply_rules([{"analito": "eosinofilos_compacto", "valor": 5000.0}], "M", 40)
+    assert [a["analito"] for a in achados] == ["Eosinófilos"]
+    # O achado traz o nome de exibição; a explicação é encontrada com ou sem acento
+    for nome in ("Leucócitos", "Hematócrito", "Hemácias", "neutrofilos"):
+        assert "Este é um parâmetro importante" not in get_analito_explanation(nome, "alto")
+
+
+def test_unidades_e_grandezas():
+    assert unit("plaquetas") == "/μL" and unit("Hemoglobina") == "g/dL" and unit("hemacias") == "milhões/μL"
+    assert GRANDEZA_ANALITO["leucocitos"] == "contagem" and GRANDEZA_ANALITO["chcm"] == "concentracao"
+    assert set(DIFERENCIAL) == {"neutrofilos", "eosinofilos", "basofilos", "linfocitos", "monocitos",
+                                "segmentados", "bastonetes", "mielocitos", "metamielocitos"}
+    # ID = nome de exibição minúsculo e sem acentos (chave das tabelas de referência)
+    assert all(analyte_key(info["nome"]) == analito for analito, info in ANALITOS.items())
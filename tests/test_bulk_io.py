@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Testes da camada colunar (Arrow/Parquet) e do motor de regras vetorizado,
+conferido contra apply_rules e comparar_referencias exame a exame.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+pa = pytest.importorskip("pyarrow")
+
+from services import bulk_io, compound_rules, rule_engine  # noqa: E402
+from services.specialty_selector import select_specialties  # noqa: E402
+
+
+def exames_manuais(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    hemoglobina = rng.normal(13, 2, n)
+    hemoglobina[::7] = np.nan  # campo não informado
+    return pa.table({
+        "exame_id": [f"E{k}" for k in range(n)],
+        "genero": rng.choice(["masculino", "feminino"], n),
+        "idade": rng.integers(0, 95, n),
+        "hemoglobina": hemoglobina,
+        "plaquetas": rng.normal(250000, 90000, n),
+        "rdw": rng.normal(13, 1.5, n),
+        "vcm": rng.normal(88, 10, n),
+        "hematocrito": rng.normal(42, 5, n),
+    })
+
+
+def test_lote_igual_a_apply_rules_por_exame():
+    tabela = exames_manuais()
+    resultado = bulk_io.interpret_lab_values(tabela)
+    achados = resultado["achados"].to_pylist()
+    comparacoes = resultado["comparacoes"].to_pylist()
+    especialidades = resultado["especialidades"].to_pylist()
+    compostos = resultado["achados_compostos"].to_pylist()
+
+    for exame in tabela.to_pylist():
+        valores = [{"analito": a, "valor": exame[a]} for a in ("hemoglobina", "plaquetas", "rdw", "vcm", "hematocrito")
+                   if exame[a] is not None and not np.isnan(exame[a])]
+        idade = exame["idade"] if exame["idade"] > 0 else 30
+        esperado = rule_engine.apply_rules(valores, genero=exame["genero"], idade=idade)
+        obtido = [{k: v for k, v in f.items() if k != "exame_id"} for f in achados if f["exame_id"] == exame["exame_id"]]
+        assert (sorted(obtido, key=lambda f: f["analito"])
+                == sorted((f.to_dict() for f in esperado), key=lambda f: f["analito"]))
+
+        esperado_composto = compound_rules.get_compound_rules().apply(valores, genero=exame["genero"], idade=idade)
+        obtido = [c["regra"] for c in compostos if c["exame_id"] == exame["exame_id"]]
+        assert obtido == [c["regra"] for c in esperado_composto]
+
+        ranking = sorted((e for e in especialidades if e["exame_id"] == exame["exame_id"]), key=lambda e: e["posicao"])
+        assert [e["especialidade"] for e in ranking] == select_specialties(esperado + esperado_composto)
+
+        esperado = rule_engine.comparar_referencias(valores, genero=exame["genero"], idade=idade)
+        obtido = [{k: v for k, v in c.items() if k != "exame_id"} for c in comparacoes if c["exame_id"] == exame["exame_id"]]
+        assert (sorted(obtido, key=lambda c: c["analito"])
+                == sorted((c.to_dict() for c in esperado), key=lambda c: c["analito"]))
+
+
+def test_idade_fracionaria_de_lactentes():
+    tabela = pa.table({
+        "exame_id": ["bebe", "crianca", "adulto"],
+        "genero": ["feminino", "masculino", "masculino"],
+        "idade": [0.5, 7.25, 40.0],
+        "hemoglobina": [8.0, 10.0, 7.0],
+        "plaquetas": [500000.0, 250000.0, 90000.0],
+    })
+
+    achados = bulk_io.interpret_lab_values(tabela)["achados"].to_pylist()
+
+    for exame in tabela.to_pylist():
+        valores = [{"analito": a, "valor": exame[a]} for a in ("hemoglobina", "plaquetas")]
+        esperado = rule_engine.apply_rules(valores, genero=exame["genero"], idade=exame["idade"])
+        obtido = [{k: v for k, v in f.items() if k != "exame_id"} for f in achados if f["exame_id"] == exame["exame_id"]]
+        assert (sorted(obtido, key=lambda f: f["analito"])
+                == sorted((f.to_dict() for f in esperado), key=lambda f: f["analito"]))
+    # As tabelas distribuídas só têm faixas adultas: as crianças ficam sem achados nos dois caminhos
+    assert [f["exame_id"] for f in achados] == ["adulto", "adulto"]
+
+
+def test_parquet_ida_e_volta(tmp_path):
+    tabela = bulk_io.wide_to_long(exames_manuais(50))
+    caminho = str(tmp_path / "valores.parquet")
+
+    bulk_io.write_table(tabela, caminho)
+
+    assert bulk_io.read_table(caminho).equals(tabela)
+
+
+def test_colunas_nao_numericas_ignoradas():
+    tabela = exames_manuais(20).append_column("paciente_id", pa.array([f"P{k:03d}" for k in range(20)]))
+
+    longa = bulk_io.wide_to_long(tabela)
+
+    assert "paciente_id" not in longa.column("analito").to_pylist()
+    assert longa.equals(bulk_io.wide_to_long(exames_manuais(20)))
+
+
+def test_valores_sem_copia():
+    valores = pa.chunked_array([pa.array([1.5, 2.5, 3.5])])
+    array = bulk_io._column_numpy(valores, np.float64)
+
+    assert array.tolist() == [1.5, 2.5, 3.5]
+    assert not array.flags.owndata
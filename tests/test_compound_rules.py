@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Testes das regras compostas: compilação da expressão (lista branca da AST),
+avaliação vetorizada e achados de um exame.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+
+from services import compound_rules  # noqa: E402
+from services.compound_rules import BAIXO, NORMAL, ALTO, SEM_REFERENCIA, CompoundRuleSet  # noqa: E402
+
+
+def regras(*condicoes):
+    return CompoundRuleSet([{"regra_id": f"r{i}", "condicao": c, "descricao_achado": f"regra {i}",
+                             "especialidade": "Hematologia", "severidade": "2"}
+                            for i, c in enumerate(condicoes)])
+
+
+@pytest.mark.parametrize("condicao", [
+    "__import__('os').system('true')",
+    "hemoglobina",                      # valor, não condição
+    "baixo(hemoglobina) + 1 > 0",       # condição usada como número
+    "baixo(1)",
+    "hemoglobina.real > 1",
+    "[x for x in hemoglobina]",
+    "hemoglobina ** 2 > 1",
+    "baixo(hemoglobina",
+])
+def test_expressoes_fora_da_lista_branca_sao_rejeitadas(condicao):
+    with pytest.raises(Exception, match="Erro na regra composta"):
+        regras(condicao)
+
+
+def test_avaliacao_vetorizada_por_exame():
+    conjunto = regras(
+        "baixo(hemoglobina) and (baixo(vcm) or baixo(hcm))",
+        "not informado(vcm)",
+        "10 < hemoglobina <= 12",
+        "abs(neutrofilos + linfocitos - leucocitos) > 0.1 * leucocitos",
+    )
+    f = {a: i for i, a in enumerate(conjunto.analitos)}
+    nan = np.nan
+    valores = np.full((len(f), 4), nan)
+    classes = np.full((len(f), 4), SEM_REFERENCIA, dtype=np.int8)
+    valores[f["hemoglobina"]] = [11, 11, 14, nan]
+    classes[f["hemoglobina"]] = [BAIXO, BAIXO, NORMAL, SEM_REFERENCIA]
+    valores[f["vcm"]] = [70, 90, 95, nan]
+    classes[f["vcm"]] = [BAIXO, NORMAL, NORMAL, SEM_REFERENCIA]
+    classes[f["hcm"]] = [NORMAL, ALTO, NORMAL, SEM_REFERENCIA]
+    valores[f["leucocitos"]] = [7000, 7000, nan, 5000]
+    valores[f["neutrofilos"]] = [4000, 5000, 3000, 3000]
+    valores[f["linfocitos"]] = [2500, 2000, 1000, 2000]
+
+    disparadas = conjunto.evaluate(valores, classes)
+
+    assert disparadas.tolist() == [
+        [True, False, False, False],
+        [False, False, False, True],
+        [True, True, False, False],
+        [False, False, False, False],   # ausente (NaN) não dispara
+    ]
+
+
+def test_regras_do_repositorio_num_exame():
+    conjunto = compound_rules.load_compound_rules()
+    valores = [
+        {"analito": "hemoglobina", "valor": 9.0},
+        {"analito": "vcm", "valor": 70.0},
+        {"analito": "leucocitos_sus", "valor": 7000},
+        {"analito": "neutrofilos", "valor": 2000},
+        {"analito": "linfocitos", "valor": 1500},
+        {"analito": "monocitos", "valor": 400},
+        {"analito": "eosinofilos", "valor": 100},
+        {"analito": "basofilos", "valor": 30},
+    ]
+
+    achados = conjunto.apply(valores, "feminino", 35)
+
+    assert [a["regra"] for a in achados] == ["anemia_microcitica", "diferencial_inconsistente"]
+    assert achados[0]["analitos"] == ["Hemoglobina", "VCM", "HCM"]
+    assert conjunto.versao
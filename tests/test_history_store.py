@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Testes do histórico pseudonimizado de exames e do cálculo de tendências.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+
+from services import history_store  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path):
+    return history_store.HistoryStore(str(tmp_path / "history.sqlite3"), "segredo")
+
+
+def gravar(store, paciente, data, **valores):
+    lab_values = [{"analito": a, "valor": v} for a, v in valores.items()]
+    flags = {a: ("baixo" if a == "hemoglobina" and v < 12 else "normal") for a, v in valores.items()}
+    store.record(paciente, data, lab_values, flags)
+
+
+def test_pseudonimo_estavel_e_sem_identificador_em_claro(store):
+    gravar(store, "123.456.789-00", "2024-01-10", hemoglobina=13.0)
+
+    assert store.token("12345678900") == store.token("123.456.789-00")
+    assert store.token("12345678900") != history_store.patient_token("12345678900", "outro")
+    conn = sqlite3.connect(store.db_path)
+    pacientes = {p for (p,) in conn.execute("SELECT paciente FROM exames")}
+    conn.close()
+    assert pacientes == {store.token("12345678900")}
+
+
+def test_tendencias_deltas_inclinacao_e_transicoes(store):
+    gravar(store, "p1", "2023-01-01", hemoglobina=13.0, leucocitos=7000)
+    gravar(store, "p1", "2023-07-02", hemoglobina=12.5, leucocitos=7000)
+    gravar(store, "p1", "2024-01-01", hemoglobina=11.5, leucocitos=7000)
+    gravar(store, "p1", "2024-01-01", hemoglobina=11.0)  # mesmo dia: substitui
+    gravar(store, "p2", "2024-01-01", hemoglobina=15.0)
+
+    tendencias = {t["analito"]: t for t in store.trends("p1")}
+
+    hb = tendencias["hemoglobina"]
+    assert hb["n_exames"] == 3
+    assert hb["ultimo_valor"] == 11.0
+    assert hb["delta"] == pytest.approx(-1.5)
+    assert hb["delta_total"] == pytest.approx(-2.0)
+    assert hb["delta_percentual"] == pytest.approx(-2.0 / 13.0 * 100)
+    dias = np.array([0, 182, 365])
+    esperado = np.polyfit(dias, [13.0, 12.5, 11.0], 1)[0] * history_store.DIAS_ANO
+    assert hb["inclinacao_anual"] == pytest.approx(esperado)
+    assert hb["transicoes"] == [{"data_exame": "2024-01-01", "de": "normal", "para": "baixo"}]
+
+    assert tendencias["leucocitos"]["inclinacao_anual"] == pytest.approx(0.0)
+    assert tendencias["leucocitos"]["transicoes"] == []
+
+
+def test_tendencias_com_um_exame_e_filtro(store):
+    gravar(store, "p1", "2024-03-01", hemoglobina=14.0, plaquetas=250000)
+
+    tendencias = store.trends("p1", ["plaquetas"])
+
+    assert [t["analito"] for t in tendencias] == ["plaquetas"]
+    assert tendencias[0]["delta"] is None and tendencias[0]["inclinacao_anual"] is None
+    assert store.trends("desconhecido") == []
+
+
+def test_resultado_a_partir_dos_achados_de_apply_rules():
+    lab_values = [{"analito": "hemoglobina", "valor": 10.0}, {"analito": "vcm", "valor": 90.0}]
+    findings = [{"analito": "Hemoglobina", "resultado": "baixo"}]
+
+    flags = history_store.flags_from_findings(lab_values, findings, lambda a: a.capitalize())
+
+    assert flags == {"hemoglobina": "baixo", "vcm": "normal"}
+
+
+def test_rota_de_tendencias_aceita_nome_de_exibicao(store, monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+    import main
+    monkeypatch.setattr(main, "get_history_store", lambda: store)
+    gravar(store, "p1", "2024-03-01", leucocitos=7000, hemacias=4.5, plaquetas=250000)
+
+    resposta = TestClient(main.app).post("/trends", json={"paciente_id": "p1",
+                                                          "analitos": ["Leucócitos", " Hemácias "]})
+
+    assert resposta.status_code == 200
+    assert [t["analito"] for t in resposta.json()["analitos"]] == ["Hemácias", "Leucócitos"]
+
+
+def test_gravacao_e_filtro_pelo_catalogo(store):
+    store.record("p1", "2024-01-10", [{"analito": "Hemoglobina", "valor": 11.0}], {"Hemoglobina": "baixo"})
+    gravar(store, "p1", "2024-03-01", hemoglobina=14.0, plaquetas=250000)
+
+    tendencias = store.trends("p1", ["Hemoglobina"])
+
+    assert [t["analito"] for t in tendencias] == ["hemoglobina"]
+    assert tendencias[0]["n_exames"] == 2 and tendencias[0]["ultimo_valor"] == 14.0
+    assert tendencias[0]["transicoes"] == [{"data_exame": "2024-03-01", "de": "baixo", "para": "normal"}]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Testes da recarga a quente de padrões (patterns.csv) e referências.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services import compound_rules, hot_reload, pdf_parser, rule_engine  # noqa: E402
+from services.reference_index import TABELAS  # noqa: E402
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Cópia de patterns.csv e das tabelas de referência; estado global restaurado ao final."""
+    for arquivo in ["patterns.csv", "compound_rules.csv"] + list(TABELAS.values()):
+        shutil.copy(os.path.join(PROJECT_ROOT, "data", arquivo), tmp_path / arquivo)
+    monkeypatch.setattr(hot_reload, "_snapshot", None)
+    monkeypatch.setattr(hot_reload, "_metricas", {"recargas": 0, "falhas_recarga": 0, "ultima_falha": None})
+    monkeypatch.setattr(pdf_parser, "_pattern_registry", pdf_parser.PatternRegistry.load(str(tmp_path / "patterns.csv")))
+    monkeypatch.setattr(rule_engine, "REFERENCIAS", rule_engine.load_reference_index(str(tmp_path)))
+    monkeypatch.setattr(compound_rules, "_compound_rules",
+                        compound_rules.load_compound_rules(str(tmp_path / "compound_rules.csv")))
+    return tmp_path
+
+
+def reload(config, **kwargs):
+    return hot_reload.reload_config(str(config / "patterns.csv"), str(config), **kwargs)
+
+
+def test_registro_compila_padroes_e_ignora_invalidos(tmp_path):
+    caminho = tmp_path / "patterns.csv"
+    caminho.write_text("analito,pattern,grupo_decimal\n"
+                       "hemoglobina,\"Hemoglobina\\s+([\\d,]+)\",1\n"
+                       "quebrado,\"([\",1\n", encoding="utf-8")
+
+    registro = pdf_parser.PatternRegistry.load(str(caminho))
+
+    assert [p["analito"] for p in registro.patterns] == ["hemoglobina"]
+    assert registro.patterns[0]["regex"].search("HEMOGLOBINA 13,5").group(1) == "13,5"
+    caminho.write_text(caminho.read_text(encoding="utf-8") + "vcm,\"VCM\\s+([\\d,]+)\",1\n", encoding="utf-8")
+    assert pdf_parser.PatternRegistry.load(str(caminho)).versao != registro.versao
+
+
+def test_sem_mudanca_mantem_snapshot(config):
+    atual = hot_reload.current_snapshot()
+
+    snapshot, recarregado = reload(config)
+
+    assert recarregado is False and snapshot is atual
+
+
+def test_recarga_troca_referencias_e_preserva_snapshot_em_uso(config):
+    valores = [{"analito": "hemoglobina", "valor": 13.0}]
+    antigo = hot_reload.current_snapshot()
+    assert rule_engine.apply_rules(valores, "masculino", 40, referencias=antigo.referencias)
+
+    # Nova referência: limite inferior da hemoglobina (homens, 18–59 anos) passa a 10
+    caminho = config / TABELAS["pns"]
+    texto = caminho.read_text(encoding="utf-8")
+    caminho.write_text(texto.replace("Hemoglobina,M,18,59,13.1,", "Hemoglobina,M,18,59,10,"), encoding="utf-8")
+
+    novo, recarregado = reload(config)
+
+    assert recarregado is True
+    assert novo.versao != antigo.versao
+    assert novo.padroes is antigo.padroes and novo.compostas is antigo.compostas  # sem mudança
+    assert hot_reload.current_snapshot() is novo and rule_engine.get_references() is novo.referencias
+    assert rule_engine.apply_rules(valores, "masculino", 40) == []
+    # Requisição que começou antes da recarga segue com a versão antiga
+    assert rule_engine.apply_rules(valores, "masculino", 40, referencias=antigo.referencias)
+    assert hot_reload.config_metrics()["recargas"] == 1
+
+
+def test_erro_na_recarga_mantem_versao_atual(config):
+    atual = hot_reload.current_snapshot()
+    os.remove(config / "patterns.csv")
+    watcher = hot_reload.ConfigWatcher(patterns_path=str(config / "patterns.csv"), data_dir=str(config))
+
+    assert watcher.check() is False
+    assert hot_reload.current_snapshot() is atual
+    assert hot_reload.config_metrics()["falhas_recarga"] == 1
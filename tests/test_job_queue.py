@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Testes da fila persistente de jobs (SQLite + workers locais), com um
+processador falso no lugar do pipeline de interpretação.
+"""
+import os
+import sys
+import threading
+import time
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+from services import job_queue  # noqa: E402
+
+
+def aguardar(fila, job_id, status, limite=5.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        job = fila.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} não chegou a '{status}': {fila.get(job_id)}")
+
+
+def test_job_concluido_com_progresso_e_resultado(tmp_path):
+    def processar(pdf, genero, idade, progress_callback):
+        progress_callback(1, 2, "ocr")
+        progress_callback(2, 2, "ocr")
+        return {"tamanho": len(pdf), "genero": genero, "idade": idade}
+
+    fila = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"), processar, workers=1, poll_interval=0.05)
+    fila.start()
+    try:
+        job_id, deduplicado = fila.submit(b"%PDF-1.4 laudo", "feminino", 35)
+        job = aguardar(fila, job_id, job_queue.CONCLUIDO)
+    finally:
+        fila.stop()
+
+    assert not deduplicado
+    assert job["progresso"] == {"pagina": 2, "total_paginas": 2, "etapa": "ocr"}
+    assert job["resultado"] == {"tamanho": 14, "genero": "feminino", "idade": 35}
+    assert job["erro"] is None
+
+
+def test_deduplicacao_por_conteudo_e_paciente(tmp_path):
+    fila = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"), None)
+
+    primeiro, _ = fila.submit(b"%PDF mesmo", "masculino", 40)
+    repetido, deduplicado = fila.submit(b"%PDF mesmo", "Masculino", 40)
+    outra_idade, dedup_idade = fila.submit(b"%PDF mesmo", "masculino", 41)
+    mesma_idade, dedup_float = fila.submit(b"%PDF mesmo", "masculino", 40.0)
+    meses, dedup_meses = fila.submit(b"%PDF mesmo", "masculino", 40.5)
+
+    assert repetido == primeiro and deduplicado
+    assert outra_idade != primeiro and not dedup_idade
+    assert mesma_idade == primeiro and dedup_float
+    assert meses not in (primeiro, outra_idade) and not dedup_meses
+
+
+def test_erro_registrado_e_reenvio_cria_novo_job(tmp_path):
+    def processar(pdf, genero, idade, progress_callback):
+        raise Exception("Nenhum valor laboratorial foi encontrado no PDF.")
+
+    fila = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"), processar, workers=1, poll_interval=0.05)
+    fila.start()
+    try:
+        job_id, _ = fila.submit(b"%PDF ilegivel", "feminino", 30)
+        job = aguardar(fila, job_id, job_queue.ERRO)
+        novo_id, deduplicado = fila.submit(b"%PDF ilegivel", "feminino", 30)
+    finally:
+        fila.stop()
+
+    assert job["erro"] == "Nenhum valor laboratorial foi encontrado no PDF."
+    assert novo_id != job_id and not deduplicado
+
+
+def test_reinicio_recoloca_jobs_interrompidos(tmp_path):
+    caminho = str(tmp_path / "jobs.sqlite3")
+    liberar = threading.Event()
+
+    def travado(pdf, genero, idade, progress_callback):
+        liberar.wait(5)
+        raise Exception("processo encerrado")
+
+    fila = job_queue.JobQueue(caminho, travado, workers=1, poll_interval=0.05)
+    fila.start()
+    job_id, _ = fila.submit(b"%PDF longo", "masculino", 50)
+    aguardar(fila, job_id, job_queue.PROCESSANDO)
+
+    # Simula queda do processo: o job fica 'processando' no banco
+    fila._stopping.set()
+    nova = job_queue.JobQueue(caminho, lambda *a: {"ok": True}, workers=1, poll_interval=0.05)
+    nova.start()
+    try:
+        job = aguardar(nova, job_id, job_queue.CONCLUIDO)
+    finally:
+        liberar.set()
+        fila.stop()
+        nova.stop()
+
+    assert job["resultado"] == {"ok": True}
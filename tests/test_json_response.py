@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Testes da serialização rápida das respostas de interpretação: o JSON sem
+revalidação precisa ser o mesmo do caminho validado pelo response_model.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, PROJECT_ROOT)
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from services import json_response  # noqa: E402
+from services.records import Finding, LabValue  # noqa: E402
+
+MANUAL = {"genero": "masculino", "idade": 40, "hemoglobina": 10, "vcm": 70, "hcm": 20,
+          "leucocitos": 6000, "plaquetas": 90000}
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    # Briefing fixo: sem chamadas ao Gemini/Ollama
+    monkeypatch.setattr(main, "build_briefing", lambda achados, especialidades: "Briefing")
+    return TestClient(main.app)
+
+
+def nos_dois_caminhos(monkeypatch, requisicao):
+    """Resposta com FAST_JSON_RESPONSES ligado e desligado."""
+    respostas = []
+    for valor in ("1", "0"):
+        monkeypatch.setenv("FAST_JSON_RESPONSES", valor)
+        resposta = requisicao()
+        assert resposta.status_code == 200 and resposta.headers["content-type"] == "application/json"
+        respostas.append(resposta.json())
+    return respostas
+
+
+def test_dumps_serializa_registros_e_numpy():
+    conteudo = {"lab_values_raw": [LabValue("Hemácias", 4.43)], "n": np.int64(3), "x": np.float64(0.5),
+                "lab_findings": [Finding("Hemoglobina", 10.0, "baixo", 4, "Hematologia", "Hemoglobina baixo", "d")]}
+    esperado = {"lab_values_raw": [{"analito": "Hemácias", "valor": 4.43}], "n": 3, "x": 0.5,
+                "lab_findings": [{"analito": "Hemoglobina", "valor": 10.0, "resultado": "baixo", "severidade": 4,
+                                  "especialidade": "Hematologia", "descricao_achado": "Hemoglobina baixo",
+                                  "diretriz": "d"}]}
+
+    assert json.loads(json_response.dumps(conteudo)) == esperado
+    assert "Hemácias".encode("utf-8") in json_response.dumps(conteudo)
+
+
+def test_dumps_sem_orjson_igual(monkeypatch):
+    conteudo = {"lab_values_raw": [LabValue("Hemácias", 4.43)], "tempo_total_ms": 1.5, "erro": None}
+    rapido = json_response.dumps(conteudo)
+    monkeypatch.setattr(json_response, "ORJSON_AVAILABLE", False)
+
+    assert json_response.dumps(conteudo) == rapido
+
+
+def test_nao_finitos_viram_null_nos_dois_serializadores(monkeypatch):
+    conteudo = {"valor": float("nan"), "limites": [float("inf"), -float("inf"), 1.5], "x": np.float64("nan"),
+                "lab_values_raw": [LabValue("Hemoglobina", float("nan"))]}
+    esperado = {"valor": None, "limites": [None, None, 1.5], "x": None,
+                "lab_values_raw": [{"analito": "Hemoglobina", "valor": None}]}
+    rapido = json_response.dumps(conteudo)
+    monkeypatch.setattr(json_response, "ORJSON_AVAILABLE", False)
+
+    assert json_response.dumps(conteudo) == rapido
+    assert json.loads(rapido) == esperado
+
+
+def test_manual_igual_ao_caminho_validado(cliente, monkeypatch):
+    rapido, validado = nos_dois_caminhos(monkeypatch, lambda: cliente.post("/interpret-manual", json=MANUAL))
+
+    assert rapido == validado
+    assert main.InterpretationResponse.model_validate(rapido).model_dump(mode="json") == rapido
+    assert [f["analito"] for f in rapido["lab_findings"]][:2] == ["Hemoglobina", "VCM"]
+
+
+def test_lote_igual_ao_caminho_validado(cliente, monkeypatch, tmp_path):
+    pytest.importorskip("reportlab")
+    import generate_sample_pdf
+    monkeypatch.chdir(tmp_path)
+    generate_sample_pdf.main()
+    pdf = (tmp_path / "tests" / "exemplos" / "hemograma_tabela.pdf").read_bytes()
+    arquivos = [("files", ("a.pdf", pdf, "application/pdf")), ("files", ("b.pdf", pdf, "application/pdf")),
+                ("files", ("c.txt", b"texto", "text/plain"))]  # inválido: erro no item
+
+    rapido, validado = nos_dois_caminhos(monkeypatch, lambda: cliente.post(
+        "/interpret-batch", files=arquivos, data={"genero": "feminino", "idade": "35", "mesclar": "true"}))
+
+    # Só os tempos mudam entre as duas requisições
+    for resposta in (rapido, validado):
+        resposta.pop("tempo_total_ms")
+        for item in resposta["arquivos"]:
+            item.pop("tempo_extracao_ms"), item.pop("tempo_total_ms")
+    assert rapido == validado
+    assert len(rapido["resultado_mesclado"]["lab_values_raw"]) == 14
+    assert rapido["arquivos"][2]["erro"] and rapido["arquivos"][2]["resultado"] is None
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Testes do reconhecimento de layout e do despacho para o pacote de padrões.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services.layout_fingerprint import LayoutCatalog, fingerprint  # noqa: E402
+from services.pdf_parser import PATTERNS_PATH, PatternRegistry, apply_patterns  # noqa: E402
+
+LAUDOS = {
+    "sus_ul": (
+        "HEMOGRAMA Hemácias 4,43 milhões/mm³ Hemoglobina 14,6 g/dL Hematócrito 42,6 % "
+        "VCM 96,2 fL HCM 33,0 pg CHCM 34,3 g/dL RDW 11,8 % "
+        "Leucócitos 100 % 6.970 /μL Neutrófilos 50,9 % 3.548 /μL Eosinófilos 11,5 % 802 /μL "
+        "Basófilos 0,5 % 35 /μL Linfócitos 31,8 % 2.216 /μL Monócitos 5,3 % 369 /μL "
+        "Contagem de Plaquetas 282.000 /μL"
+    ),
+    "compacto_mm3": (
+        "HEMOGRAMA ERITRÓCITOS 4,47 milhões/mm3 HEMOGLOBINA 14,3 g/dL HEMATÓCRITO 41,2 % "
+        "VCM 92,10 fL HCM 32,1 pg CHCM 34,8 g/dL RDW 12,1 % LEUCÓCITOS 3500 "
+        "BASÓFILOS 1%35/mm3 EOSINÓFILOS 0%0/mm3 SEGMENTADOS 32%1120/mm3 LINFÓCITOS 56%1960/mm3 "
+        "PLAQUETAS 250000/mm3"
+    ),
+    "mm3_espacado": (
+        "Hemácias 4,50 milhões/mm³ Hemoglobina 13,9 g/dL Hematócrito 41,0 % VCM 90,1 fL "
+        "HCM 30,2 pg C.H.C.M. 33,5 % R.D.W. 12,9 % Leucócitos 7.500 /mm³ "
+        "Neutrófilos 60 % 4.500 /mm³ Basófilos 0,5 % 38 /mm³ Monócitos 6,0 % 450 /mm³ "
+        "Eosinófilos 3,0 % Plaquetas 250.000"
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def registro():
+    return PatternRegistry.load(PATTERNS_PATH)
+
+
+@pytest.mark.parametrize("layout", sorted(LAUDOS))
+def test_pacote_do_layout_extrai_os_mesmos_valores(layout, registro):
+    catalogo = LayoutCatalog.load()
+    chave, reconhecido, pacote = catalogo.select(LAUDOS[layout], registro)
+
+    assert reconhecido == layout
+    assert len(pacote.patterns) < len(registro.patterns)
+    assert apply_patterns(LAUDOS[layout], pacote)[0] == apply_patterns(LAUDOS[layout], registro)[0]
+    # Pacote compilado uma vez por versão do registro, reaproveitando os padrões compilados
+    assert catalogo.select(LAUDOS[layout], registro)[2] is pacote
+    assert all(p in registro.patterns for p in pacote.patterns)
+
+
+def test_impressao_digital():
+    impressao = fingerprint(LAUDOS["sus_ul"])
+
+    assert {"cab_hemograma", "col_pct_abs_ul", "un_milhoes", "un_ul"} <= impressao
+    assert "col_pct_abs_compacto" not in impressao
+    assert fingerprint("Glicose 90 mg/dL") == frozenset()
+
+
+def test_sem_layout_usa_todos_os_padroes_e_registra_metricas(registro):
+    catalogo = LayoutCatalog.load()
+    texto = "Hemoglobina 14,6 g/dL Leucócitos 7.500"
+
+    chave, layout, pacote = catalogo.select(texto, registro)
+    catalogo.record(chave, layout)
+    for _ in range(3):
+        catalogo.record(*catalogo.select(LAUDOS["sus_ul"], registro)[:2])
+
+    assert layout is None and pacote is registro
+    metricas = catalogo.metrics()
+    assert metricas["documentos"] == 4 and metricas["reconhecidos"] == 3
+    assert metricas["taxa_reconhecimento"] == 0.75
+    assert metricas["impressoes"][0]["layout"] == "sus_ul" and metricas["impressoes"][0]["documentos"] == 3
+
+
+def test_layout_com_caracteristica_desconhecida_e_ignorado(tmp_path):
+    caminho = tmp_path / "layouts.csv"
+    caminho.write_text("layout,exige,padroes,descricao\n"
+                       "novo,col_inexistente,hemoglobina,teste\n"
+                       "sus,col_pct_abs_ul,hemoglobina,teste\n", encoding="utf-8")
+
+    assert [l["layout"] for l in LayoutCatalog.load(str(caminho)).layouts] == ["sus"]
+
+
+def test_analito_que_o_pacote_nao_acha_vem_dos_demais_padroes(tmp_path, monkeypatch):
+    from services import pdf_parser
+    padroes = tmp_path / "patterns.csv"
+    # O alias do pacote não casa com "Contagem de Plaquetas 282.000"; o fora do pacote, sim
+    padroes.write_text("analito,pattern,grupo_decimal\n"
+                       'hemoglobina,"Hemoglobina\\s+([0-9]+,[0-9])",1\n'
+                       'plaquetas,"Plaquetas:\\s+([0-9.]+)",1\n'
+                       'plaquetas_alt,"Contagem de Plaquetas\\s+([0-9.]+)",1\n'
+                       'vcm,"VCM\\s+([0-9]+,[0-9])",1\n', encoding="utf-8")
+    layouts = tmp_path / "layouts.csv"
+    layouts.write_text("layout,exige,padroes,descricao\nsus,col_pct_abs_ul,hemoglobina;plaquetas,teste\n",
+                       encoding="utf-8")
+    catalogo = LayoutCatalog.load(str(layouts))
+    monkeypatch.setenv("TABLE_EXTRACTION", "0")
+    monkeypatch.setattr(pdf_parser, "get_layout_catalog", lambda: catalogo)
+    monkeypatch.setattr(pdf_parser, "check_pdf", lambda pdf: None)
+    monkeypatch.setattr(pdf_parser, "extract_full_text", lambda *args, **kwargs: LAUDOS["sus_ul"])
+
+    valores = pdf_parser.extract_lab_values(b"%PDF-", registry=PatternRegistry.load(str(padroes)))
+
+    # VCM está fora do pacote: não é buscado
+    assert [(v.analito, v.valor) for v in valores] == [("hemoglobina", 14.6), ("plaquetas", 282000.0)]
+    metricas = catalogo.metrics()
+    assert metricas["fallbacks"] == 0
+    assert metricas["analitos_faltantes"] == 1 and metricas["analitos_recuperados"] == 1
+    assert metricas["impressoes"][0]["analitos_faltantes"] == 1
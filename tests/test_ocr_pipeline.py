@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Testes das etapas do pipeline de OCR que não dependem do binário do Tesseract
+(análise de layout com OpenCV). Usa uma imagem sintética de laudo em tabela.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+Image = pytest.importorskip("PIL.Image")
+
+from services import ocr_engine, pdf_parser  # noqa: E402
+
+@pytest.fixture
+def motor_pytesseract(monkeypatch):
+    """Força o motor pytesseract (as chamadas ao binário são substituídas nos testes)."""
+    monkeypatch.setattr(pdf_parser, "get_ocr_engine", lambda: ocr_engine.PytesseractEngine())
+
+
+LINHAS = [
+    ("Hemoglobina", "14,6 g/dL", "13,0 a 17,0"),
+    ("Hematocrito", "42,6 %", "40,0 a 50,0"),
+    ("VCM", "96,2 fL", "83,0 a 101,0"),
+    ("HCM", "33,0 pg", "27,0 a 32,0"),
+    ("Leucocitos", "6.970 /uL", "4.000 a 10.000"),
+    ("Plaquetas", "282.000 /uL", "150.000 a 450.000"),
+]
+
+
+def laudo_sintetico() -> "Image.Image":
+    """Página A4 (~150 dpi) com cabeçalho, tabela de resultados e rodapé."""
+    img = np.full((1754, 1240), 255, dtype=np.uint8)
+    fonte = cv2.FONT_HERSHEY_SIMPLEX
+    cv2.putText(img, "LABORATORIO MUNICIPAL", (100, 120), fonte, 1.2, 0, 2)
+    y = 500
+    for rotulo, resultado, referencia in LINHAS:
+        cv2.putText(img, rotulo, (100, y), fonte, 0.9, 0, 2)
+        cv2.putText(img, resultado, (520, y), fonte, 0.9, 0, 2)
+        cv2.putText(img, referencia, (860, y), fonte, 0.9, 0, 2)
+        y += 55
+    cv2.putText(img, "Assinatura eletronica", (100, 1600), fonte, 0.9, 0, 2)
+    return Image.fromarray(img)
+
+
+def test_detect_results_region_recorta_apenas_a_tabela():
+    region = pdf_parser.detect_results_region(laudo_sintetico())
+
+    assert region is not None
+    x, y, w, h = region["box"]
+    assert len(region["linhas"]) == len(LINHAS)
+    # A tabela fica entre o cabeçalho e o rodapé
+    assert 120 < y < 470
+    assert y + h < 1600
+    assert w * h < 0.5 * 1240 * 1754
+
+
+def test_detect_results_region_sem_tabela():
+    img = np.full((1754, 1240), 255, dtype=np.uint8)
+    cv2.putText(img, "Texto corrido sem colunas", (100, 300), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 0, 2)
+
+    assert pdf_parser.detect_results_region(Image.fromarray(img)) is None
+
+
+def _dados_tesseract(palavras):
+    """Monta a saída de image_to_data a partir de (texto, conf, linha, x, y)."""
+    dados = {k: [] for k in ("text", "conf", "block_num", "par_num", "line_num",
+                             "left", "top", "width", "height")}
+    for texto, conf, linha, x, y in palavras:
+        dados["text"].append(texto)
+        dados["conf"].append(conf)
+        dados["block_num"].append(1)
+        dados["par_num"].append(1)
+        dados["line_num"].append(linha)
+        dados["left"].append(x)
+        dados["top"].append(y)
+        dados["width"].append(80)
+        dados["height"].append(20)
+    return dados
+
+
+def test_ocr_refaz_apenas_linhas_de_baixa_confianca(monkeypatch, motor_pytesseract):
+    img = Image.fromarray(np.full((200, 600), 255, dtype=np.uint8))
+    pagina = _dados_tesseract([
+        ("Hemoglobina", 95, 1, 10, 10), ("14,6", 91, 1, 300, 10),
+        ("P1aquetas", 30, 2, 10, 60), ("282.0O0", 25, 2, 300, 60),
+        ("", -1, 3, 0, 0),
+    ])
+    linha_refeita = _dados_tesseract([("Plaquetas", 90, 1, 2, 2), ("282.000", 88, 1, 290, 2)])
+    chamadas = []
+
+    def image_to_data(imagem, lang, config, output_type, timeout=0):
+        chamadas.append((imagem.size, lang, config))
+        return pagina if len(chamadas) == 1 else linha_refeita
+
+    monkeypatch.setattr(pdf_parser, "detect_medical_document_type", lambda _img, _budget=None: "geral")
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_data", image_to_data)
+
+    texto = pdf_parser.extract_text_with_medical_ocr(img, 0)
+
+    assert texto.splitlines() == ["Hemoglobina 14,6", "Plaquetas 282.000"]
+    # Uma passada na página + uma retentativa, no recorte da linha ruim
+    assert len(chamadas) == 2
+    assert chamadas[0][0] == (600, 200)
+    assert chamadas[1][0][1] < 60 and "--psm 7" in chamadas[1][2]
+
+
+def test_preprocessamento_pula_denoise_em_render_limpo(monkeypatch):
+    limpo = np.asarray(laudo_sintetico())
+    ruidoso = np.clip(limpo + np.random.default_rng(0).normal(0, 20, limpo.shape), 0, 255).astype(np.uint8)
+
+    assert pdf_parser.estimate_noise_sigma(limpo) < pdf_parser.NOISE_SKIP_SIGMA
+    assert pdf_parser.estimate_noise_sigma(ruidoso) > pdf_parser.NOISE_MEDIAN_SIGMA
+
+    chamadas = []
+    monkeypatch.setattr(pdf_parser.cv2, "fastNlMeansDenoising", lambda img: chamadas.append(1) or img)
+    timings = {}
+    resultado = pdf_parser.preprocess_image_for_ocr(limpo, timings)
+
+    assert chamadas == []
+    assert resultado.size == (limpo.shape[1], limpo.shape[0])
+    assert set(timings) == {"escala_cinza", "estimativa_ruido", "denoise", "clahe", "binarizacao"}
+
+
+def test_rotacao_da_sondagem_equivale_a_do_pil():
+    img = np.asarray(laudo_sintetico())[:300, :200]
+    for angulo in (90, 180, 270):
+        esperado = np.asarray(Image.fromarray(img).rotate(-angulo, expand=True))
+        assert np.array_equal(pdf_parser.rotate_page_image(img, angulo), esperado)
+
+
+def test_osd_e_tipo_de_documento_uma_vez_por_pagina(monkeypatch, motor_pytesseract):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page()
+    doc.new_page()
+    pdf = doc.tobytes()
+
+    chamadas = {"osd": 0, "tipo": 0, "dados": 0}
+
+    def image_to_osd(img, output_type, timeout=0):
+        chamadas["osd"] += 1
+        return {"rotate": 0}
+
+    def image_to_string(img, lang, config, timeout=0):
+        chamadas["tipo"] += 1
+        return "Hemograma"
+
+    def image_to_data(img, lang, config, output_type, timeout=0):
+        chamadas["dados"] += 1
+        return _dados_tesseract([("Leucocitos", 90, 1, 10, 10)])
+
+    monkeypatch.setattr(pdf_parser, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_osd", image_to_osd)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", image_to_string)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_data", image_to_data)
+
+    texto = pdf_parser.extract_text_with_ocr(pdf)
+
+    assert "Leucócitos" in texto
+    assert chamadas["osd"] == 2 and chamadas["tipo"] == 2
+    # Três resoluções por página, uma passada de OCR em cada
+    assert chamadas["dados"] == 6
+
+
+def test_orcamento_esgotado_devolve_texto_parcial(monkeypatch, motor_pytesseract):
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    doc.new_page()
+    doc.new_page()
+    pdf = doc.tobytes()
+
+    budget = ocr_engine.OCRBudget(60)
+    chamadas = []
+
+    def image_to_data(img, lang, config, output_type, timeout=0):
+        chamadas.append(timeout)
+        budget.deadline = 0  # o orçamento acaba durante a primeira passada
+        return _dados_tesseract([("Hemoglobina", 40, 1, 10, 10), ("14,6", 40, 1, 300, 10)])
+
+    monkeypatch.setattr(pdf_parser, "OCR_AVAILABLE", True)
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_osd", lambda *a, **k: {"rotate": 0})
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_string", lambda *a, **k: "hemograma")
+    monkeypatch.setattr(ocr_engine.pytesseract, "image_to_data", image_to_data)
+
+    texto = pdf_parser.extract_text_with_ocr(pdf, budget)
+
+    assert budget.esgotado
+    assert "Hemoglobina 14,6" in texto
+    # Nem retentativas, nem outras resoluções, nem a segunda página
+    assert len(chamadas) == 1
+    assert 0 < chamadas[0] <= 60
+
+
+def test_timeout_do_ocr_nunca_vira_sem_limite_com_orcamento():
+    budget = ocr_engine.OCRBudget(60)
+    budget.deadline = 0  # esgotado entre a checagem e a chamada ao Tesseract
+
+    assert pdf_parser.ocr_timeout(budget) > 0
+    assert pdf_parser.ocr_timeout(None) == 0
+
+
+def test_parse_tesseract_config_preserva_whitelist_com_espaco():
+    config = ocr_engine.parse_tesseract_config("--psm 6 --oem 1 -c tessedit_char_whitelist=0123456789%/ ")
+
+    assert config == {"psm": 6, "oem": 1, "variaveis": {"tessedit_char_whitelist": "0123456789%/ "}}
+
+
+def test_motor_incompleto_nao_instancia():
+    class SoTexto(ocr_engine.OCREngine):
+        def image_to_string(self, img, lang, config, timeout=0):
+            return ""
+
+    with pytest.raises(TypeError):
+        SoTexto()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Testes do perfil de cobertura e custo dos padrões.
+"""
+import os
+import re
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services.pattern_profiler import PatternProfile, backtracking_risk, write_patterns_csv  # noqa: E402
+from services.pdf_parser import PatternRegistry, apply_patterns  # noqa: E402
+
+PADROES = (
+    "analito,pattern,grupo_decimal\n"
+    'plaquetas,"Plaquetas\\s+([0-9]{3})",1\n'
+    'plaquetas_alt,"PLT\\s+([0-9]{3})",1\n'
+    'plaquetas_ponto,"PLQ\\s+([0-9]{3})",1\n'
+    'monocitos,"Monocitos\\s+([0-9]{3})",1\n'
+    'monocitos_novo,"Mono\\.\\s+([0-9]{3})",1\n'
+)
+CORPUS = [
+    "Plaquetas 250 Monocitos 400",
+    "PLT 210 Mono. 380",
+    "PLT 190 Mono. 390",
+    "Plaquetas 300 PLT 300 Monocitos 450 Mono. 700",
+]
+
+
+@pytest.fixture
+def registro(tmp_path):
+    caminho = tmp_path / "patterns.csv"
+    caminho.write_text(PADROES, encoding="utf-8")
+    return PatternRegistry.load(str(caminho))
+
+
+def perfilar(registro):
+    perfil = PatternProfile(registro)
+    for texto in CORPUS:
+        apply_patterns(texto, registro, perfil)
+    return perfil
+
+
+def test_perfil_marca_mortos_e_conta_vitorias(registro):
+    linhas = {l["analito"]: l for l in perfilar(registro).report()}
+
+    assert linhas["plaquetas"]["matches"] == 2 and linhas["plaquetas"]["vitorias"] == 2
+    assert linhas["plaquetas_alt"]["matches"] == 3 and linhas["plaquetas_alt"]["vitorias"] == 2
+    assert linhas["plaquetas_ponto"]["marcacoes"] == ["morto"]
+    assert linhas["monocitos_novo"]["vitorias"] == 2 and linhas["monocitos_novo"]["marcacoes"] == []
+    assert all(l["tempo_max_ms"] >= 0 for l in linhas.values())
+
+
+def test_padroes_podados_extraem_os_mesmos_valores(registro, tmp_path):
+    perfil = perfilar(registro)
+    caminho = tmp_path / "podado.csv"
+
+    write_patterns_csv(perfil.pruned_patterns(), str(caminho))
+    podado = PatternRegistry.load(str(caminho))
+
+    assert [p["analito"] for p in podado.patterns] == ["plaquetas", "plaquetas_alt", "monocitos", "monocitos_novo"]
+    for texto in CORPUS:
+        assert apply_patterns(texto, podado)[0] == apply_patterns(texto, registro)[0]
+
+
+def test_reordena_por_vitorias_sem_inverter_conflitos(registro):
+    perfil = perfilar(registro)
+    perfil.vitorias[4] = 10  # monocitos_novo passa a vencer mais que monocitos
+
+    nomes = [p["analito"] for p in perfil.pruned_patterns()]
+
+    # monocitos × monocitos_novo divergiram no mesmo laudo (450 × 700): a ordem original é mantida;
+    # plaquetas × plaquetas_alt nunca divergiram: o mais vitorioso pode ir à frente
+    assert nomes.index("monocitos") < nomes.index("monocitos_novo")
+    perfil.vitorias[1] = 10
+    nomes = [p["analito"] for p in perfil.pruned_patterns()]
+    assert nomes.index("plaquetas_alt") < nomes.index("plaquetas")
+
+
+def test_risco_de_backtracking():
+    assert backtracking_risk(re.compile(r"(?:\d+\s*)+%"), "eosinofilos") == float("inf")
+    assert backtracking_risk(re.compile(r"eosin[óo]filos[^0-9]{0,30}([0-9]{1,2},[0-9])", re.I), "eosinofilos") < 3
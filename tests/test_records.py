@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Testes dos registros tipados do pipeline (LabValue, Finding, ReferenceComparison)
+e da conversão para dict na fronteira da API.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services.job_queue import _json_default  # noqa: E402
+from services.pdf_parser import deduplicate_analitos  # noqa: E402
+from services.records import Finding, LabValue, ReferenceComparison, to_payload  # noqa: E402
+from services.rule_engine import apply_rules, comparar_referencias  # noqa: E402
+from services.specialty_selector import select_specialties  # noqa: E402
+
+
+def test_registro_sem_dict_e_com_leitura_por_chave():
+    valor = LabValue("hemoglobina", 14.6)
+
+    assert not hasattr(valor, "__dict__")
+    assert valor["analito"] == valor.analito == "hemoglobina"
+    assert valor.get("descricao_achado") is None and valor.get("valor") == 14.6
+    with pytest.raises(KeyError):
+        valor["resultado"]
+    assert valor.to_dict() == {"analito": "hemoglobina", "valor": 14.6}
+
+
+def test_pipeline_devolve_registros():
+    valores = [LabValue("hemoglobina", 7.0), {"analito": "leucocitos", "valor": 9600.0}]
+
+    achados = apply_rules(valores, genero="masculino", idade=40)
+    comparacoes = comparar_referencias(valores, genero="masculino", idade=40)
+
+    assert all(isinstance(a, Finding) for a in achados)
+    assert all(isinstance(c, ReferenceComparison) for c in comparacoes)
+    assert [a.analito for a in achados] == ["Hemoglobina", "Leucócitos"]
+    assert achados[0].descricao_achado == "Hemoglobina baixo" and achados[0].severidade > 1
+    assert select_specialties(achados) == ["Hematologia", "Clínico", "Infectologia"]
+
+
+def test_deduplicacao_reaproveita_registro_ja_normalizado():
+    normalizado = LabValue("eosinofilos", 802.0)
+
+    unicos = deduplicate_analitos([normalizado, LabValue("eosinofilos_compacto", 802.0),
+                                   LabValue("hemacias_alt", 4.43)])
+
+    assert unicos == [normalizado, LabValue("hemacias", 4.43)]
+    assert unicos[0] is normalizado
+
+
+def test_conversao_na_fronteira_da_api():
+    achados = apply_rules([LabValue("plaquetas", 50000.0)], genero="feminino", idade=30)
+    resposta = {"lab_findings": achados, "lab_values_raw": [LabValue("Plaquetas", 50000.0)],
+                "resultado_mesclado": None, "arquivos": [{"resultado": {"lab_findings": achados}}]}
+
+    payload = to_payload(resposta)
+
+    assert payload["lab_findings"] == [a.to_dict() for a in achados]
+    assert payload["lab_values_raw"] == [{"analito": "Plaquetas", "valor": 50000.0}]
+    assert payload["arquivos"][0]["resultado"]["lab_findings"] == payload["lab_findings"]
+    # Resultado dos jobs: gravado em JSON direto dos registros
+    assert json.loads(json.dumps(resposta, default=_json_default)) == payload
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Testes do motor vetorizado de comparação PNS × referência laboratorial,
+conferido contra a classificação linha a linha do rule_engine.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from services import analyte_catalog, reference_engine, rule_engine  # noqa: E402
+
+
+def tabela_sintetica(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    analitos = ["Hemoglobina", "hemoglobina", "Plaquetas", "VCM", "Leucócitos", "ferritina"]
+    return pd.DataFrame({
+        "analito": rng.choice(analitos, n),
+        "valor": rng.choice([9.0, 12.5, 14.0, 17.5, 85.0, 99.0, 140000, 300000, 5000], n),
+        "sexo": rng.choice(["F", "masculino", "Feminino", "x"], n),
+        "idade": rng.integers(10, 90, n),
+    })
+
+
+def test_classificacao_igual_a_do_rule_engine():
+    df = tabela_sintetica(400)
+    comparacao = reference_engine.PopulationComparison()
+    posicao = {a: i for i, a in enumerate(comparacao.analitos)}
+    sexos = {"f": 0, "feminino": 0, "m": 1, "masculino": 1}
+
+    for linha in df.itertuples():
+        chave = analyte_catalog.analyte_key(linha.analito)
+        sexo = sexos.get(linha.sexo.lower())
+        if chave not in posicao or sexo is None:
+            continue
+        intervalo = rule_engine.REFERENCIAS.interval("pns", chave, sexo, linha.idade)
+        esperado = rule_engine._classificar(linha.valor, intervalo)
+        codigo = comparacao.pns.classify(np.array([posicao[chave]]), np.array([sexo]),
+                                         np.array([linha.idade]), np.array([linha.valor]))[0]
+        obtido = "sem referência" if codigo == reference_engine.SEM_REFERENCIA else reference_engine.CLASSES[codigo]
+        assert obtido == esperado, linha
+
+
+def test_lotes_nao_alteram_o_resultado(tmp_path):
+    df = tabela_sintetica()
+    caminho = tmp_path / "resultados.csv"
+    df.to_csv(caminho, index=False)
+
+    inteiro = reference_engine.compare_population(str(caminho), chunksize=len(df))
+    em_lotes = reference_engine.compare_population(str(caminho), chunksize=257)
+
+    pd.testing.assert_frame_equal(inteiro, em_lotes)
+    # Sexo inválido e analito sem referência não entram nos estratos
+    assert inteiro["n"].sum() == ((df["sexo"] != "x") & (df["analito"] != "ferritina")).sum()
+
+
+def test_kappa_vetorizado():
+    identidade = np.diag([10, 20, 5])
+    independente = np.outer([1, 2, 1], [1, 2, 1])
+    kappas = reference_engine.cohen_kappa_matrix(np.stack([identidade, independente, np.zeros((3, 3))]))
+
+    assert kappas[0] == pytest.approx(1.0)
+    assert kappas[1] == pytest.approx(0.0)
+    assert np.isnan(kappas[2])
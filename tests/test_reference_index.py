@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Testes do índice compilado de referências: artefato memory-mapped, detecção
+de artefato desatualizado e busca por sexo/faixa etária.
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+
+from services import reference_index  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for arquivo in reference_index.TABELAS.values():
+        shutil.copy(os.path.join(PROJECT_ROOT, "data", arquivo), tmp_path / arquivo)
+    return tmp_path
+
+
+def test_artefato_carregado_com_memory_map(data_dir):
+    versao = reference_index.build(str(data_dir))
+    indice = reference_index.load_reference_index(str(data_dir))
+
+    assert indice.versao == versao
+    assert isinstance(indice.regras, np.memmap)
+    assert indice.interval("pns", "hemoglobina", reference_index.SEXO_F, 30) == (11.5, 14.8)
+    assert indice.interval("pns", "hemoglobina", reference_index.SEXO_F, 60) == (11.3, 15.1)
+    assert indice.interval("pns", "hemoglobina", reference_index.SEXO_F, 17) is None
+    assert indice.specialty(indice.find("pns", "hemoglobina", reference_index.SEXO_M, 40)) == "Hematologia,Clínico"
+
+
+def test_artefato_desatualizado_cai_para_o_csv(data_dir):
+    versao_antiga = reference_index.build(str(data_dir))
+    caminho = data_dir / "lab_reference.csv"
+    caminho.write_text(caminho.read_text(encoding="utf-8").replace("Plaquetas,Todos,18,120,150000",
+                                                                   "Plaquetas,Todos,18,120,140000"),
+                       encoding="utf-8")
+
+    indice = reference_index.load_reference_index(str(data_dir))
+
+    assert indice.versao != versao_antiga
+    assert not isinstance(indice.regras, np.memmap)
+    assert indice.interval("lab", "plaquetas", reference_index.SEXO_M, 40)[0] == 140000
+
+
+def test_regra_do_sexo_prevalece_sobre_todos(data_dir):
+    caminho = data_dir / "lab_reference.csv"
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("Plaquetas,F,18,120,160000,400000,teste\n")
+
+    indice = reference_index.load_reference_index(str(data_dir))
+
+    assert indice.interval("lab", "plaquetas", reference_index.SEXO_F, 40) == (160000, 400000)
+    assert indice.interval("lab", "plaquetas", reference_index.SEXO_M, 40)[0] == 150000
+    # Sexo não informado: só regras 'Todos'
+    assert indice.interval("lab", "plaquetas", None, 40)[0] == 150000
+
+
+def test_faixas_pediatricas_e_curva_interpolada(data_dir):
+    # Tabela de teste (valores ilustrativos, não clínicos)
+    caminho = data_dir / "lab_reference.csv"
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write("Plaquetas,Todos,0,0.5,200000,500000,teste\n"
+                "Plaquetas,Todos,0.5,1,210000,490000,teste\n"
+                "Hemoglobina,M,1,9,11.0,13.0,teste,1\n"
+                "Hemoglobina,M,10,17,12.0,15.0,teste,sim\n")
+    caminho.write_text(caminho.read_text(encoding="utf-8").replace(
+        "analito_id,sexo,idade_min,idade_max,limite_inferior,limite_superior,fonte",
+        "analito_id,sexo,idade_min,idade_max,limite_inferior,limite_superior,fonte,interpolar"), encoding="utf-8")
+
+    indice = reference_index.load_reference_index(str(data_dir))
+
+    # Limite fracionário é exclusivo; inteiro conta o ano completo
+    assert indice.interval("lab", "plaquetas", None, 0.25) == (200000, 500000)
+    assert indice.interval("lab", "plaquetas", None, 0.5) == (210000, 490000)
+    assert indice.interval("lab", "plaquetas", None, 1.9) == (210000, 490000)
+    assert indice.interval("lab", "plaquetas", None, 2) is None
+    assert indice.interval("lab", "hemoglobina", reference_index.SEXO_F, 17.9) is None
+    # Curva: linear entre os pontos (1 → 10 anos); após o último ponto, constante
+    assert indice.interval("lab", "hemoglobina", reference_index.SEXO_M, 1) == (11.0, 13.0)
+    inferior, superior = indice.interval("lab", "hemoglobina", reference_index.SEXO_M, 5.5)
+    assert (inferior, superior) == (pytest.approx(11.5), pytest.approx(14.0))
+    assert indice.interval("lab", "hemoglobina", reference_index.SEXO_M, 17.5) == (12.0, 15.0)
+    assert indice.interval("lab", "hemoglobina", reference_index.SEXO_M, 18) is None
+
+    # A grade vetorizada (anos completos) concorda com o índice em cada idade
+    from services import reference_engine
+    analitos, _, lab = reference_engine.reference_grids(pns=[], lab=indice.records("lab"))
+    a = analitos.index("hemoglobina")
+    for idade in range(0, 121):
+        esperado = indice.interval("lab", "hemoglobina", reference_index.SEXO_M, idade)
+        if esperado is None:
+            assert np.isnan(lab.inferior[a, 1, idade]), idade
+        else:
+            assert (lab.inferior[a, 1, idade], lab.superior[a, 1, idade]) == pytest.approx(esperado), idade
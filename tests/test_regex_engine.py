@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Testes da execução dos padrões com limite de tempo (motores re2/regex/re).
+"""
+import os
+import re
+import sys
+import time
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services import pdf_parser, regex_engine  # noqa: E402
+from services.pdf_parser import PATTERNS_PATH, PatternRegistry, apply_patterns  # noqa: E402
+from services.records import LabValue  # noqa: E402
+from services.regex_engine import CompiledPattern, PatternTimeout, RegexBudget  # noqa: E402
+
+LAUDO = (
+    "HEMOGRAMA Hemácias 4,43 milhões/mm³ Hemoglobina 14,6 g/dL Hematócrito 42,6 % "
+    "VCM 96,2 fL HCM 33,0 pg CHCM 34,3 g/dL RDW 11,8 % "
+    "Leucócitos 100 % 6.970 /μL Neutrófilos 50,9 % 3.548 /μL Eosinófilos 11,5 % 802 /μL "
+    "Basófilos 0,5 % 35 /μL Linfócitos 31,8 % 2.216 /μL Monócitos 5,3 % 369 /μL "
+    "Contagem de Plaquetas 282.000 /μL"
+)
+CATASTROFICO = "(a|aa)+$"
+
+
+def registro(tmp_path, linhas):
+    caminho = tmp_path / "patterns.csv"
+    caminho.write_text("analito,pattern,grupo_decimal\n" + "".join(linhas), encoding="utf-8")
+    return PatternRegistry.load(str(caminho))
+
+
+@pytest.mark.parametrize("motor", ["re2", "regex", "re"])
+def test_motores_extraem_os_mesmos_valores(motor, monkeypatch):
+    if motor not in regex_engine._motores_disponiveis():
+        pytest.skip(f"motor {motor} não instalado")
+    monkeypatch.setenv("REGEX_ENGINE", "re")
+    esperado, _ = apply_patterns(LAUDO, PatternRegistry.load(PATTERNS_PATH))
+
+    monkeypatch.setenv("REGEX_ENGINE", motor)
+    padroes = PatternRegistry.load(PATTERNS_PATH)
+    valores, _ = apply_patterns(LAUDO, padroes)
+
+    assert {p["regex"].motor for p in padroes.patterns} == {motor}
+    assert valores == esperado and len(valores) >= 14
+
+
+def test_padrao_invalido_levanta_re_error():
+    with pytest.raises(re.error):
+        CompiledPattern("([")
+
+
+@pytest.mark.skipif(not regex_engine.REGEX_AVAILABLE, reason="pacote regex não instalado")
+def test_busca_catastrofica_e_interrompida(tmp_path, monkeypatch):
+    monkeypatch.setenv("REGEX_ENGINE", "regex")
+    with pytest.raises(PatternTimeout):
+        CompiledPattern(CATASTROFICO).search("a" * 40 + "b", 0.01)
+
+    padroes = registro(tmp_path, [f'lento,"{CATASTROFICO}",1\n', 'hemoglobina,"Hemoglobina\\s+([0-9]+,[0-9])",1\n'])
+    orcamento = RegexBudget(por_padrao=0.01, documento=5)
+    antes = regex_engine.regex_metrics()["buscas_interrompidas"]
+
+    valores, _ = apply_patterns("a" * 40 + "b Hemoglobina 14,6", padroes, regex_budget=orcamento)
+
+    # O padrão seguinte ainda é avaliado; o resultado fica marcado como incompleto
+    assert valores == [LabValue("hemoglobina", 14.6)]
+    assert orcamento.interrompidos == ["lento"] and orcamento.incompleto
+    metricas = regex_engine.regex_metrics()
+    assert metricas["buscas_interrompidas"] == antes + 1 and metricas["padroes_problematicos"]["lento"] >= 1
+
+
+@pytest.mark.skipif(not regex_engine.RE2_AVAILABLE, reason="pacote google-re2 não instalado")
+def test_re2_tem_tempo_linear(monkeypatch):
+    monkeypatch.setenv("REGEX_ENGINE", "re2")
+    padrao = CompiledPattern(CATASTROFICO)
+
+    assert padrao.motor == "re2" and padrao.search("a" * 100000 + "b") is None
+    # Retrovisor não existe no RE2: o padrão vai para o próximo motor
+    assert CompiledPattern(r"(\d)\1").motor != "re2"
+
+
+def test_orcamento_do_documento(tmp_path, monkeypatch):
+    monkeypatch.setenv("REGEX_ENGINE", "re")
+    padroes = registro(tmp_path, ['hemoglobina,"Hemoglobina\\s+([0-9]+,[0-9])",1\n', 'vcm,"VCM\\s+([0-9]+,[0-9])",1\n'])
+
+    esgotado = RegexBudget(documento=0)
+    assert apply_patterns(LAUDO, padroes, regex_budget=esgotado)[0] == []
+    assert esgotado.esgotado and esgotado.incompleto
+
+    # Motor sem interrupção: busca acima do limite vai para as métricas, sem perder o valor
+    lento = RegexBudget(por_padrao=0, documento=5)
+    assert len(apply_patterns(LAUDO, padroes, regex_budget=lento)[0]) == 2
+    assert lento.lentos == ["hemoglobina", "vcm"] and not lento.incompleto
+
+
+def test_orcamento_comeca_na_aplicacao_dos_padroes(monkeypatch):
+    # Extração lenta do texto (OCR) antes dos padrões: o prazo do documento ainda não corre
+    def texto_lento(*args, **kwargs):
+        time.sleep(0.15)
+        return LAUDO
+
+    monkeypatch.setenv("TABLE_EXTRACTION", "0")
+    monkeypatch.setattr(pdf_parser, "check_pdf", lambda pdf: None)
+    monkeypatch.setattr(pdf_parser, "extract_full_text", texto_lento)
+    orcamento = RegexBudget(documento=0.1)
+
+    valores = pdf_parser.extract_lab_values(b"%PDF-", registry=PatternRegistry.load(PATTERNS_PATH),
+                                            regex_budget=orcamento)
+
+    assert len(valores) >= 14 and not orcamento.incompleto
+
+
+def test_sem_despacho_padroes_so_buscam_o_que_a_tabela_nao_trouxe(tmp_path, monkeypatch):
+    monkeypatch.setenv("REGEX_ENGINE", "re")
+    monkeypatch.setenv("LAYOUT_DISPATCH", "0")
+    monkeypatch.setattr(pdf_parser, "check_pdf", lambda pdf: None)
+    monkeypatch.setattr(pdf_parser, "extract_full_text", lambda *args, **kwargs: LAUDO)
+    monkeypatch.setattr(pdf_parser, "extract_table_values",
+                        lambda pdf: ([LabValue("hemoglobina", 14.6)], ["vcm"]))
+    padroes = registro(tmp_path, ['hemoglobina,"Hemoglobina\\s+([0-9]+,[0-9])",1\n', 'vcm,"VCM\\s+([0-9]+,[0-9])",1\n'])
+    # Limite por padrão zero: toda busca avaliada vai para `lentos`
+    orcamento = RegexBudget(por_padrao=0, documento=5)
+
+    valores = pdf_parser.extract_lab_values(b"%PDF-", registry=padroes, regex_budget=orcamento)
+
+    assert valores == [LabValue("hemoglobina", 14.6), LabValue("vcm", 96.2)]
+    assert orcamento.lentos == ["vcm"]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Testes da severidade dos achados pela distância aos limites da referência.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+np = pytest.importorskip("numpy")
+
+from services import rule_engine, severity  # noqa: E402
+from services.specialty_selector import select_specialties  # noqa: E402
+
+
+def test_graus_crescem_com_a_distancia():
+    # Hemoglobina 13,1–16,9: log-normal com 95% no intervalo
+    valores = [13.0, 12.0, 11.0, 10.0, 9.0, 5.0, 0.0]
+    graus = severity.severity_scores(valores, [13.1] * 7, [16.9] * 7).tolist()
+
+    assert graus == sorted(graus)
+    assert graus[0] == 1 and graus[-1] == severity.SEVERIDADE_MAX
+    # Logo além do limite, |z| ≈ 1,96
+    z = severity.z_scores([13.1, 16.9], [13.1, 13.1], [16.9, 16.9])
+    assert z == pytest.approx([-severity.Z_INTERVALO, severity.Z_INTERVALO])
+
+
+def test_limite_inferior_zero_usa_escala_linear():
+    # Eosinófilos 0–649: acima do limite, z linear sobre média 324,5
+    z = severity.z_scores([649.0, 973.5], [0, 0], [649.0, 649.0])
+
+    assert z[0] == pytest.approx(severity.Z_INTERVALO)
+    assert z[1] == pytest.approx(severity.Z_INTERVALO * 2)
+
+
+def test_ranking_de_especialidades_usa_as_severidades():
+    achados = rule_engine.apply_rules([
+        {"analito": "hemoglobina", "valor": 7.0},   # grave
+        {"analito": "leucocitos", "valor": 9600},   # discreto
+    ], genero="masculino", idade=40)
+
+    severidades = {f["analito"]: f["severidade"] for f in achados}
+    assert severidades["Hemoglobina"] > severidades["Leucócitos"] == 1
+    assert select_specialties(achados) == ["Hematologia", "Clínico", "Infectologia"]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Testes da extração por coordenadas (tabela de resultados).
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+sys.path.insert(0, PROJECT_ROOT)
+
+pytest.importorskip("numpy")
+
+from services import table_extractor  # noqa: E402
+from services.records import LabValue  # noqa: E402
+from services.table_extractor import detect_columns, group_rows, read_result, split_cells  # noqa: E402
+
+
+def palavra(x, y, texto, largura=None, altura=10):
+    return (x, y, x + (largura or 6 * len(texto)), y + altura, texto)
+
+
+CABECALHO = [palavra(50, 100, "Exame"), palavra(200, 100, "Resultado"), palavra(280, 100, "Unidade"),
+             palavra(360, 101, "Valores"), palavra(410, 101, "de"), palavra(425, 101, "Referência")]
+
+
+def test_colunas_pelo_cabecalho():
+    colunas = detect_columns(group_rows(CABECALHO)[0])
+
+    assert [nome for _, nome in colunas] == ["resultado", "unidade", "referencia"]
+    # "Valores de Referência": a coluna começa na primeira palavra do título
+    assert 350 < colunas[2][0] <= 360
+    assert detect_columns(group_rows([palavra(50, 100, "Hemoglobina"), palavra(200, 100, "14,6")])[0]) is None
+
+
+def test_celulas_nao_misturam_resultado_e_referencia():
+    colunas = detect_columns(group_rows(CABECALHO)[0])
+    # Linha levemente desalinhada (y) e resultado alinhado à direita da coluna
+    linha = group_rows([palavra(50, 120, "Contagem"), palavra(104, 121, "de"), palavra(120, 120, "plaquetas"),
+                        palavra(230, 121, "282.000"), palavra(280, 120, "/µL"),
+                        palavra(360, 120, "150.000"), palavra(410, 120, "a"), palavra(420, 120, "450.000")])
+
+    assert len(linha) == 1
+    celulas = split_cells(linha[0], colunas)
+    assert celulas == {"rotulo": "Contagem de plaquetas", "resultado": "282.000", "unidade": "/µL",
+                       "referencia": "150.000 a 450.000"}
+
+
+@pytest.mark.parametrize("celula, analito, esperado", [
+    ("50,9 % 3.548 /µL", "neutrofilos", (3548.0, "ul")),
+    ("52,3 %", "neutrofilos", (52.3, "pct")),
+    ("4,43 10^6/µL", "hemacias", (4.43, "e6")),
+    ("14,6 g/dL", "hemoglobina", (14.6, "gdl")),
+    ("não realizado", "hemoglobina", None),
+])
+def test_leitura_do_resultado(celula, analito, esperado):
+    assert read_result(celula, analito) == esperado
+
+
+def test_pdf_tabular(tmp_path, monkeypatch):
+    pytest.importorskip("reportlab")
+    if not (table_extractor.PYMUPDF_AVAILABLE or table_extractor.PDFPLUMBER_AVAILABLE):
+        pytest.skip("PyMuPDF/pdfplumber não instalados")
+    import generate_sample_pdf
+    monkeypatch.chdir(tmp_path)
+    generate_sample_pdf.main()
+
+    valores, pendentes = table_extractor.extract_table_values(str(tmp_path / "tests" / "exemplos" / "hemograma_tabela.pdf"))
+
+    mapa = {v["analito"]: v["valor"] for v in valores}
+    assert len(mapa) == 14 and pendentes == []
+    assert mapa["hemacias"] == 4.43 and mapa["leucocitos"] == 6970 and mapa["plaquetas"] == 282000
+    assert mapa["eosinofilos"] == 802  # absoluto, não o % nem a referência
+
+
+def test_analito_fora_da_tabela_fica_pendente(monkeypatch):
+    pagina = CABECALHO + [
+        palavra(50, 120, "Hemoglobina"), palavra(200, 120, "14,6"), palavra(280, 120, "g/dL"),
+        palavra(50, 140, "Leucócitos"), palavra(200, 140, "7.500"), palavra(280, 140, "/µL"),
+        palavra(50, 200, "Obs.:"), palavra(90, 200, "plaquetas"), palavra(150, 200, "agregadas"),
+    ]
+    monkeypatch.setattr(table_extractor, "page_words", lambda pdf: [pagina])
+
+    valores, pendentes = table_extractor.extract_table_values(b"%PDF-")
+
+    assert valores == [LabValue("hemoglobina", 14.6), LabValue("leucocitos", 7500.0)]
+    assert pendentes == ["plaquetas"]
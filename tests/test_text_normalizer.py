@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Testes da normalização do texto extraído em passada única.
+
+A referência é a sequência de re.sub que a normalização substituiu
+(sanitize_unicode_text + normalize_fragmented_terms): a saída precisa ser
+idêntica byte a byte.
+"""
+import os
+import random
+import re
+import sys
+import unicodedata
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+from services.text_normalizer import normalize_text  # noqa: E402
+
+ROTULOS_LEGADOS = [
+    (r"(?i)E\s*o\s*s\s*i\s*n\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Eosinófilos"),
+    (r"(?i)N\s*e\s*u\s*t\s*r\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Neutrófilos"),
+    (r"(?i)L\s*i\s*n\s*f\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Linfócitos"),
+    (r"(?i)M\s*o\s*n\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Monócitos"),
+    (r"(?i)B\s*a\s*s\s*[óo]\s*f\s*i\s*l\s*o\s*s", "Basófilos"),
+    (r"(?i)H\s*e\s*m\s*[áa]\s*c\s*i\s*a\s*s", "Hemácias"),
+    (r"(?i)L\s*e\s*u\s*c\s*[óo]\s*c\s*i\s*t\s*o\s*s", "Leucócitos"),
+    (r"(?i)P\s*l\s*a\s*q\s*u\s*e\s*t\s*a\s*s", "Plaquetas"),
+]
+
+
+def normalizacao_legada(text: str) -> str:
+    """Sequência antiga de passadas, mantida como referência."""
+    if not text:
+        return text
+    processed = unicodedata.normalize('NFKC', text)
+    for ch in ("\u200B", "\u200C", "\u200D", "\u2060", "\u00A0"):
+        processed = processed.replace(ch, " ")
+    processed = re.sub(r"\s{2,}", " ", processed)
+    for pat, rep in ROTULOS_LEGADOS:
+        processed = re.sub(pat, rep, processed)
+    processed = re.sub(r"(\d)\s*,\s*(\d)", r"\1,\2", processed)
+    processed = re.sub(r"(\d)\s*\.\s*(\d{3})", r"\1.\2", processed)
+    processed = re.sub(r"(\d)\s+([\d]{1,3})(?=[^\d])", r"\1\2", processed)
+    processed = re.sub(r"(\d)\s*%", r"\1%", processed)
+    processed = re.sub(r"μ\s*L", "μL", processed)
+    processed = re.sub(r"mm\s*3", "mm3", processed)
+    processed = re.sub(r"/\s*μ\s*L", "/μL", processed)
+    return processed
+
+
+LAUDO = (
+    "HEMOGRAMA\nHemácias 4,43 milhões/mm³ Hemoglobina 14,6 g/dL Hematócrito 42,6 %\n"
+    "VCM 96,2 fL HCM 33,0 pg CHCM 34,3 g/dL RDW 11,8 %\n"
+    "Leucócitos 100 % 6.970 /μL Neutrófilos 50,9 % 3.548 /µL Eosinófilos 11,5 % 802 /μL\n"
+    "Basófilos 0,5 % 35 /μL Linfócitos 31,8 % 2.216 /μL Monócitos 5,3 % 369 /μL\n"
+    "Contagem de Plaquetas 282.000 /μL"
+)
+ROTULOS_OCR = ["Eosinófilos", "Neutrófilos", "Linfócitos", "Monócitos", "Basófilos", "Hemácias",
+               "Leucócitos", "Plaquetas", "LEUCOCITOS", "eosinofilos", "linfocitos"]
+FRAGMENTOS_OCR = list("0123456789") * 3 + [
+    " ", " ", "  ", "\n", "\t", ",", ".", "%", "μ", "µ", "L", "l", "m", "mm", "3", "/", "³",
+    "\u00A0", "\u200B", "\u2060", "a", "s", "é", "ó", "g/dL", " /μL", " / μ L", " mm 3",
+]
+
+
+def fragmentar(rotulo: str, rng: random.Random) -> str:
+    """Rótulo como o OCR às vezes devolve: letras separadas por espaços."""
+    if rng.random() < 0.3:
+        return rotulo
+    return "".join(c + rng.choice(["", "", " ", "  ", "\n"]) for c in rotulo).rstrip()
+
+
+def texto_ocr(rng: random.Random, pedacos: int = 40) -> str:
+    """Texto sintético com os defeitos de OCR que a normalização corrige."""
+    return "".join(fragmentar(rng.choice(ROTULOS_OCR), rng) if rng.random() < 0.15 else rng.choice(FRAGMENTOS_OCR)
+                   for _ in range(rng.randint(1, pedacos)))
+
+
+def test_corrige_termos_fragmentados():
+    texto = "E o s i n ó f i l o s 5 , 0 %  7 . 010 /  μ L\u200Bplaquetas mm 3"
+
+    assert normalize_text(texto) == "Eosinófilos 5,0% 7.010 /μL Plaquetas mm3"
+    assert normalize_text("") == "" and normalize_text(None) is None
+
+
+def test_identica_a_sequencia_antiga_no_laudo():
+    for texto in (LAUDO, LAUDO.replace(" ", "  "), " ".join(LAUDO), LAUDO.replace(",", " , ")):
+        assert normalize_text(texto) == normalizacao_legada(texto)
+
+
+def test_identica_a_sequencia_antiga_em_textos_de_ocr():
+    rng = random.Random(47)
+    for _ in range(5000):
+        texto = texto_ocr(rng)
+        assert normalize_text(texto) == normalizacao_legada(texto), repr(texto)
+
+
+def test_casos_em_que_a_ordem_das_passadas_importa():
+    # O rótulo só vira "L..." depois da passada dos rótulos; o μ se junta a ele
+    for texto in ("μ l e u c ó c i t o s", "/ μ linfocitos", "mm 3 5 x", "1 , 2 , 3", "9 . 9 9 9 %", "7 5"):
+        assert normalize_text(texto) == normalizacao_legada(texto)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testes da normalização de unidades dos valores extraídos.
+"""
+import os
+import sys
+
+import pytest
+
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(THIS_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "backend"))
+
+pytest.importorskip("numpy")
+
+from services.units import normalize_units, unit_after  # noqa: E402
+
+
+@pytest.mark.parametrize("valor, resto, unidade", [
+    ("7.010", " /μL", "ul"),
+    ("7010", "/mm³", "ul"),
+    ("7,01", " 10^3/μL", "e3"),
+    ("7,01", " x10³/uL", "e3"),
+    ("282", " mil/mm3", "e3"),
+    ("4,50", " milhões/mm³", "e6"),
+    ("4,50", " 10^6/μL", "e6"),
+    ("52,3", " % 3.666 /μL", "pct"),
+    ("13,5", " g/dL", "gdl"),
+    ("135", " g/L", "gl"),
+    ("88,0", " fL", ""),
+    ("13,5", "", ""),
+])
+def test_unidade_apos_o_valor(valor, resto, unidade):
+    assert unit_after("Analito " + valor + resto, len("Analito " + valor)) == unidade
+
+
+def test_conversao_por_tabela_com_faixa_plausivel():
+    analitos = ["leucocitos", "plaquetas", "hemacias", "hemacias", "hemoglobina", "leucocitos", "vcm"]
+    valores = [7.01, 282, 4500000, 4.5, 135, 7010, 88.0]
+    unidades = ["e3", "e3", "ul", "ul", "gl", "e3", ""]
+
+    indices, convertidos = normalize_units(analitos, valores, unidades)
+
+    assert indices.tolist() == list(range(len(analitos)))
+    # 7010 já em /μL (heurística de milhares) não vira 7 milhões; 4,5 /μL segue em milhões
+    assert convertidos.tolist() == pytest.approx([7010, 282000, 4.5, 4.5, 13.5, 7010, 88.0])
+
+
+def test_diferencial_percentual_vira_absoluto():
+    analitos = ["leucocitos", "neutrofilos", "eosinofilos", "eosinofilos", "monocitos"]
+    valores = [6970, 52.3, 11.5, 800, 5.0]
+    unidades = ["ul", "pct", "pct", "ul", "pct"]
+
+    indices, convertidos = normalize_units(analitos, valores, unidades)
+
+    # Eosinófilos já têm absoluto: o percentual é descartado
+    assert indices.tolist() == [0, 1, 3, 4]
+    assert convertidos.tolist() == [6970, 3645, 800, 348]
+
+
+def test_percentual_sem_leucocitos_e_descartado():
+    indices, convertidos = normalize_units(["hemoglobina", "eosinofilos"], [13.5, 5.0], ["gdl", "pct"])
+
+    assert indices.tolist() == [0]
+    assert convertidos.tolist() == [13.5]